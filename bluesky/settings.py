@@ -26,6 +26,16 @@ start_location = 'EHAM'
 # Simulation timestep [seconds]
 simdt = 0.05
 
+# Compute the atmosphere, autopilot, ADS-B and kinematics step in place in
+# preallocated arrays. False: the original version, which creates new arrays
+# for every step; both give the same traffic state (see tests/test_traffic.py)
+inplace_kinematics = True
+
+# Floating point precision of the traffic state arrays. options: 'double', 'mixed'
+# 'mixed': positions (lat/lon/alt) and times in double precision, speeds,
+# atmosphere, autopilot and ADS-B data in single precision (float32)
+traf_precision = 'double'
+
 #=============================================================================
 #=   QTGL Gui specific settings below
 #=   Pygame Gui options in /data/graphics/scr_cfg.dat
@@ -31,21 +31,13 @@ def process(command, numargs, commandargs, sim, traf, scr, cmd):
     elif command == "RESO":
         if numargs== 0:
             scr.echo("RESO TYPE")
+            scr.echo("CURRENT RESO: " + traf.dbconf.CRname)
         else:
-            if commandargs[1]=="OFF":
-                traf.dbconf.SetCRmethod("DoNothing")
-            elif commandargs[1]=="MVP":
-                traf.dbconf.SetCRmethod("MVP")
-            elif commandargs[1]=="SWARM":
-                traf.dbconf.SetCRmethod("Swarm")
-            elif commandargs[1]=="DIFGAME":
-                traf.dbconf.SetCRmethod("Difgame")
-            elif commandargs[1]=="EBY":
-                traf.dbconf.SetCRmethod("Eby")
-            elif commandargs[1]=="MVP_LAY":
-                traf.dbconf.SetCRmethod("MVP_LAY")
-            else:
-                scr.echo("RESO TYPE UNKNOWN")
+            # CR methods are registered by their RESO name in CDRmethods
+            result = traf.dbconf.SetCRmethod(commandargs[1])
+            if result is not True:
+                # Unknown method, or method that can not be loaded
+                scr.echo(result[1])
 
     elif command == "ZONER":
         if numargs ==0:
@@ -95,9 +87,9 @@ def process(command, numargs, commandargs, sim, traf, scr, cmd):
     elif command == "DTNOLOOK":
         if numargs ==0:
             scr.echo("DTNOLOOK <TIME>")
-            scr.echo("CURRENT DTNOLOOK: "+str(traf.dtasas)+" SEC")
+            scr.echo("CURRENT DTNOLOOK: "+str(traf.sched.dt['ASAS'])+" SEC")
         else:
-            traf.dtasas=float(commandargs[1])
+            traf.sched.setrate('ASAS', float(commandargs[1]))
     
     elif command == "DIR":
         if numargs ==0:
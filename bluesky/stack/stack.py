@@ -66,6 +66,16 @@ class Commandstack:
                 "[onoff]",
                 traf.dbconf.toggle
             ],
+            "ASASBLOCK": [
+                "ASASBLOCK [n]",
+                "[int]",
+                traf.dbconf.setblocksize
+            ],
+            "ASASKWIK": [
+                "ASASKWIK ON/OFF",
+                "[onoff]",
+                traf.dbconf.setkwik
+            ],
             "BATCH": [
                 "BATCH filename",
                 "txt",
@@ -93,12 +103,12 @@ class Commandstack:
             "CRE": [
                 "CRE acid,type,lat,lon,hdg,alt,spd",
                 "txt,txt,pos,hdg,alt,spd",
-                traf.create
+                lambda *args: self.addcreate(traf, *args)  # created in batches, see process()
             ],
             "DEL": [
                 "DEL acid/shape",
                 "txt",
-                lambda a: traf.delete(a) if traf.id.count(a) > 0 \
+                lambda a: traf.delete(a) if traf.id2idx(a) >= 0 \
                      else scr.objappend(0, a, None)
                 ],
             "DELWPT": [
@@ -274,6 +284,11 @@ class Commandstack:
                 "txt",
                 sim.scenarioInit
             ],
+            "SCHED": [
+                "SCHED [FMS/ASAS/PERF/AREA,dt,phase,nsubsets]",
+                "[txt,float,float,int]",
+                lambda *args: traf.sched.setrate(*args)
+            ],
             "SEED": [
                 "SEED value",
                 "int",
@@ -360,6 +375,8 @@ class Commandstack:
         #--------------------------------------------------------------------
 
         self.cmdstack  = []
+        self.crequeue  = []     # arguments of CRE commands waiting for batch creation
+        self.creids    = set()  # call signs of the aircraft waiting for creation
         self.scenfile  = ""
         self.scentime  = []
         self.scencmd   = []
@@ -583,6 +600,28 @@ class Commandstack:
         f.close()
         return True
 
+    def addcreate(self, traf, acid, *args):
+        """ Collect the arguments of a CRE command for batch creation """
+        # Check for existing aircraft now, so the error goes with the command
+        acid = acid.upper()
+        if acid in traf.idindex or acid in self.creids:
+            return False, acid + " already exists."
+
+        self.crequeue.append((acid,) + args)
+        self.creids.add(acid)
+        return True
+
+    def flushcreate(self, traf, scr):
+        """ Create all collected aircraft with one call to traf.create_batch """
+        if len(self.crequeue) == 0:
+            return
+
+        results = traf.create_batch(*zip(*self.crequeue))
+        self.crequeue = []
+        self.creids   = set()
+        if type(results) == tuple:
+            scr.echo("CRE:" + results[1])
+
     def process(self, sim, traf, scr):
         """process and empty command stack"""
         # Process stack of commands
@@ -592,13 +631,23 @@ class Commandstack:
             if len(line) == 0:
                 continue
 
+            # Consecutive CRE commands (e.g. from a scenario file) are created
+            # in one batch: do so before any other command is processed
+            if not line.upper().startswith("CRE"):
+                self.flushcreate(traf, scr)
+
             # Split command line into command and arguments, pass traf ids to check for
             # switched acid and command
-            cmd, args = cmdsplit(line.upper(), traf.id)
+            cmd, args = cmdsplit(line.upper(), traf.idindex)
             numargs   = len(args)
 
+            # A CRE command can refer to an aircraft that is waiting for
+            # creation (e.g. as position): create the waiting aircraft first
+            if len(self.creids) > 0 and len(self.creids.intersection(args[1:])) > 0:
+                self.flushcreate(traf, scr)
+
             # Check if this is a POS command with only an aircraft id
-            if numargs == 0 and traf.id.count(cmd) > 0:
+            if numargs == 0 and traf.id2idx(cmd) >= 0:
                 args    = [cmd]
                 cmd     = 'POS'
                 numargs = 1
@@ -720,6 +769,7 @@ class Commandstack:
             #**********************************************************************
 
         # End of for-loop of cmdstack
+        self.flushcreate(traf, scr)
         self.cmdstack = []
         return
 
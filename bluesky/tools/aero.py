@@ -48,6 +48,12 @@ a0  = sqrt(gamma*R*T0)  # sea level speed of sound ISA
 # cas = vtas2cas(tas,h)   # tas to cas conversion both m/s, h in [m]
 # cas = vmach2cas(M,h)    # Mach to cas conversion cas in m/s, h in [m]
 # M   = vcas2mach(cas,h)   # cas to mach copnversion cas in m/s, h in [m]
+#
+# vatmos, vtas2mach, vmach2tas, vcas2tas and vtas2cas also take the arrays to
+# store the result in (out) and scratch arrays for the atmosphere (tmp, three
+# arrays of the same size), so they do not create new arrays, e.g.:
+#   vcas2tas(cas,h,out=tas,tmp=(tmp0,tmp1,tmp2))
+# (out should not be one of the inputs)
 
 # Atmosphere up to 22 km (72178 ft)
 
@@ -55,7 +61,10 @@ a0  = sqrt(gamma*R*T0)  # sea level speed of sound ISA
 # ------------------------------------------------------------------------------
 # Vectorized aero functions
 # ------------------------------------------------------------------------------
-def vatmos(alt):  # alt in m
+def vatmos(alt, out=None):  # alt in m
+    if out is not None:
+        return vatmos_out(alt, *out)
+
     # Temp
     T = np.maximum(288.15 - 0.0065 * alt, 216.65)
 
@@ -70,6 +79,38 @@ def vatmos(alt):  # alt in m
     return p, rho, T
 
 
+def vatmos_out(alt, p, rho, T):
+    """ vatmos in the arrays p, rho and T (same calculation) """
+    # Temp
+    np.multiply(alt, 0.0065, out=T)
+    np.subtract(288.15, T, out=T)
+    np.maximum(T, 216.65, out=T)
+
+    # Density
+    np.divide(T, 288.15, out=rho)
+    np.power(rho, 4.256848030018761, out=rho)
+    rho *= 1.225
+    np.subtract(alt, 11000., out=p)
+    np.maximum(p, 0., out=p)
+    np.negative(p, out=p)
+    p /= 6341.552161
+    np.exp(p, out=p)
+    rho *= p
+
+    # Pressure
+    np.multiply(rho, R, out=p)
+    p *= T
+
+    return p, rho, T
+
+
+def scratch(h, tmp):
+    """ Scratch arrays for the atmosphere: tmp, or new arrays """
+    if tmp is None:
+        return [np.empty(np.shape(h)) for i in range(3)]
+    return tmp
+
+
 def vtemp(alt):         # hinput [m]
     # Temp
     Tstrat = np.array(len(alt) * [216.65])  # max 22 km!
@@ -96,15 +137,27 @@ def vvsound(hinput):  # Speed of sound for given altitude h [m]
 
 
 # ---------Speed conversions---h in [m]------------------
-def vtas2mach(tas, h):
+def vtas2mach(tas, h, out=None, tmp=None):
     """ True airspeed (tas) to mach number conversion """
+    if out is not None:
+        p, rho, a = vatmos(h, scratch(h, tmp))
+        a *= gamma * R
+        np.sqrt(a, out=a)
+        return np.divide(tas, a, out=out)
+
     a = vvsound(h)
     M = tas / a
     return M
 
 
-def vmach2tas(M, h):
+def vmach2tas(M, h, out=None, tmp=None):
     """ True airspeed (tas) to mach number conversion """
+    if out is not None:
+        p, rho, a = vatmos(h, scratch(h, tmp))
+        a *= gamma * R
+        np.sqrt(a, out=a)
+        return np.multiply(M, a, out=out)
+
     a = vvsound(h)
     tas = M * a
     return tas
@@ -124,16 +177,53 @@ def vtas2eas(tas, h):
     return eas
 
 
-def vcas2tas(cas, h):
+def vcas2tas(cas, h, out=None, tmp=None):
     """ cas2tas conversion both m/s """
+    if out is not None:
+        p, rho, T = vatmos(h, scratch(h, tmp))
+        qdyn = np.multiply(cas, rho0, out=out)
+        qdyn *= cas
+        qdyn /= 7. * p0
+        qdyn += 1.
+        np.power(qdyn, 3.5, out=qdyn)
+        qdyn -= 1.
+        qdyn *= p0
+
+        qdyn /= p
+        qdyn += 1.
+        np.power(qdyn, 2. / 7., out=qdyn)
+        qdyn -= 1.
+        np.multiply(p, 7., out=T)
+        T /= rho
+        qdyn *= T
+        return np.sqrt(qdyn, out=out)
+
     p, rho, T = vatmos(h)
     qdyn      = p0*((1.+rho0*cas*cas/(7.*p0))**3.5-1.)
     tas       = np.sqrt(7.*p/rho*((1.+qdyn/p)**(2./7.)-1.))
     return tas
 
 
-def vtas2cas(tas, h):
+def vtas2cas(tas, h, out=None, tmp=None):
     """ tas2cas conversion both m/s """
+    if out is not None:
+        p, rho, T = vatmos(h, scratch(h, tmp))
+        qdyn = np.multiply(rho, tas, out=out)
+        qdyn *= tas
+        np.multiply(p, 7., out=T)
+        qdyn /= T
+        qdyn += 1.
+        np.power(qdyn, 3.5, out=qdyn)
+        qdyn -= 1.
+        qdyn *= p
+
+        qdyn /= p0
+        qdyn += 1.
+        np.power(qdyn, 2. / 7., out=qdyn)
+        qdyn -= 1.
+        qdyn *= 7. * p0 / rho0
+        return np.sqrt(qdyn, out=out)
+
     p, rho, T = vatmos(h)
     qdyn      = p*((1.+rho*tas*tas/(7.*p))**3.5-1.)
     cas       = np.sqrt(7.*p0/rho0*((qdyn/p0+1.)**(2./7.)-1.))
@@ -3,6 +3,10 @@
 #include "numpy/arrayobject.h"
 #include "geo.hpp"
 #include <iostream>
+#include <vector>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 #define DEG2RAD 0.017453292519943295
 #define RAD2DEG 57.29577951308232
 #define M2NM 0.0005399568034557236
@@ -365,7 +369,8 @@ static PyObject* qdrpos(PyObject* self, PyObject* args)
         // Calculate the output vectors
         pos newpos;
         while (--size >= 0) {
-            newpos = _qdrpos(DEG2RAD * *plat1, DEG2RAD * *plon1, DEG2RAD * *pqdr, NM2M * *pdst);
+            // NB: _qdrpos takes the distance before the bearing
+            newpos = _qdrpos(DEG2RAD * *plat1, DEG2RAD * *plon1, NM2M * *pdst, DEG2RAD * *pqdr);
             *plat2 = RAD2DEG * newpos.lat;
             *plon2 = RAD2DEG * newpos.lon;
             ++plat1; ++plon1; ++pdst; ++pqdr; ++plat2; ++plon2;
@@ -380,7 +385,7 @@ static PyObject* qdrpos(PyObject* self, PyObject* args)
     } else {
         // Args should be scalars
         pos newpos = _qdrpos(DEG2RAD * PyFloat_AsDouble(arg1), DEG2RAD * PyFloat_AsDouble(arg2),
-                             DEG2RAD * PyFloat_AsDouble(arg3), NM2M    * PyFloat_AsDouble(arg4));
+                             NM2M    * PyFloat_AsDouble(arg4), DEG2RAD * PyFloat_AsDouble(arg3));
         return Py_BuildValue("dd", RAD2DEG * newpos.lat, RAD2DEG * newpos.lon);
     }
 };
@@ -653,6 +658,183 @@ static PyObject* kwikqdrdist_matrix(PyObject* self, PyObject* args)
     return Py_BuildValue("NN", qdr, dst);
 };
 
+// Conflict pair found by the detection kernel
+struct conflict {
+    long   i, j;
+    double tcpa, tin, tout, dcpa, qdr, dist;
+};
+
+// State of the aircraft for the detection kernel: own state, ADS-B state
+struct cpa_state {
+    double *lat, *lon, *alt, *trk, *gs, *vs,
+           *adsblat, *adsblon, *adsbalt, *adsbtrk, *adsbgs, *adsbvs;
+    double R, dh, tlook;
+};
+
+// CPA calculation for ownship i and intruder j, same calculation as the numpy
+// version of the detection (asas.py, cpa). Returns whether (i,j) is a conflict.
+// With near != NULL, *near is set to whether (j,i) can be a conflict.
+static bool _cpa(const cpa_state& s, long i, long j, conflict& c, bool* near)
+{
+    qdr_d_in ll1, ll2;
+    ll1.init(DEG2RAD * s.lat[i], DEG2RAD * s.lon[i]);
+    ll2.init(DEG2RAD * s.adsblat[j], DEG2RAD * s.adsblon[j]);
+    double qdr  = RAD2DEG * _qdr(ll1, ll2),
+           dist = M2NM * _dist(ll1, ll2) * NM2M,
+           dx   = dist * sin(DEG2RAD * qdr),
+           dy   = dist * cos(DEG2RAD * qdr),
+           du   = s.gs[j] * sin(DEG2RAD * s.trk[j]) - s.adsbgs[i] * sin(DEG2RAD * s.adsbtrk[i]),
+           dv   = s.gs[j] * cos(DEG2RAD * s.trk[j]) - s.adsbgs[i] * cos(DEG2RAD * s.adsbtrk[i]);
+
+    double dv2raw = du * du + dv * dv,
+           dv2    = fabs(dv2raw) < 1e-6 ? 1e-6 : dv2raw,
+           vrel   = sqrt(dv2),
+           tcpa   = -(du * dx + dv * dy) / dv2,
+           dcpa2  = dist * dist - tcpa * tcpa * dv2,
+           R2     = s.R * s.R;
+
+    // Vertical conflict: crossing of disk (-dh,+dh)
+    double dalt   = s.alt[j] - s.adsbalt[i],
+           dvsraw = s.vs[j] - s.adsbvs[i],
+           dvs    = fabs(dvsraw) < 1e-6 ? 1e-6 : dvsraw,
+           tcrosshi = (dalt + s.dh) / -dvs,
+           tcrosslo = (dalt - s.dh) / -dvs,
+           tinver   = fmin(tcrosshi, tcrosslo),
+           toutver  = fmax(tcrosshi, tcrosslo);
+
+    // Horizontal conflict, combined with vertical conflict
+    bool swconfl = false;
+    if (dcpa2 < R2) {
+        double dtinhor = sqrt(fmax(0.0, R2 - dcpa2)) / vrel,
+               tin     = fmax(tinver, tcpa - dtinhor),
+               tout    = fmin(toutver, tcpa + dtinhor);
+        if (tin <= tout && tout > 0.0 && tin < s.tlook) {
+            conflict cf = {i, j, tcpa, tin, tout, sqrt(fmax(0.0, dcpa2)), qdr, dist};
+            c = cf;
+            swconfl = true;
+        }
+    }
+    if (near == NULL)
+        return swconfl;
+
+    // Pair (j,i) can be a conflict: (i,j) in conflict with a protected zone
+    // enlarged by the convergence of the meridians (see asas.py, cpa)
+    double phi1 = DEG2RAD * s.lat[i], phi2 = DEG2RAD * s.lat[j],
+           dlon = s.lon[j] - s.lon[i];
+    dlon = DEG2RAD * (dlon - 360.0 * floor((dlon + 180.0) / 360.0));
+    double conv  = 1.001 * 2.0 * atan(fabs(tan(0.5 * dlon)) *
+                   fmax(fabs(sin(phi1)), fabs(sin(phi2))) / cos(0.5 * (phi2 - phi1))) + 1e-9,
+           Rnear = s.R + 10.0 + 1e-6 * dist + dist * conv;
+
+    if (fabs(dv2raw) < 1e-6) {
+        *near = true;
+    } else if (dcpa2 < Rnear * Rnear) {
+        if (fabs(dvsraw) < 1e-6) {
+            bool vernear = fabs(dalt) <= s.dh + 1e-6 * s.tlook + 1.0;
+            tinver  = vernear ? -1e8 : 1e8;
+            toutver = vernear ? 1e8 : -1e8;
+        }
+        double dnear = sqrt(fmax(0.0, Rnear * Rnear - dcpa2)) / vrel,
+               tin   = fmax(tinver, tcpa - dnear) - 1e-3,
+               tout  = fmin(toutver, tcpa + dnear) + 1e-3;
+        *near = tin <= tout && tout >= 0.0 && tin <= s.tlook;
+    } else {
+        *near = false;
+    }
+    return swconfl;
+}
+
+static PyObject* cpapairs(PyObject* self, PyObject* args)
+{
+    // Pairs i, j, own state: lat, lon, alt, trk, gs, vs, ADS-B state: idem
+    PyObject *argi, *argj, *arg[12];
+    cpa_state s;
+    int symmetric = 0;
+    if (!PyArg_ParseTuple(args, "OOOOOOOOOOOOOOddd|i", &argi, &argj,
+                          &arg[0], &arg[1], &arg[2], &arg[3], &arg[4], &arg[5],
+                          &arg[6], &arg[7], &arg[8], &arg[9], &arg[10], &arg[11],
+                          &s.R, &s.dh, &s.tlook, &symmetric))
+        return NULL;
+
+    PyArrayObject *ai = (PyArrayObject*)PyArray_FROM_OTF(argi, NPY_LONG, NPY_ARRAY_IN_ARRAY),
+                  *aj = (PyArrayObject*)PyArray_FROM_OTF(argj, NPY_LONG, NPY_ARRAY_IN_ARRAY);
+    if (ai == NULL || aj == NULL) {
+        Py_XDECREF(ai);
+        Py_XDECREF(aj);
+        return NULL;
+    }
+    PyArrayObject *arr[12];
+    double *p[12];
+    for (int k = 0; k < 12; ++k) {
+        arr[k] = (PyArrayObject*)PyArray_FROM_OTF(arg[k], NPY_DOUBLE, NPY_ARRAY_IN_ARRAY);
+        if (arr[k] == NULL) {
+            for (int m = 0; m < k; ++m) Py_DECREF(arr[m]);
+            Py_DECREF(ai);
+            Py_DECREF(aj);
+            return NULL;
+        }
+        p[k] = (double*)PyArray_DATA(arr[k]);
+    }
+    s.lat     = p[0]; s.lon     = p[1]; s.alt     = p[2];
+    s.trk     = p[3]; s.gs      = p[4]; s.vs      = p[5];
+    s.adsblat = p[6]; s.adsblon = p[7]; s.adsbalt = p[8];
+    s.adsbtrk = p[9]; s.adsbgs  = p[10]; s.adsbvs = p[11];
+
+    long *pairi = (long*)PyArray_DATA(ai),
+         *pairj = (long*)PyArray_DATA(aj);
+    npy_intp npairs = PyArray_SIZE(ai);
+
+    // Conflicts (i,j) and, when symmetric, (j,i) per pair
+    std::vector<conflict> fwd(npairs), bwd(symmetric ? npairs : 0);
+    std::vector<char> isfwd(npairs, 0), isbwd(symmetric ? npairs : 0, 0);
+
+    Py_BEGIN_ALLOW_THREADS
+
+    #pragma omp parallel for schedule(dynamic, 256)
+    for (npy_intp k = 0; k < npairs; ++k) {
+        bool near = false;
+        isfwd[k] = _cpa(s, pairi[k], pairj[k], fwd[k], symmetric ? &near : NULL);
+        if (near)
+            isbwd[k] = _cpa(s, pairj[k], pairi[k], bwd[k], NULL);
+    }
+
+    Py_END_ALLOW_THREADS
+
+    for (int k = 0; k < 12; ++k) Py_DECREF(arr[k]);
+    Py_DECREF(ai);
+    Py_DECREF(aj);
+
+    // Copy the conflicts to the output arrays: pairs (i,j), then pairs (j,i)
+    npy_intp nconf = 0;
+    for (size_t k = 0; k < isfwd.size(); ++k) nconf += isfwd[k];
+    for (size_t k = 0; k < isbwd.size(); ++k) nconf += isbwd[k];
+
+    PyObject *out[8];
+    out[0] = PyArray_SimpleNew(1, &nconf, NPY_LONG);
+    out[1] = PyArray_SimpleNew(1, &nconf, NPY_LONG);
+    for (int k = 2; k < 8; ++k) out[k] = PyArray_SimpleNew(1, &nconf, NPY_DOUBLE);
+    long   *pi = (long*)PyArray_DATA((PyArrayObject*)out[0]),
+           *pj = (long*)PyArray_DATA((PyArrayObject*)out[1]);
+    double *pf[6];
+    for (int k = 0; k < 6; ++k) pf[k] = (double*)PyArray_DATA((PyArrayObject*)out[k + 2]);
+
+    for (int pass = 0; pass < 2; ++pass) {
+        const std::vector<conflict>& confs = pass ? bwd : fwd;
+        const std::vector<char>&     found = pass ? isbwd : isfwd;
+        for (size_t k = 0; k < found.size(); ++k) {
+            if (!found[k])
+                continue;
+            const conflict& c = confs[k];
+            *pi++ = c.i;      *pj++ = c.j;
+            *pf[0]++ = c.tcpa; *pf[1]++ = c.tin;  *pf[2]++ = c.tout;
+            *pf[3]++ = c.dcpa; *pf[4]++ = c.qdr;  *pf[5]++ = c.dist;
+        }
+    }
+
+    return Py_BuildValue("NNNNNNNN", out[0], out[1], out[2], out[3],
+                         out[4], out[5], out[6], out[7]);
+};
+
 static struct PyMethodDef methods[] = {
     {"rwgs84", rwgs84, METH_VARARGS, "Get local earth radius using WGS'84 spec."},
     {"rwgs84_matrix", rwgs84, METH_VARARGS, "Get local earth radius using WGS'84 spec (for vectors)."},
@@ -666,6 +848,7 @@ static struct PyMethodDef methods[] = {
     {"kwikdist_matrix", kwikdist_matrix, METH_VARARGS, "Quick and dirty dist [nm] (for vectors)"},
     {"kwikqdrdist", kwikqdrdist, METH_VARARGS, "Quick and dirty dist [nm] and bearing [deg]"},
     {"kwikqdrdist_matrix", kwikqdrdist_matrix, METH_VARARGS, "Quick and dirty dist [nm] and bearing [deg] (for vectors)"},
+    {"cpapairs", cpapairs, METH_VARARGS, "Conflict detection for aircraft pairs i,j: conflict pairs i,j with tcpa, tin, tout, dcpa [m], qdr [deg] and dist [m]"},
     {NULL, NULL, 0, NULL}
 };
 
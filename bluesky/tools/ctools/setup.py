@@ -3,8 +3,17 @@
 
 from distutils.core import setup, Extension
 import numpy as np
+import sys
 
-ext_modules = [Extension('cgeo', sources=['cgeo.cpp'])]
+# OpenMP for the multi-threaded conflict detection kernel
+if sys.platform == 'win32':
+    openmp_compile, openmp_link = ['/openmp'], []
+else:
+    openmp_compile, openmp_link = ['-fopenmp'], ['-fopenmp']
+
+ext_modules = [Extension('cgeo', sources=['cgeo.cpp'],
+                         extra_compile_args=openmp_compile,
+                         extra_link_args=openmp_link)]
 
 setup(name='cgeo', version='1.0', include_dirs=[np.get_include()],
       ext_modules=ext_modules)
@@ -189,18 +189,15 @@ class Modesbeast(TcpSocket):
     def stack_all_commands(self):
         """create and stack command"""
         params = ('lat', 'lon', 'alt', 'speed', 'heading', 'callsign')
+        newac = []
         for i, d in self.acpool.items():
             # check if all needed keys are in dict
             if set(params).issubset(d):
                 acid = d['callsign']
                 # check is aircraft is already beening displayed
                 if(self.traf.id2idx(acid) < 0):
-                    mdl = self.default_ac_mdl
-                    v = aero.tas2cas(d['speed'], d['alt'] * aero.ft)
-                    cmdstr = 'CRE %s, %s, %f, %f, %f, %d, %d' % \
-                        (acid, mdl, d['lat'], d['lon'],
-                            d['heading'], d['alt'], v)
-                    self.stack.stack(cmdstr)
+                    # new aircraft are created together below
+                    newac.append(d)
                 else:
                     cmdstr = 'MOVE %s, %f, %f, %d' % \
                         (acid, d['lat'], d['lon'], d['alt'])
@@ -212,6 +209,18 @@ class Modesbeast(TcpSocket):
                     v_cas = aero.tas2cas(d['speed'], d['alt'] * aero.ft)
                     cmdstr = 'SPD %s, %f' % (acid,  v_cas)
                     self.stack.stack(cmdstr)
+
+        # create all new aircraft in one batch (same units as CRE command)
+        if len(newac) > 0:
+            alts = [d['alt'] * aero.ft for d in newac]
+            spds = [aero.tas2cas(d['speed'], alt) * aero.kts
+                    for d, alt in zip(newac, alts)]
+            self.traf.create_batch([d['callsign'] for d in newac],
+                                   len(newac) * [self.default_ac_mdl],
+                                   [d['lat'] for d in newac],
+                                   [d['lon'] for d in newac],
+                                   [d['heading'] for d in newac],
+                                   alts, spds)
         return
 
     def remove_outdated_ac(self):
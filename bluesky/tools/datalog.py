@@ -40,16 +40,15 @@ class Datalog():
     def start(self, acbatch, dt):
         if len(self.sim.traf.id) == 0:
             return False, "LOG: No traffic present, log not started."
-        self.id2idx = np.vectorize(self.sim.traf.id2idx)  # vectorize function
         if acbatch is None:  # No batch defined, log all
-            self.aclist = self.id2idx(self.sim.traf.id)
+            self.aclist = self.sim.traf.ids2idx(self.sim.traf.id)
         elif acbatch == 'AREA':
             if self.sim.traf.swarea:
-                self.aclist = self.id2idx(self.sim.traf.id)
+                self.aclist = self.sim.traf.ids2idx(self.sim.traf.id)
             else:
                 return False, "LOG: AREA DISABLED, LOG NOT STARTED"
         else:
-            idx = self.id2idx(acbatch)
+            idx = np.array(self.sim.traf.id2idx(acbatch))
             if idx < 0:  # not an acid or ac does not exist
                 return False, "LOG: ACID " + acbatch + " NOT FOUND"
             else:
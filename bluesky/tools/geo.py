@@ -116,7 +116,7 @@ def qdrdist_matrix(lat1, lon1, lat2, lon2):
     condition = prodla < 0
 
     r = np.zeros(prodla.shape)
-    r = np.where(condition, r, rwgs84_matrix(lat1.T + lat2))
+    r = np.where(condition, r, rwgs84_matrix(0.5 * (lat1.T + lat2)))
 
     a = 6378137.0
 
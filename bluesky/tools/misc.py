@@ -117,8 +117,9 @@ def cmdsplit(cmdline, trafids=None):
         if cmdargs[i] == "@":
             cmdargs[i] = ""
 
-    # If a traffic id list is passed, check if command and first argument need to be switched
-    if trafids and len(cmdargs) > 1 and trafids.count(cmdargs[0]):
+    # If traffic ids are passed (list, or dict/set for a fast lookup), check if
+    # command and first argument need to be switched
+    if trafids and len(cmdargs) > 1 and cmdargs[0] in trafids:
         cmdargs[0:2] = cmdargs[1::-1]
 
     # return command, argumentlist
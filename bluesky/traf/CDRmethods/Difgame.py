@@ -6,16 +6,33 @@ Created on Wed Mar 04 14:27:44 2015
 """
 
 import numpy as np
-import Difgamelearnerfunctions as dg
-from aero import nm, kts, vtas2eas
+# The discretisation functions of the learner are not part of BlueSky: without
+# them the method can not be used (RESO DIFGAME reports this message)
+try:
+    from . import Difgamelearnerfunctions as dg
+except ImportError:
+    raise ImportError("Difgame needs module Difgamelearnerfunctions "
+                      "(discretisation of states and controls of the "
+                      "learner), which is not included in BlueSky")
+from ...tools.aero import nm, kts, vtas2eas
+try:
+    from ...tools import cgeo as geo
+except ImportError:
+    from ...tools import geo
 import os
 
+# Control table per discretised state, loaded once (see start)
+Controls = None
+
 
 def start(dbconf):
+    global Controls
     dbconf.CRname="Difgame"
-    filepath=os.path.abspath("Difgame.py")
-    fpath=filepath[:-10]+"\CDRmethods\DifgameActions.npy"
-    dbconf.Controls = np.load(fpath)
+    # Control table next to this module, read from disk when indexed
+    if Controls is None:
+        fpath=os.path.join(os.path.dirname(os.path.abspath(__file__)),"DifgameActions.npy")
+        Controls = np.load(fpath,mmap_mode='r')
+    dbconf.Controls = Controls
     
     # Discretization numbers: in how many elements is discretized
     dbconf.dn_state=[9,9,5,5,8] #states
@@ -55,40 +72,36 @@ def resolve(dbconf):
         return
     # -------------------------------------------------------------------------
     # First, perform special Conflict Detection to find which conflicts to resolve
+    # The conflict region lies within dist_a+2*dist_b of the ownship, so only
+    # the aircraft pairs within that distance are considered
+    dgiown,dgioth,qdr,dist = dbconf.neighbours(dbconf.dist_a+2.*dbconf.dist_b,1e9)
+
     # Relative horizontal positions: p[a,b] is p from a to b
-    qdrrel = np.radians(dbconf.qdr-dbconf.traf.trk.reshape((len(dbconf.traf.trk),1)))
-    xrel= np.sin(qdrrel)*dbconf.dist
-    yrel= np.cos(qdrrel)*dbconf.dist
-    
+    qdrrel = np.radians(qdr-dbconf.traf.trk[dgiown])
+    xrel= np.sin(qdrrel)*dist
+    yrel= np.cos(qdrrel)*dist
+
     # Define the two borders:
-    b1=np.where( yrel -np.abs(xrel) > -dbconf.dist_a                ,True,False)
-    b2=np.where( xrel**2 + (yrel-dbconf.dist_b)**2 < (dbconf.dist_a+dbconf.dist_b)**2   ,True,False)
+    b1= yrel -np.abs(xrel) > -dbconf.dist_a
+    b2= xrel**2 + (yrel-dbconf.dist_b)**2 < (dbconf.dist_a+dbconf.dist_b)**2
 
-    # Create conflict matrix
-    dbconf.swconfl_dg = b1*b2*(1.-np.eye(dbconf.traf.ntraf))
-    
     # -------------------------------------------------------------------------
-    # Second, create a list of conflicts  and aircraft indices to iterate over
-    
-    dgconfidxs = np.where(dbconf.swconfl_dg)
-    dgnconf = len(dgconfidxs[0])
-    dgiown = dgconfidxs[0]
-    dgioth = dgconfidxs[1]
-    
+    # Second, create a list of conflicts and aircraft indices
+    dgconf = np.where(b1*b2)[0]
+    dgiown = dgiown[dgconf]
+    dgioth = dgioth[dgconf]
+
     # -------------------------------------------------------------------------
     # Third, create control matrix and find controls
     # Also, aircraft in DGconflict should follow ASAS
-    dbconf.traf.asasactive.fill(False) 
-    controls=np.zeros((dbconf.traf.ntraf,3),dtype=np.int)    
-    
-    for i in range(dgnconf):
-        id1=dgiown[i]
-        id2=dgioth[i]
-        dbconf.traf.asasactive[id1]=True
-        dbconf.traf.asasactive[id2]=True
-        
-        ctrl=Difgamehor(dbconf,id1,id2)
-        controls[id1]+=ctrl-np.array([1,1,1])
+    dbconf.traf.asasactive.fill(False)
+    dbconf.traf.asasactive[dgiown]=True
+    dbconf.traf.asasactive[dgioth]=True
+
+    # Superposition of the controls of all conflicts of each ownship
+    controls=np.zeros((dbconf.traf.ntraf,3),dtype=int)
+    ctrl=Difgamehor(dbconf,dgiown,dgioth,qdr[dgconf],dist[dgconf])
+    np.add.at(controls,dgiown,ctrl-np.array([1,1,1]))
 
     # Now, write controls as limits in traf class
     # First: limit superpositioned controls to maximum values
@@ -100,7 +113,7 @@ def resolve(dbconf):
     acccontrol=dbconf.a_o[controls[:,0]]
     bankcontrol=dbconf.b_o[controls[:,1]]
     climbcontrol=dbconf.traf.avsdef*np.sign(controls[:,2])
-    
+
     # Now assign in the traf class --------------------------------------------
     # Change autopilot desired speed
     dbconf.traf.asasspd=vtas2eas(np.where(acccontrol==0,dbconf.traf.gs,\
@@ -113,59 +126,60 @@ def resolve(dbconf):
 
     # Set bank angle for aircraft in conflict
     dbconf.traf.aphi=np.radians(np.where(dbconf.traf.asasactive,np.abs(bankcontrol),25.))
-    
+
     # Change autopilot desired altitude
     dbconf.traf.aalt=np.where(climbcontrol==0,dbconf.traf.alt,\
         np.where(climbcontrol>0,1e9,-1e9))
     # Set climb rate for aircraft in conflict
     dbconf.traf.asasvsp=np.abs(climbcontrol)
-    
 
-    
-def Difgamehor(dbconf,own,wrn):
+
+
+def Difgamehor(dbconf,own,wrn,qdr,dist):
+    """Controls (acceleration, bank, climb index) of ownships own in their
+       conflicts with wrn, all pairs at once. qdr [deg] and dist [m] are
+       from own to wrn. Returns array (npairs x 3)."""
+    traf=dbconf.traf
+
     # Does the ownship try to hit the other ship?
-    pirates = (dbconf.traf.id[own]=="WRN")
-    
-    if pirates: #switch to perspective of ownship, as dbconf.Control is in that form
-        a=own
-        own=wrn
-        wrn=a
-
-    #First, compute the five states        
-    dist=dbconf.dist[own,wrn] 
-    qdr=dbconf.qdr[own,wrn]
-    phi=np.radians((dbconf.traf.trk[wrn]-dbconf.traf.trk[own]+180)%360-180)
-    qdrrel=qdr-dbconf.traf.trk[own]
+    pirates = np.array([traf.id[i]=="WRN" for i in own],dtype=bool)
+
+    #switch to perspective of ownship, as dbconf.Control is in that form
+    own,wrn = np.where(pirates,wrn,own),np.where(pirates,own,wrn)
+    qdr = np.array(qdr,dtype=float)
+    dist = np.array(dist,dtype=float)
+    if np.any(pirates):
+        qdrp,distp = geo.qdrdist(traf.lat[own[pirates]],traf.lon[own[pirates]],\
+                                 traf.adsblat[wrn[pirates]],traf.adsblon[wrn[pirates]])
+        qdr[pirates] = qdrp
+        dist[pirates] = np.asarray(distp)*nm
+
+    #First, compute the five states
+    phi=np.radians((traf.trk[wrn]-traf.trk[own]+180)%360-180)
+    qdrrel=qdr-traf.trk[own]
     x=np.sin(np.radians(qdrrel))*dist
     y=np.cos(np.radians(qdrrel))*dist
-    v_o=dbconf.traf.gs[own]
-    v_w=dbconf.traf.adsbgs[wrn]
-    
-    state=np.array([x,y,v_o,v_w,phi])
-    dstate=np.array([],dtype=np.int_)
-          
+    v_o=traf.gs[own]
+    v_w=traf.adsbgs[wrn]
+
+    state=[x,y,v_o,v_w,phi]
+    dstate=[]
+
     for p in range(5):
         # Construct the new discretized state
-        whichbin=int(np.digitize([state[p]],dbconf.statebins[p])[0]-1)
+        whichbin=np.digitize(state[p],dbconf.statebins[p])-1
         #if p in [3,4]: #if the state variable is an angle
         if p in [4]:    #if the state variable is an angle
             whichbin = whichbin % dbconf.dn_state[p]
-        dstate=np.append(dstate,whichbin)    
-    
+        dstate.append(whichbin)
+
     # Find the correct horizontal controls: if 'pirates', look at wrongship
-    horC = dbconf.Controls[tuple(dstate)][pirates]
+    C=np.empty((len(own),3),dtype=int)
+    actions=dbconf.Controls[tuple(dstate)]
+    C[:,0:2]=np.where(pirates[:,np.newaxis],actions['wrong'],actions['own'])
 
     # Find vertical controls
-    verticalconflict = np.abs(dbconf.traf.alt[own]-dbconf.traf.alt[wrn])<dbconf.Rm
-    if verticalconflict:
-        if dbconf.traf.alt[own]<dbconf.traf.alt[wrn]:
-            verC = np.array([0])
-        else:
-            verC=np.array([2])
-    else:
-        verC = np.array([1])
-    
-    #Combine Horizontal and Vertical Controls
-    C=np.append(horC,verC)
-    
+    verticalconflict = np.abs(traf.alt[own]-traf.alt[wrn])<dbconf.Rm
+    C[:,2]=np.where(verticalconflict,np.where(traf.alt[own]<traf.alt[wrn],0,2),1)
+
     return C
@@ -5,7 +5,6 @@ Created on Tue Mar 03 16:50:19 2015
 @author: Jerom Maas
 """
 import numpy as np
-from aero import vtas2eas
 
 def start(dbconf):
     dbconf.CRname="Eby"
@@ -13,63 +12,28 @@ def start(dbconf):
 def resolve(dbconf):
     if not dbconf.swasas:
         return
-        
-    # required change in velocity
-    dv=np.zeros((dbconf.traf.ntraf,3)) 
-        
-    #if possible, solve conflicts once and copy results for symmetrical conflicts,
-    #if that is not possible, solve each conflict twice, once for each A/C
-    if not dbconf.traf.ADSBtrunc and not dbconf.traf.ADSBtransnoise:
-        for conflict in dbconf.conflist_now:
-            id1,id2=dbconf.ConflictToIndices(conflict)
-            if id1 != "Fail" and id2!= "Fail":
-                dv_eby=Eby_straight(dbconf,id1,id2)
-                dv[id1]-=dv_eby
-                dv[id2]+=dv_eby
-    else:
-        for i in range(dbconf.nconf):
-            ac1=dbconf.idown[i]
-            ac2=dbconf.idoth[i]
-            id1=dbconf.traf.id.index(ac1)
-            id2=dbconf.traf.id.index(ac2)
-            dv_eby=Eby_straight(dbconf,id1,id2)
-            dv[id1]-=dv_eby
-                
-            
-    # now we have the change in speed vector for each aircraft.
-    dv=np.transpose(dv)
-    # the old speed vector, cartesian coordinates
-    trkrad=np.radians(dbconf.traf.trk)
-    v=np.array([np.sin(trkrad)*dbconf.traf.tas,\
-        np.cos(trkrad)*dbconf.traf.tas,\
-        dbconf.traf.vs])
-    # the new speed vector
-    newv=dv+v
 
-    # the new speed vector in polar coordinates
-    newtrack=(np.arctan2(newv[0,:],newv[1,:])*180/np.pi) %360
-    newgs=np.sqrt(newv[0,:]**2+newv[1,:]**2)
-    neweas=vtas2eas(newgs,dbconf.traf.alt)
-    
-    # Cap the velocity
-    neweascapped=np.maximum(dbconf.vmin,np.minimum(dbconf.vmax,neweas))
-    
-    # now assign in the traf class
-    dbconf.traf.asashdg=newtrack
-    dbconf.traf.asasspd=neweascapped
-    dbconf.traf.asasvsp=newv[2,:]
+    # required change in velocity per aircraft, with the Eby pair kernel
+    # (Eby does not use the priority rules of swprio)
+    dv = dbconf.resolvepairs(Eby_straight, useprio=False)
+
+    # new track, speed and vertical speed
+    dbconf.applyresolution(dv)
     dbconf.traf.asasalt=np.sign(dbconf.traf.asasvsp)*1e5
-    
+
 #=================================== Eby Method ===============================
         
     # Resolution: Eby method assuming aircraft move straight forward, solving algebraically, only horizontally
-def Eby_straight(dbconf, id1, id2):
+def Eby_straight(dbconf, conf):
+    """Eby method: calculate change in speed for all conflict pairs in conf
+      at once, returns dv [m/s] with one row (east, north, up) per pair"""
     traf=dbconf.traf
-    dist=dbconf.dist[id1,id2]
-    qdr=dbconf.qdr[id1,id2]
+    id1,id2=conf['i'],conf['j']
+    dist=conf['dist']
+    qdr=conf['qdr']
     # from degrees to radians
     qdr=np.radians(qdr)
-    # relative position vector
+    # relative position vectors
     d=np.array([np.sin(qdr)*dist, \
         np.cos(qdr)*dist, \
         traf.alt[id2]-traf.alt[id1] ])
@@ -78,10 +42,10 @@ def Eby_straight(dbconf, id1, id2):
     t1=np.radians(traf.trk[id1])
     t2=np.radians(traf.trk[id2])
         
-    # write velocities as vectors and find relative velocity vector              
+    # write velocities as vectors and find relative velocity vectors
     v1=np.array([np.sin(t1)*traf.tas[id1],np.cos(t1)*traf.tas[id1],traf.vs[id1]])
     v2=np.array([np.sin(t2)*traf.tas[id2],np.cos(t2)*traf.tas[id2],traf.vs[id2]])
-    v=np.array(v2-v1) 
+    v=v2-v1
     # bear in mind: the definition of vr (relative velocity) is opposite to 
     # the velocity vector in the LOS_nominal method, this just has consequences
     # for the derivation of tstar following Eby method, not more
@@ -98,39 +62,42 @@ def Eby_straight(dbconf, id1, id2):
     """
     # These terms are used to construct a,b,c of the quadratic formula
     R2=dbconf.Rm**2 # in meters
-    d2=np.dot(d,d) # distance vector length squared
-    v2=np.dot(v,v) # velocity vector length squared
-    dv=np.dot(d,v) # dot product of distance and velocity
-    
+    d2=np.sum(d*d,axis=0) # distance vector length squared
+    v2=np.sum(v*v,axis=0) # velocity vector length squared
+    dv=np.sum(d*v,axis=0) # dot product of distance and velocity
+
     # Solving the quadratic formula
     a=R2*v2 - dv**2
     b=2*dv* (R2 - d2)
     c=R2*d2 - d2**2
     discrim=b**2 - 4*a*c
-    
-    if discrim<0: # if the discriminant is negative, we're done as taking the square root will result in an error
-        discrim=0
+
+    # if the discriminant is negative, we're done as taking the square root will result in an error
+    discrim=np.maximum(discrim,0.)
     time1=(-b+np.sqrt(discrim))/(2*a)
     time2=(-b-np.sqrt(discrim))/(2*a)
 
     #time when the size of the conflict is largest relative to time to solve
-    tstar=min(abs(time1),abs(time2))
+    tstar=np.where(np.abs(time2)<np.abs(time1),np.abs(time2),np.abs(time1))
 
     #find drel and absolute distance at tstar
     drelstar=d+v*tstar
-    dstarabs=np.linalg.norm(drelstar)
-    #exception: if the two aircraft are on exact collision course 
+    dstarabs=np.sqrt(np.sum(drelstar*drelstar,axis=0))
+    #exception: if the two aircraft are on exact collision course
     #(passing eachother within 10 meter), change drelstar
     exactcourse=10 #10 meter
     dif=exactcourse-dstarabs
-    if dif>0:
-        vperp=np.array([-v[1],v[0],0]) #rotate velocity 90 degrees in horizontal plane
-        drelstar+=dif*vperp/np.linalg.norm(vperp) #normalize to 10 m and add to drelstar
-        dstarabs=np.linalg.norm(drelstar)
-        
+    close=dif>0
+    if np.any(close):
+        #rotate velocity 90 degrees in horizontal plane
+        vperp=np.array([-v[1,close],v[0,close],np.zeros(np.count_nonzero(close))])
+        #normalize to 10 m and add to drelstar
+        drelstar[:,close]+=dif[close]*vperp/np.sqrt(np.sum(vperp*vperp,axis=0))
+        dstarabs[close]=np.sqrt(np.sum(drelstar[:,close]*drelstar[:,close],axis=0))
+
     #intrusion at tstar
     i=dbconf.Rm-dstarabs
 
     #desired change in the plane's speed vector:
     dv=i*drelstar/(dstarabs*tstar)
-    return dv
\ No newline at end of file
+    return dv.T
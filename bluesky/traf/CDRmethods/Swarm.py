@@ -6,8 +6,8 @@ Created on Wed Mar 04 14:27:44 2015
 """
 
 import numpy as np
-from aero import nm, ft
-import MVP
+from ...tools.aero import nm, ft
+from . import MVP
 
 def start(dbconf):
     dbconf.CRname="Swarm"
@@ -19,57 +19,49 @@ def start(dbconf):
 
 def resolve(dbconf):
     tr=dbconf.traf
-    
-    # Find matrix of neighbouring aircraft withing swarm distance
-    dx=dbconf.dx
-    dy=dbconf.dy-np.eye(tr.ntraf)*1e9 #setting distance of A/C to itself to 0,\
-                                    #correcting the distance from CASAS line 109
-    
-    close=np.logical_and(dx**2+dy**2<dbconf.Rswarm**2,\
-                    np.abs(dbconf.dalt)     <dbconf.dhswarm)
-                    
-    trkdif=tr.trk.reshape(1,tr.ntraf)-tr.trk.reshape(tr.ntraf,1)
-    dtrk=(trkdif+180)%360-180
+
+    # Find neighbouring aircraft within swarm distance: pairs of aircraft i
+    # and neighbour j, instead of full matrices of all aircraft pairs
+    i,j,qdr,dist=dbconf.neighbours(dbconf.Rswarm,dbconf.dhswarm)
+
+    dtrk=(tr.trk[j]-tr.trk[i]+180)%360-180
     samedirection=np.abs(dtrk)<90
-    
-    selected=np.logical_and(close,samedirection)
-    own=np.eye(tr.ntraf,dtype='bool')
-    
-    Swarming=np.logical_or(selected,own)
-    
+
+    # Swarming aircraft: the selected neighbours and the aircraft itself
+    i,j,qdr,dist,dtrk=i[samedirection],j[samedirection],qdr[samedirection],\
+                      dist[samedirection],dtrk[samedirection]
+    nswarm=1.+np.bincount(i,minlength=tr.ntraf)
+
     # First do conflict resolution following MVP
-    MVP.resolve(dbconf)    
-    
-    # Find desired speed vector after Collision Avoidance or Autopilot 
+    MVP.resolve(dbconf)
+
+    # Find desired speed vector after Collision Avoidance or Autopilot
     ca_trk = tr.asasactive*tr.asashdg+(1-tr.asasactive)*tr.ahdg
     ca_cas = tr.asasactive*tr.asasspd+(1-tr.asasactive)*tr.aspd
     ca_vs = tr.asasactive*tr.asasvsp+(1-tr.asasactive)*tr.avs
-    
+
     # Add factor of Velocity Alignment to speed vector
-    hspeed=np.ones((tr.ntraf,tr.ntraf))*tr.cas
-    va_cas=np.average(hspeed,axis=1,weights=Swarming)
-    
-    vspeed=np.ones((tr.ntraf,tr.ntraf))*tr.vs
-    va_vs=np.average(vspeed,axis=1,weights=Swarming)
-    
-    avgdtrk=np.average(dtrk,axis=1,weights=Swarming)    
+    va_cas=swarmaverage(i,tr.cas,tr.cas[j],nswarm)
+    va_vs=swarmaverage(i,tr.vs,tr.vs[j],nswarm)
+
+    avgdtrk=swarmaverage(i,0.,dtrk,nswarm)
     va_trk = tr.trk+avgdtrk
-    
+
     # Add factor of Flock Centering to speed vector
-    dxflock=dx+np.eye(tr.ntraf)*dbconf.u/100.
-    dyflock=dy+np.eye(tr.ntraf)*dbconf.v/100.
-    
-    fc_dx=np.average(dxflock,axis=1,weights=Swarming)
-    fc_dy=np.average(dyflock,axis=1,weights=Swarming)
-    
-    z=np.ones((tr.ntraf,tr.ntraf))*tr.alt
-    fc_dz=np.average(z,axis=1,weights=Swarming)-tr.alt
-    
+    # (position of neighbour relative to aircraft, for the aircraft itself
+    # a small step in its flight direction)
+    qdrrad=np.radians(qdr)
+    trkrad=np.radians(tr.trk)
+    fc_dx=swarmaverage(i,tr.gs*np.sin(trkrad)/100.,dist*np.sin(qdrrad),nswarm)
+    fc_dy=swarmaverage(i,tr.gs*np.cos(trkrad)/100.,dist*np.cos(qdrrad),nswarm)
+
+    fc_dz=swarmaverage(i,tr.alt,tr.alt[j],nswarm)-tr.alt
+
     fc_trk=np.degrees(np.arctan2(fc_dx,fc_dy))
     fc_cas=tr.cas
     ttoreach=np.sqrt(fc_dx**2+fc_dy**2)/fc_cas
     fc_vs=np.where(ttoreach==0,0,fc_dz/ttoreach)
-    
+
     # Find final Swarming directions
     trks=np.array([ca_trk,va_trk,fc_trk])
     cass=np.array([ca_cas,va_cas,fc_cas])
@@ -96,3 +88,8 @@ def resolve(dbconf):
     # Make sure that all aircraft follow these directions
     tr.asasactive.fill(True)
     pass
+
+def swarmaverage(i, own, neighbours, nswarm):
+    """Average per aircraft over the aircraft itself (own) and its swarming
+      neighbours (neighbours, one value per pair with aircraft index i)"""
+    return (own+np.bincount(i,weights=neighbours,minlength=len(nswarm)))/nswarm
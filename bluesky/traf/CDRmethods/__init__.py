@@ -0,0 +1,87 @@
+"""
+Conflict resolution (CR) methods of the ASAS
+
+Each CR method is a module with two functions:
+    start(dbconf)   : called when the method is selected (RESO command)
+    resolve(dbconf) : called every ASAS update to resolve the conflicts
+
+A method module can declare which output of the conflict detection it needs
+with a module variable (default False):
+    swmatrices = True  : full matrices of the relative geometry of all
+                         aircraft pairs (dbconf.qdr, dbconf.dist, dbconf.dx, ...)
+    swmatrices = False : only the conflict pairs (dbconf.confpairs), which is
+                         much faster for large numbers of aircraft
+
+The methods of this package are registered below by their RESO name. Methods
+in other packages can be added with register(), using the full module name,
+or by installed packages as entry points of group "bluesky.cdrmethods"
+(RESO name = module), which are looked up when an unknown method is selected.
+Method modules are imported once, when first selected, and then kept, so
+switching between methods does not import (or load data tables) again.
+
+Methods:
+    register(name,modulename) : add CR method name (RESO name), implemented
+                                by module modulename (full module name)
+    discover()                : register the CR methods of installed packages
+    load(name)                : module of CR method name, imported once
+"""
+import importlib
+
+# Registered CR methods: RESO name -> full module name
+methods = dict((name, __name__ + "." + module) for name, module in
+               [("OFF",     "DoNothing"),
+                ("MVP",     "MVP"),
+                ("MVP_LAY", "MVP_LAY"),
+                ("EBY",     "Eby"),
+                ("SWARM",   "Swarm"),
+                ("DIFGAME", "Difgame")])
+
+# Imported method modules per module name
+modules = {}
+
+# Entry point group of CR methods of installed packages
+entrypoints = "bluesky.cdrmethods"
+discovered  = False
+
+
+def register(name, modulename):
+    """Add CR method name (RESO name), implemented by module modulename
+       (full module name, e.g. "mypackage.mycr")"""
+    methods[name.upper()] = modulename
+
+
+def discover():
+    """Register the CR methods of installed packages (entry points), methods
+       that are already registered are kept"""
+    global discovered
+    discovered = True
+    try:
+        import pkg_resources
+    except ImportError:
+        return
+
+    for entry in pkg_resources.iter_entry_points(entrypoints):
+        if entry.name.upper() not in methods:
+            register(entry.name, entry.module_name)
+
+
+def load(name):
+    """Module of CR method name (RESO name or module name), imported when the
+       method is used the first time. Raises KeyError for unknown methods."""
+    if name.upper() not in methods and not discovered:
+        discover()
+
+    if name.upper() in methods:
+        modulename = methods[name.upper()]
+    else:
+        # Module name, with or without package
+        found = [m for m in methods.values()
+                 if name == m or name == m.rsplit(".", 1)[-1]]
+        if not found:
+            raise KeyError("Unknown CR method " + name + ", use one of " +
+                           ", ".join(sorted(methods.keys())))
+        modulename = found[0]
+
+    if modulename not in modules:
+        modules[modulename] = importlib.import_module(modulename)
+    return modules[modulename]
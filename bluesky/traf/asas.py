@@ -22,19 +22,32 @@ Date        : October 2014
 #    vs  [m/s]  = array with vertical speed [m/s]
 #
 # Outputs:
-#    swconfl = 2D array with True/False for conflict
-#    dtconfl = time to conflict
+#    confpairs = array of conflicting aircraft pairs (see confdtype) with
+#                time to CPA, times in/out of conflict, dcpa, qdr and dist
+#
+# The CR methods set the ASAS track, speed, vertical speed and altitude per
+# aircraft (see applyresolution). The ASAS altitude (asasalt) is the altitude
+# reached with the ASAS vertical speed at the first conflict the aircraft
+# enters as ownship. Only the detected conflict pairs count: intruders the
+# aircraft is not in conflict with (e.g. a horizontal conflict in the past,
+# or vertically clear) no longer change it, as the N x N tinconf matrix did.
 import numpy as np
-import sys
 
-from ..tools.aero import nm, ft
+from ..tools.aero import nm, ft, vtas2eas, veas2tas
 try:
     from ..tools import cgeo as geo
 except ImportError:
     from ..tools import geo
 
-# Find a way to import the required Conflict Resolution Class
-sys.path.append('bluesky/traf/CDRmethods/')
+# Registry of the Conflict Resolution methods
+from . import CDRmethods
+
+# Conflicts are stored as a list of aircraft pairs: ownship i, intruder j,
+# time to CPA, times of entering and leaving the conflict [s], distance at
+# CPA [m], and bearing [deg] and distance [m] from i to j
+confdtype = np.dtype([('i', int), ('j', int), ('tcpa', float), ('tin', float),
+                      ('tout', float), ('dcpa', float), ('qdr', float),
+                      ('dist', float)])
 
 
 class Dbconf():
@@ -54,6 +67,16 @@ class Dbconf():
 
         self.traf        = traf      # Traffic database object
 
+        # ASAS info per aircraft, stored in the traffic database
+        add = traf.arrays.add
+        traf.arrays.addlist(traf, 'iconf', -1)  # index in 'conflicting' aircraft database, no conflict => -1
+        add(traf, 'asasactive', bool, False)    # whether the autopilot follows ASAS or not
+        add(traf, 'asashdg')                    # heading provided by the ASAS [deg]
+        add(traf, 'asasspd')                    # speed provided by the ASAS (eas) [m/s]
+        add(traf, 'asasalt')                    # speed alt by the ASAS [m]
+        add(traf, 'asasvsp')                    # speed vspeed by the ASAS [m/s]
+        add(traf, 'inconflict', bool, False)    # whether aircraft is in conflict
+
         self.deletenames = []        # List of aircraft outside test region
 
         self.vmin        = 100.0     # [m/s] Minimum ASAS velocity
@@ -65,14 +88,31 @@ class Dbconf():
                                      # combined (COMB), horizontal only (HORIZ), vertical only (VERT)
 
         self.swprio      = False     # If true, then cruising aircraft have priority and will not resolve
+
+        self.swgrid      = True      # [-] broad phase with cells in conflict detection
+        self.blocksize   = 1000      # [-] ownships per block in conflict detection (0: one block)
+        self.swcdetect   = True      # [-] use compiled detection kernel of cgeo, when available
+        self.swkwik      = True      # [-] flat earth prefilter before WGS'84 in detection
         self.reset()                 # Reset database
         self.SetCRmethod("DoNothing")
         return
 
     def SetCRmethod(self, method):
-        self.CRname   = "Undefined"
-        self.CRmethod = __import__(method)
+        """Select the conflict resolution method (RESO name or module name of
+           CDRmethods), the method module is only imported the first time"""
+        try:
+            module = CDRmethods.load(method)
+        except KeyError as e:
+            return False, e.args[0]
+        except ImportError as e:
+            return False, "CR method " + method + " not available: " + str(e)
+
+        self.CRname     = "Undefined"
+        self.CRmethod   = module
+        # Full matrices in the detection only for CR methods that declare it
+        self.swmatrices = getattr(module, 'swmatrices', False)
         self.CRmethod.start(self)
+        return True
     
     def toggle(self, flag=None):
         if flag is None:
@@ -87,7 +127,7 @@ class Dbconf():
     def reset(self):
         self.conf         = []     # Start with emtpy database: no conflicts
         self.nconf        = 0      # Number of detected conflicts
-        self.swconfl      = np.array([])
+        self.confpairs    = np.zeros(0, dtype=confdtype)  # Detected conflict pairs
         self.latowncpa    = np.array([])
         self.lonowncpa    = np.array([])
         self.altowncpa    = np.array([])
@@ -98,17 +138,19 @@ class Dbconf():
         self.idown        = []
         self.idoth        = []
 
-        self.conflist_all = []  # List of all Conflicts
-        self.LOSlist_all  = []  # List of all Losses Of Separation
+        # Conflicts and LOS are stored with an integer key per aircraft pair,
+        # based on the unique aircraft numbers (see pairkeys)
+        self.conflist_all = {}  # Conflicts until past CPA: key -> (uid own, uid intruder)
+        self.LOSlist_all  = set()  # All Losses Of Separation
         self.conflist_exp = []  # List of all Conflicts in experiment time
         self.LOSlist_logged  = []  # List of all Losses Of Separation in experiment time
-        self.conflist_now = []  # List of current Conflicts
-        self.LOSlist_now  = []  # List of current Losses Of Separation
+        self.conflist_now = set()  # Current Conflicts
+        self.LOSlist_now  = set()  # Current Losses Of Separation
 
-        # For keeping track of locations with most severe intrusions
-        self.LOSmaxsev    = []
-        self.LOShmaxsev   = []
-        self.LOSvmaxsev   = []
+        # For keeping track of locations with most severe intrusions, per LOS key
+        self.LOSmaxsev    = {}
+        self.LOShmaxsev   = {}
+        self.LOSvmaxsev   = {}
 
 # ==================== Conflict Detection based on state ======================
 
@@ -116,6 +158,16 @@ class Dbconf():
         if not self.swasas:
             return
 
+        # Only keep the conflicting aircraft pairs, unless the CR method needs
+        # the relative geometry of all aircraft pairs in full matrices
+        if not self.swmatrices:
+            self.detectpairs()
+            return
+
+        # Full matrices: none of the CR methods of BlueSky needs these, but
+        # this is the reference implementation of the conflict detection, to
+        # which the pair version is compared (tests/test_asas.py)
+
         #        t0_ = time.clock()     # Timing of ASAS calculation
 
         # Horizontal conflict ---------------------------------------------------------
@@ -125,9 +177,10 @@ class Dbconf():
                                   np.mat(self.traf.adsblat),np.mat(self.traf.adsblon))
 
         # Convert results from mat-> array
-        self.qdr      = np.array(qdlst[0])  # degrees
-        I             = np.eye(self.traf.ntraf) # Identity matric of order ntraf
-        self.dist     = np.array(qdlst[1])*nm + 1e9*I # meters i to j
+        # (relative geometry in the precision of the traffic arrays)
+        self.qdr      = np.array(qdlst[0], dtype=self.traf.ftype)  # degrees
+        I             = np.eye(self.traf.ntraf, dtype=self.traf.ftype) # Identity matric of order ntraf
+        self.dist     = np.array(qdlst[1], dtype=self.traf.ftype)*nm + 1e9*I # meters i to j
                     
         # Transmission noise
         if self.traf.ADSBtransnoise:
@@ -162,10 +215,6 @@ class Dbconf():
         
         self.tcpa = -(self.du*self.dx + self.dv*self.dy) / dv2   + 1e9*I
         
-       # Calculate CPA positions
-        xcpa = self.tcpa*self.du
-        ycpa = self.tcpa*self.dv
-
         # Calculate distance^2 at CPA (minimum distance^2)
         dcpa2 = self.dist*self.dist-self.tcpa*self.tcpa*dv2
 
@@ -191,7 +240,7 @@ class Dbconf():
         if self.traf.ADSBtransnoise:
             # error in the determined altitude of other a/c
             alterror=np.random.normal(0,self.traf.transerror[2],adsbalt.shape) #degrees
-            adsbalt+=alterror        
+            adsbalt=adsbalt+alterror
         
         self.dalt      = alt - adsbalt.T
 
@@ -219,137 +268,619 @@ class Dbconf():
         self.swconfl = self.swhorconf*(self.tinconf<=self.toutconf)*    \
                        (self.toutconf>0.)*(self.tinconf<self.dtlookahead) \
                        *(1.-I)
+
+        # Conflict pairs
+        i, j = np.where(self.swconfl)
+        self.confpairs = self.makepairs(i, j, self.tcpa[i, j], self.tinconf[i, j],
+                             self.toutconf[i, j], np.sqrt(np.maximum(0., dcpa2[i, j])),
+                             self.qdr[i, j], self.dist[i, j])
                            
         return
     
+# ==================== Broad phase: candidate conflict pairs ==================
+    def conflictrange(self):
+        """Largest horizontal and vertical distance [m] between two aircraft
+           that can get in conflict within the lookahead time"""
+        traf  = self.traf
+        tlook = self.dtlookahead
+
+        # Relative speeds are limited below in the CPA calculation as well
+        vrel  = max(np.max(traf.gs) + np.max(traf.adsbgs), 1e-3)
+        vsrel = max(np.max(np.abs(traf.vs)) + np.max(np.abs(traf.adsbvs)), 1e-6)
+        dhor  = self.R + vrel * tlook
+        dver  = self.dh + vsrel * tlook
+        if traf.ADSBtransnoise:
+            dhor = dhor + 6. * traf.transerror[1]  # margin for distance noise
+
+        return dhor, dver
+
+    def cellgrid(self, adsbalt, dhor, dver):
+        """Broad phase of the conflict detection: put the aircraft in
+           lat/lon/altitude cells with the size of the largest distance that
+           can be closed within the lookahead time, so only aircraft in
+           neighbouring cells can be in conflict. Returns the cell data used
+           by candidates()."""
+        traf  = self.traf
+
+        # Same positions as the CPA calculation: own position of ownship i,
+        # ADS-B position of intruder j, ADS-B altitude of i, altitude of j
+        lat1, lon1, alt1 = traf.lat, traf.lon, adsbalt
+        lat2, lon2, alt2 = traf.adsblat, traf.adsblon, traf.alt
+
+        # Cell size in latitude and longitude [deg], using the smallest earth
+        # radius of WGS'84. Longitude cells are widened with the latitude of the
+        # aircraft furthest from the equator.
+        rmin  = 6356752.314245
+        theta = dhor / rmin
+        dlat  = np.degrees(theta)
+        coslat = np.cos(np.radians(min(90., max(np.max(np.abs(lat1)),
+                                                np.max(np.abs(lat2))))))
+        sinhalf = np.sin(0.5 * theta)
+        if sinhalf < coslat * np.sin(np.radians(60.)):
+            ncol = int(360. / np.degrees(2. * np.arcsin(sinhalf / coslat)))
+        else:
+            ncol = 1  # near the poles: no cells in longitude direction
+
+        # Cell coordinates of ownships and intruders
+        row1 = np.floor(lat1 / dlat).astype(int)
+        row2 = np.floor(lat2 / dlat).astype(int)
+        col1 = (np.floor((lon1 % 360.) / 360. * ncol).astype(int)) % ncol
+        col2 = (np.floor((lon2 % 360.) / 360. * ncol).astype(int)) % ncol
+        lay1 = np.floor(alt1 / dver).astype(int)
+        lay2 = np.floor(alt2 / dver).astype(int)
+
+        # Cell number, with an empty row and layer around the used cells
+        rowmin = min(np.min(row1), np.min(row2)) - 1
+        laymin = min(np.min(lay1), np.min(lay2)) - 1
+        nlay   = max(np.max(lay1), np.max(lay2)) - laymin + 2
+        row1   = row1 - rowmin
+        row2   = row2 - rowmin
+        lay1   = lay1 - laymin
+        lay2   = lay2 - laymin
+
+        cell2  = (row2 * ncol + col2) * nlay + lay2
+        order  = np.argsort(cell2, kind='mergesort')
+        cell2  = cell2[order]
+
+        return row1, col1, lay1, ncol, nlay, cell2, order
+
+    def candidates(self, grid, i0, i1, symmetric=False):
+        """Candidate conflict pairs for ownships i0 up to i1: the intruders in
+           the neighbouring cells. Returns ownship and intruder indices, only
+           the pairs with ownship < intruder when symmetric is True."""
+        row1, col1, lay1, ncol, nlay, cell2, order = grid
+        row1 = row1[i0:i1]
+        col1 = col1[i0:i1]
+        lay1 = lay1[i0:i1]
+        ntraf = self.traf.ntraf
+
+        coloffsets = [0] if ncol == 1 else [-1, 0, 1]
+        iown = []
+        ioth = []
+        for drow in (-1, 0, 1):
+            for dcol in coloffsets:
+                cellrow = (row1 + drow) * ncol + (col1 + dcol) % ncol
+                for dlay in (-1, 0, 1):
+                    cell1 = cellrow * nlay + lay1 + dlay
+                    lo = np.searchsorted(cell2, cell1, 'left')
+                    hi = np.searchsorted(cell2, cell1, 'right')
+                    n  = hi - lo
+                    total = np.sum(n)
+                    if total == 0:
+                        continue
+                    first = np.repeat(np.cumsum(n) - n, n)
+                    iown.append(np.repeat(np.arange(i0, i1), n))
+                    ioth.append(order[np.repeat(lo, n) + np.arange(total) - first])
+
+        if len(iown) == 0:
+            return np.array([], dtype=int), np.array([], dtype=int)
+
+        iown = np.concatenate(iown)
+        ioth = np.concatenate(ioth)
+
+        # Remove aircraft paired with themselves, sort pairs like np.where does
+        keep  = iown < ioth if symmetric else iown != ioth
+        ipair = np.sort(iown[keep] * ntraf + ioth[keep])
+        return ipair // ntraf, ipair % ntraf
+
+    def allpairs(self, i0, i1, symmetric=False):
+        """All aircraft pairs for ownships i0 up to i1 (no broad phase), only
+           the pairs with ownship < intruder when symmetric is True"""
+        ntraf = self.traf.ntraf
+        if symmetric:
+            # Upper triangle: ownship i has intruders i+1 up to ntraf
+            own  = np.arange(i0, i1)
+            n    = ntraf - 1 - own
+            iown = np.repeat(own, n)
+            ioth = np.arange(len(iown)) - np.repeat(np.cumsum(n) - n, n) + iown + 1
+            return iown, ioth
+
+        iown  = np.repeat(np.arange(i0, i1), ntraf)
+        ioth  = np.tile(np.arange(ntraf), i1 - i0)
+        keep  = iown != ioth
+        return iown[keep], ioth[keep]
+
+    def nearpairs(self, i, j, adsbalt, dhor, dver):
+        """Quick prefilter of aircraft pairs with a flat earth (equirectangular)
+           distance and the altitude difference. Returns the pairs that can
+           get in conflict within the lookahead time."""
+        traf = self.traf
+        near = self.kwiknear(traf.lat[i], traf.lon[i], traf.adsblat[j],
+                             traf.adsblon[j], dhor) & \
+               (np.abs(traf.alt[j] - adsbalt[i]) <= dver)
+        return i[near], j[near]
+
+    def kwiknear(self, lat1, lon1, lat2, lon2, dhor):
+        """True for positions that may be closer than dhor [m], using a quick
+           flat earth (equirectangular) distance"""
+        # Flat earth distance with the smallest earth radius of WGS'84 is at
+        # most 1.3% larger than the WGS'84 distance below 80 deg latitude, so
+        # a margin of 5% keeps all pairs that are close enough. Pairs closer
+        # to the poles are always kept.
+        rmin    = 6356752.314245
+        dlat    = np.radians(lat2 - lat1)
+        dlon    = np.radians((lon2 - lon1 + 180.) % 360. - 180.)
+        cavelat = np.cos(np.radians(0.5 * (lat1 + lat2)))
+        dist    = rmin * np.sqrt(dlat * dlat + dlon * dlon * cavelat * cavelat)
+
+        return (dist < 1.05 * dhor) | (np.maximum(np.abs(lat1), np.abs(lat2)) > 80.)
+
+    def neighbours(self, dhor, dver):
+        """Aircraft pairs closer than dhor [m] horizontally and dver [m]
+           vertically (e.g. for swarming), with the positions of the conflict
+           detection: own position of aircraft i, ADS-B position of j. Returns
+           indices i and j, bearing [deg] and distance [m] from i to j, with
+           the pairs sorted on i."""
+        traf    = self.traf
+        ntraf   = traf.ntraf
+        adsbalt = traf.adsbalt
+
+        pairs = [(np.array([], dtype=int), np.array([], dtype=int),
+                  np.array([]), np.array([]))]
+        if ntraf > 0:
+            grid = self.cellgrid(adsbalt, dhor, dver)
+
+        nblock = self.blocksize if self.blocksize > 0 else max(ntraf, 1)
+        for i0 in xrange(0, ntraf, nblock):
+            i1   = min(i0 + nblock, ntraf)
+            i, j = self.candidates(grid, i0, i1)
+            i, j = self.nearpairs(i, j, adsbalt, dhor, dver)
+            if len(i) == 0:
+                continue
+
+            qdr, dist = geo.qdrdist(traf.lat[i], traf.lon[i],
+                                    traf.adsblat[j], traf.adsblon[j])
+            qdr  = np.asarray(qdr)
+            dist = np.asarray(dist) * nm
+            near = (dist < dhor) & (np.abs(traf.alt[j] - adsbalt[i]) < dver)
+            pairs.append((i[near], j[near], qdr[near], dist[near]))
+
+        return tuple(np.concatenate(x) for x in zip(*pairs))
+
+    def setkwik(self, flag=None):
+        """ASASKWIK command: switch flat earth prefilter of the detection"""
+        if flag is None:
+            return True, "ASASKWIK is currently " + ("ON" if self.swkwik else "OFF")
+        self.swkwik = flag
+        return True
+
+    def setblocksize(self, n=None):
+        """ASASBLOCK command: number of ownships per block of the conflict
+           detection, which limits the memory used for the candidate pairs"""
+        if n is None:
+            return True, "ASASBLOCK " + str(self.blocksize) + \
+                         " (0: all aircraft in one block)"
+        if n < 0:
+            return False, "Block size should be positive, or 0 for no blocks"
+        self.blocksize = n
+        return True
+
+# ==================== Conflict Detection on aircraft pairs ===================
+    def detectpairs(self):
+        """Conflict detection on aircraft pairs instead of full matrices. The
+           ownships are processed in blocks: for each block the candidate pairs
+           of the broad phase (or all pairs) are checked, and only the pairs in
+           conflict are kept. Gives the same conflict pairs as the full matrix
+           version (swmatrices)."""
+        traf  = self.traf
+        ntraf = traf.ntraf
+
+        # Without transmission noise and truncation, pairs (i,j) and (j,i) see
+        # the same positions: only the candidates i < j are generated, and
+        # (j,i) is calculated only when it can be a conflict (see cpapairs)
+        symmetric = not traf.ADSBtrunc and not traf.ADSBtransnoise
+
+        adsbalt = traf.adsbalt
+        if traf.ADSBtransnoise:
+            # error in the determined altitude of other a/c
+            adsbalt = adsbalt + np.random.normal(0, traf.transerror[2], ntraf)
+
+        if ntraf > 0:
+            dhor, dver = self.conflictrange()
+        if self.swgrid and ntraf > 0:
+            grid = self.cellgrid(adsbalt, dhor, dver)
+
+        nblock = self.blocksize if self.blocksize > 0 else max(ntraf, 1)
+        confpairs = [np.zeros(0, dtype=confdtype)]
+        for i0 in xrange(0, ntraf, nblock):
+            i1 = min(i0 + nblock, ntraf)
+            if self.swgrid:
+                i, j = self.candidates(grid, i0, i1, symmetric)
+            else:
+                i, j = self.allpairs(i0, i1, symmetric)
+            if self.swkwik:
+                # Two stages: WGS'84 calculation only for the near pairs
+                i, j = self.nearpairs(i, j, adsbalt, dhor, dver)
+            confpairs.append(self.cpapairs(i, j, adsbalt, symmetric))
+
+        self.confpairs = np.concatenate(confpairs)
+
+        # Pairs (j,i) are added per block: sort pairs like np.where does
+        if symmetric:
+            order = np.argsort(self.confpairs['i'] * ntraf + self.confpairs['j'])
+            self.confpairs = self.confpairs[order]
+        return
+
+    def usekernel(self):
+        """Whether the CPA calculation uses the compiled kernel of cgeo
+           (multi-threaded, not with transmission noise: the noise on bearing
+           and distance is drawn per pair)"""
+        return self.swcdetect and hasattr(geo, 'cpapairs') and \
+            not self.traf.ADSBtransnoise
+
+    def cpapairs(self, i, j, adsbalt, symmetric=False):
+        """CPA calculation for aircraft pairs (ownships i, intruders j), with
+           the same formulas as the full matrix version. Returns the pairs that
+           are in conflict.
+
+           With symmetric (no ADS-B noise or truncation), each combination of
+           two aircraft is given once and the conflicts in both directions are
+           returned. The calculation is not exactly symmetric: bearings are in
+           the frame of each ownship, and the lower limit of the vertical speed
+           difference changes sign. So (j,i) is calculated as well, for the
+           pairs where it can be a conflict: the pairs (i,j) that are in
+           conflict with a protected zone enlarged by the convergence of the
+           meridians, or with a vertical speed difference below that limit."""
+        traf = self.traf
+        if self.usekernel():
+            return self.makepairs(*geo.cpapairs(
+                i, j, traf.lat, traf.lon, traf.alt, traf.trk, traf.gs, traf.vs,
+                traf.adsblat, traf.adsblon, adsbalt, traf.adsbtrk, traf.adsbgs,
+                traf.adsbvs, self.R, self.dh, self.dtlookahead, symmetric))
+
+        pairs, near = self.cpa(i, j, adsbalt, symmetric)
+        if symmetric:
+            k = np.where(near)[0]
+            pairs = np.concatenate((pairs, self.cpa(j[k], i[k], adsbalt)[0]))
+        return pairs
+
+    def cpa(self, i, j, adsbalt, swnear=False):
+        """CPA calculation for ownships i and intruders j, returns the pairs in
+           conflict and, with swnear, which pairs (j,i) can be a conflict"""
+        traf   = self.traf
+        ftype  = traf.ftype
+        npairs = len(i)
+
+        # Horizontal conflict: qdr and dist from ownship i to ADSB position of j
+        qdr, dist = geo.qdrdist(traf.lat[i], traf.lon[i],
+                                traf.adsblat[j], traf.adsblon[j])
+        qdr  = np.array(qdr, dtype=ftype)        # degrees
+        dist = np.array(dist, dtype=ftype) * nm  # meters i to j
+
+        # Transmission noise
+        if traf.ADSBtransnoise:
+            qdr  = qdr + np.random.normal(0, traf.transerror[0], npairs)
+            dist = dist + np.random.normal(0, traf.transerror[1], npairs)
+
+        # Calculate horizontal closest point of approach (CPA)
+        qdrrad = np.radians(qdr)
+        dx     = dist * np.sin(qdrrad)  # is pos j rel to i
+        dy     = dist * np.cos(qdrrad)  # is pos j rel to i
+
+        trkrad  = np.radians(traf.trk[j])
+        adsbtrk = np.radians(traf.adsbtrk[i])
+        du = traf.gs[j] * np.sin(trkrad) - traf.adsbgs[i] * np.sin(adsbtrk)
+        dv = traf.gs[j] * np.cos(trkrad) - traf.adsbgs[i] * np.cos(adsbtrk)
+
+        dv2raw = du * du + dv * dv
+        dv2  = np.where(np.abs(dv2raw) < 1e-6, 1e-6, dv2raw)  # limit lower absolute value
+        vrel = np.sqrt(dv2)
+
+        tcpa  = -(du * dx + dv * dy) / dv2
+        dcpa2 = dist * dist - tcpa * tcpa * dv2
+
+        # Check for horizontal conflict, times of entering and leaving
+        R2        = self.R * self.R
+        swhorconf = dcpa2 < R2
+        dtinhor   = np.sqrt(np.maximum(0., R2 - dcpa2)) / vrel
+        tinhor    = np.where(swhorconf, tcpa - dtinhor, 1e8)
+        touthor   = np.where(swhorconf, tcpa + dtinhor, -1e8)
+
+        # Vertical conflict: crossing of disk (-dh,+dh)
+        dalt   = traf.alt[j] - adsbalt[i]
+        dvsraw = traf.vs[j] - traf.adsbvs[i]
+        dvs    = np.where(np.abs(dvsraw) < 1e-6, 1e-6, dvsraw)  # prevent division by zero
+        tcrosshi = (dalt + self.dh) / -dvs
+        tcrosslo = (dalt - self.dh) / -dvs
+        tinver   = np.minimum(tcrosshi, tcrosslo)
+        toutver  = np.maximum(tcrosshi, tcrosslo)
+
+        # Combine vertical and horizontal conflict
+        tinconf  = np.maximum(tinver, tinhor)
+        toutconf = np.minimum(toutver, touthor)
+        swconfl  = swhorconf * (tinconf <= toutconf) * (toutconf > 0.) * \
+                   (tinconf < self.dtlookahead)
+
+        # Conflict pairs
+        k = np.where(swconfl)[0]
+        pairs = self.makepairs(i[k], j[k], tcpa[k], tinconf[k], toutconf[k],
+                               np.sqrt(np.maximum(0., dcpa2[k])), qdr[k], dist[k])
+        if not swnear:
+            return pairs, None
+
+        # Pairs (j,i) that can be a conflict. Seen from j, the position of i
+        # is -(dx,dy) rotated by the convergence of the meridians, plus
+        # rounding errors: check (i,j) with a larger radius.
+        Rnear = self.R + 10. + 1e-6 * dist + dist * \
+            self.convergence(traf.lat[i], traf.lon[i], traf.lat[j], traf.lon[j])
+        dnear   = np.sqrt(np.maximum(0., Rnear * Rnear - dcpa2)) / vrel
+        tinnear = np.where(dcpa2 < Rnear * Rnear, tcpa - dnear, 1e8)
+        toutnear = np.where(dcpa2 < Rnear * Rnear, tcpa + dnear, -1e8)
+
+        # The vertical crossing times are the same for (j,i), except when the
+        # vertical speed difference is below the limit: then (j,i) overlaps
+        # vertically within tlook, when |dalt| is close enough to dh
+        tlook   = self.dtlookahead
+        limited = np.abs(dvsraw) < 1e-6
+        vernear = np.abs(dalt) <= self.dh + 1e-6 * tlook + 1.
+        tinver  = np.where(limited, np.where(vernear, -1e8, 1e8), tinver)
+        toutver = np.where(limited, np.where(vernear, 1e8, -1e8), toutver)
+
+        tinnear  = np.maximum(tinver, tinnear) - 1e-3
+        toutnear = np.minimum(toutver, toutnear) + 1e-3
+        near = (tinnear <= toutnear) & (toutnear >= 0.) & (tinnear <= tlook)
+
+        # Limited relative speed: CPA formulas are not geometric, always check
+        near = near | (np.abs(dv2raw) < 1e-6)
+        return pairs, near
+
+    def convergence(self, lat1, lon1, lat2, lon2):
+        """Upper limit of the convergence of the meridians [rad] between two
+           positions: the (spherical) bearing from 2 to 1 differs at most this
+           much from the bearing from 1 to 2 plus 180 deg"""
+        phi1   = np.radians(lat1)
+        phi2   = np.radians(lat2)
+        dlon   = np.radians((lon2 - lon1 + 180.) % 360. - 180.)
+        sinmax = np.maximum(np.abs(np.sin(phi1)), np.abs(np.sin(phi2)))
+        return 1.001 * 2. * np.arctan(np.abs(np.tan(0.5 * dlon)) * sinmax /
+                                      np.cos(0.5 * (phi2 - phi1))) + 1e-9
+
+    def makepairs(self, i, j, tcpa, tin, tout, dcpa, qdr, dist):
+        """Array of conflict pairs from the pair data"""
+        pairs = np.zeros(len(i), dtype=confdtype)
+        pairs['i']    = i
+        pairs['j']    = j
+        pairs['tcpa'] = tcpa
+        pairs['tin']  = tin
+        pairs['tout'] = tout
+        pairs['dcpa'] = dcpa
+        pairs['qdr']  = qdr
+        pairs['dist'] = dist
+        return pairs
+
+    def uniquepairs(self):
+        """Conflict pairs with each combination of two aircraft only once (the
+           pair that was found first, like in conflist_now)"""
+        i   = self.confpairs['i']
+        j   = self.confpairs['j']
+        key = np.minimum(i, j) * self.traf.ntraf + np.maximum(i, j)
+        first = np.unique(key, return_index=True)[1]
+        return self.confpairs[np.sort(first)]
+
+    def tinconfmin(self):
+        """Earliest time of entering a conflict per aircraft as ownship [s],
+           1e8 for aircraft without conflicts"""
+        tin = np.full(self.traf.ntraf, 1e8)
+        np.minimum.at(tin, self.confpairs['i'], self.confpairs['tin'])
+        return tin
+
+# ==================== Pair Resolution ======================
+    # Common driver for CR methods that solve each conflict pair on its own
+    # (Eby, MVP, MVP_LAY). Such a method provides a pair kernel:
+    #     kernel(dbconf, pairs) -> dv [m/s], array (npairs x 3) east, north, up
+    # the change in velocity of aircraft j of each pair, aircraft i gets -dv.
+    # The kernel works on arrays of pairs (see confdtype), not pair by pair.
+
+    def resolvepairs(self, kernel, priority=None, useprio=True):
+        """Change in velocity [m/s] per aircraft (ntraf x 3, east, north, up)
+           from the pair kernel of the CR method. If possible, each conflict
+           is solved once and the result used for both aircraft, otherwise
+           each aircraft solves its own conflicts. With swprio, the priority
+           rules (default: prioritycruise) select which aircraft solve,
+           unless the CR method does not use them (useprio False)."""
+        dv = np.zeros((self.traf.ntraf, 3))
+
+        # Asymmetric detection: each aircraft solves its own conflicts
+        if self.traf.ADSBtrunc or self.traf.ADSBtransnoise:
+            pairs = self.confpairs
+            np.add.at(dv, pairs['i'], -kernel(self, pairs))
+            return dv
+
+        pairs  = self.uniquepairs()
+        dvpair = kernel(self, pairs)
+
+        # Per pair: aircraft i with -dv, then aircraft j with +dv
+        idx  = np.column_stack((pairs['i'], pairs['j'])).ravel()
+        vals = np.hstack((-dvpair, dvpair)).reshape(-1, 3)
+
+        if self.swprio and useprio:
+            solve, horiz = (priority or Dbconf.prioritycruise)(self, pairs)
+            solve = solve.ravel()
+            horiz = solve & horiz.ravel()
+
+            # Solving horizontally resets the vertical speed change of that
+            # aircraft, also the changes from earlier pairs
+            if horiz.any():
+                k     = np.arange(len(idx))
+                reset = np.full(self.traf.ntraf, -1)
+                np.maximum.at(reset, idx[horiz], k[horiz])
+                vals[k <= reset[idx], 2] = 0.
+
+            idx  = idx[solve]
+            vals = vals[solve]
+
+        np.add.at(dv, idx, vals)
+        return dv
+
+    def prioritycruise(self, pairs):
+        """Priority rules: cruising aircraft have priority over climbing or
+           descending aircraft. Returns which aircraft solve each pair and
+           which only horizontally, both arrays (npairs x 2) for i and j"""
+        vs1 = np.abs(self.traf.vs[pairs['i']])
+        vs2 = np.abs(self.traf.vs[pairs['j']])
+
+        # If aircraft 1 is cruising, and aircraft 2 is climbing/descending -> aircraft 2 solves conflict
+        only2 = (vs1 < 0.1) & (vs2 > 0.1)
+        # If aircraft 2 is cruising, and aircraft 1 is climbing/descending -> aircraft 1 solves conflict
+        only1 = ~only2 & (vs2 < 0.1) & (vs1 > 0.1)
+
+        # Otherwise both are climbing/descending/cruising: both solve
+        solve = np.column_stack((~only2, ~only1))
+        return solve, np.zeros_like(solve)
+
+    def applyresolution(self, dv):
+        """Set the ASAS track, speed, vertical speed and altitude from the
+           change in velocity dv [m/s] per aircraft (ntraf x 3), restricted
+           to the resolution directions of swresodir and capped to the
+           ASAS speed limits"""
+        traf = self.traf
+        dv   = np.transpose(dv)
+
+        # the old speed vector, cartesian coordinates
+        trkrad = np.radians(traf.trk)
+        v = np.array([np.sin(trkrad) * traf.tas,
+                      np.cos(trkrad) * traf.tas,
+                      traf.vs])
+
+        # Restrict resolution direction based on swresodir
+        if self.swresodir == "HORIZ":
+            dv[2, :] = 0.
+
+        # the new speed vector
+        newv = dv + v
+
+        # the new speed vector in polar coordinates
+        if self.swresodir == "VERT":
+            newtrack = (np.arctan2(v[0, :], v[1, :]) * 180 / np.pi) % 360
+        else:
+            newtrack = (np.arctan2(newv[0, :], newv[1, :]) * 180 / np.pi) % 360
+        newgs  = np.sqrt(newv[0, :]**2 + newv[1, :]**2)
+        neweas = vtas2eas(newgs, traf.alt)
+
+        # Cap the velocity and the vertical speed
+        neweascapped = np.maximum(self.vmin, np.minimum(self.vmax, neweas))
+        vscapped     = np.maximum(self.vsmin, np.minimum(self.vsmax, newv[2, :]))
+
+        # now assign in the traf class
+        traf.asashdg = newtrack
+        traf.asasspd = veas2tas(neweascapped, traf.alt)
+        traf.asasvsp = vscapped
+
+        # asasalt follows the vertical speed until the first conflict is
+        # entered, but only for aircraft with a conflict within the
+        # lookahead time (tinconf is 1e8 for aircraft without conflicts).
+        # Only detected conflicts count, see the notes at the top.
+        tinconf     = self.tinconfmin()
+        condition   = tinconf < self.dtlookahead * 1.2
+        asasalttemp = traf.asasvsp * tinconf + traf.alt
+        # Condition2 ensures that aircraft do not overshoot their layer altitude
+        condition2  = traf.alt != traf.aalt
+        traf.asasalt[condition]  = asasalttemp[condition]
+        traf.asasalt[condition2] = traf.aalt[condition2]
+
 # ==================== Conflict Filter (User specific) ======================
     def conflictfilter(self):
         if not self.swasas:
             return
         ## Filter for conflicts: no conflicts are detected for aircraft with an altitude less than 1000 ft
-        idx_conffilter                 = np.where(self.traf.alt<(1000*ft))[0]  # Search for the indices of aircraft within the altitude restriction
-        self.swconfl[idx_conffilter,:] = 0.                                    # Make the rows of the 'restricted' aircraft zero
-        self.swconfl[:,idx_conffilter] = 0.                                    # Make the columns of the 'restricted' aircraft zero
+        low  = self.traf.alt<(1000*ft)                                         # Aircraft within the altitude restriction
+        keep = np.logical_not(low[self.confpairs['i']] | low[self.confpairs['j']])
+        self.confpairs = self.confpairs[keep]                                  # Remove pairs with a 'restricted' aircraft
         
         return
 
 # ==================== Conflict Listing ======================
     def conflictlist(self, simt):
-        if len(self.swconfl) == 0:
+        if not self.swasas:
             return
-        
-        # Calculate CPA positions of traffic in lat/lon?
-
-        # Select conflicting pairs: each a/c gets their own record
-        self.confidxs = np.where(self.swconfl)
-
-        self.nconf = len(self.confidxs[0])
-        self.iown = self.confidxs[0]
-        self.ioth = self.confidxs[1]
-
-        self.latowncpa = []
-        self.lonowncpa = []
-        self.altowncpa = []
-        self.latintcpa = []
-        self.lonintcpa = []
-        self.altintcpa = []
-
-        # Store result
-        self.traf.iconf = self.traf.ntraf*[-1]
-        self.idown = []
-        self.idoth = []
-        
-        self.LOSlist_now=[]
-        self.conflist_now=[]
-        
 
-        for idx in range(self.nconf):
-            i = self.iown[idx]
-            j = self.ioth[idx]
-            if i==j:
-                continue
+        traf = self.traf
+
+        # Conflicting pairs: each a/c gets their own record
+        self.nconf = len(self.confpairs)
+        self.iown  = i = self.confpairs['i']
+        self.ioth  = j = self.confpairs['j']
+        tcpa       = self.confpairs['tcpa']
+
+        # Store result: per aircraft the last conflict in which it is ownship
+        iconf = -np.ones(traf.ntraf, dtype=int)
+        np.maximum.at(iconf, i, np.arange(self.nconf))
+        traf.iconf = iconf.tolist()
+        self.idown = [traf.id[k] for k in i]
+        self.idoth = [traf.id[k] for k in j]
+
+        # CPA positions of ownship and intruder (from its ADS-B data)
+        self.latowncpa, self.lonowncpa = geo.qdrpos(traf.lat[i], traf.lon[i],
+                                                    traf.trk[i], tcpa * traf.gs[i] / nm)
+        self.altowncpa = traf.alt[i] + tcpa * traf.vs[i]
+
+        self.latintcpa, self.lonintcpa = geo.qdrpos(traf.adsblat[j], traf.adsblon[j],
+                                                    traf.adsbtrk[j], tcpa * traf.adsbgs[j] / nm)
+        self.altintcpa = traf.adsbalt[j] + tcpa * traf.adsbvs[j]
+
+        # Horizontal and vertical loss of separation
+        dx = (traf.lat[i] - traf.lat[j]) * 111319.
+        dy = (traf.lon[i] - traf.lon[j]) * 111319.
+
+        hdist2 = dx * dx + dy * dy
+        hLOS   = hdist2 < self.R**2
+        vdist  = np.abs(traf.alt[i] - traf.alt[j])
+        vLOS   = vdist < self.dh
+
+        LOS = self.checkLOS(hLOS, vLOS, i, j)
+
+        # Intrusion severity
+        Ih = 1.0 - np.sqrt(hdist2) / self.R
+        Iv = 1.0 - vdist / self.dh
+        severity = np.minimum(Ih, Iv)
+
+        # Add to Conflict and LOSlist, to count total conflicts and LOS
+        # NB: if only one A/C detects a conflict, it is also added to these lists
+        keys = self.pairkeys(i, j)
+        self.conflist_now = set(keys.tolist())
+        self.LOSlist_now  = set(keys[LOS].tolist())
+
+        # New conflicts are stored with the pair that was found first
+        first = np.sort(np.unique(keys, return_index=True)[1])
+        for k, key in zip(first.tolist(), keys[first].tolist()):
+            if key not in self.conflist_all:
+                self.conflist_all[key] = (traf.uid[i[k]], traf.uid[j[k]])
+                self.conflist_exp.append(key)
+
+        # Store the most severe intrusion per LOS
+        ilos = np.where(LOS)[0]
+        for k, key in zip(ilos.tolist(), keys[ilos].tolist()):
+            if key not in self.LOSlist_all:
+                self.LOSlist_all.add(key)
+                self.LOSmaxsev[key]  = 0.
+                self.LOShmaxsev[key] = 0.
+                self.LOSvmaxsev[key] = 0.
+
+            if severity[k] > self.LOSmaxsev[key]:
+                self.LOSmaxsev[key]  = severity[k]
+                self.LOShmaxsev[key] = Ih[k]
+                self.LOSvmaxsev[key] = Iv[k]
 
-            self.idown.append(self.traf.id[i])
-            self.idoth.append(self.traf.id[j])
-            
-            self.traf.iconf[i] = idx
-            rng = self.tcpa[i,j]*self.traf.gs[i]/nm
-            lato,lono = geo.qdrpos(self.traf.lat[i],self.traf.lon[i], \
-                                                        self.traf.trk[i],rng)
-            alto = self.traf.alt[i]+self.tcpa[i,j]*self.traf.vs[i]
-                                            
-            rng = self.tcpa[i,j]*self.traf.adsbgs[j]/nm
-            lati,loni = geo.qdrpos(self.traf.adsblat[j],self.traf.adsblon[j], \
-                                                       self.traf.adsbtrk[j],rng)
-            alti=self.traf.adsbalt[j]+self.tcpa[i,j]*self.traf.adsbvs[j]
-            
-            self.latowncpa.append(lato)
-            self.lonowncpa.append(lono)
-            self.altowncpa.append(alto)
-            self.latintcpa.append(lati)
-            self.lonintcpa.append(loni)
-            self.altintcpa.append(alti)
-            
-            dx = (self.traf.lat[i]-self.traf.lat[j])*111319.
-            dy = (self.traf.lon[i]-self.traf.lon[j])*111319.
-            
-            hdist2 = dx**2+dy**2
-            hLOS  = hdist2<self.R**2
-            vdist = abs(self.traf.alt[i]-self.traf.alt[j])
-            vLOS  = vdist<self.dh
-            
-            LOS = self.checkLOS(hLOS,vLOS,i,j)
-            
-            # Add to Conflict and LOSlist, to count total conflicts and LOS
-
-            # NB: if only one A/C detects a conflict, it is also added to these lists
-            combi=str(self.traf.id[i])+" "+str(self.traf.id[j])
-            combi2=str(self.traf.id[j])+" "+str(self.traf.id[i])
-            
-            if combi not in self.conflist_all and combi2 not in self.conflist_all:
-                self.conflist_all.append(combi)
-                self.conflist_exp.append(combi)
-        
-            if combi not in self.conflist_now and combi2 not in self.conflist_now:
-                self.conflist_now.append(combi)
-
-            if LOS:
-                if combi not in self.LOSlist_all and combi2 not in self.LOSlist_all:
-                    self.LOSlist_all.append(combi)
-                    self.LOSmaxsev.append(0.)
-                    self.LOShmaxsev.append(0.)
-                    self.LOSvmaxsev.append(0.)
-
-                if combi not in self.LOSlist_now and combi2 not in self.LOSlist_now:
-                    self.LOSlist_now.append(combi)
-                    
-                #Now, we measure intrusion and store it if it is the most severe
-                Ih = 1.0 - np.sqrt(hdist2)/self.R
-                Iv = 1.0 - vdist/self.dh
-                severity = min(Ih,Iv)
-
-                try:  # Only continue if combi is found in LOSlist (and not combi2)
-                    idx = self.LOSlist_all.index(combi)
-                except:
-                    idx = -1
-                                   
-                if idx >=0:
-                    if severity > self.LOSmaxsev[idx]:
-                        self.LOSmaxsev[idx]  = severity
-                        self.LOShmaxsev[idx] = Ih
-                        self.LOSvmaxsev[idx] = Iv
-
-        # Define the total number of active conflicts
-        self.nconf = len(self.idown)
-
-        # Convert to numpy arrays for vectorisation
-        self.latowncpa = np.array(self.latowncpa)
-        self.lonowncpa = np.array(self.lonowncpa)
-        self.altowncpa = np.array(self.altowncpa)
-        self.latintcpa = np.array(self.latintcpa)
-        self.lonintcpa = np.array(self.latintcpa)
-        self.altintcpa = np.array(self.altintcpa)
-  
         return
 
 # ================ Conflict Resolution ========================================
@@ -367,120 +898,109 @@ class Dbconf():
         # Only use when ASAS is on
         if not self.swasas:
             return
-            
+
+        traf = self.traf
+
         # Indicate for all A/C that they should follow their Autopilot
-        self.traf.asasactive.fill(False) 
-        self.traf.inconflict.fill(False)
+        traf.asasactive.fill(False)
+        traf.inconflict.fill(False)
+
+        if len(self.conflist_all) == 0:
+            return
 
         # Look at all conflicts, also the ones that are solved but CPA is yet to come
-        for conflict in self.conflist_all: 
-            id1,id2 = self.ConflictToIndices(conflict)
-            
-            # If both aircraft still exist in the simulation (e.g. are not deleted)
-            if id1 != "Fail" and id2 != "Fail":
-                pastCPA=self.ConflictIsPastCPA(self.traf,id1,id2)
-                
-                # If the conflict is not past the closest-point-of-approach (CPA), follow ASAS
-                if not pastCPA:
-                    # Indicate that the A/C must follow their ASAS
-                    self.traf.asasactive[id1] = True 
-                    self.traf.inconflict[id1] = True
-
-                    self.traf.asasactive[id2] = True
-                    self.traf.inconflict[id2] = True
-            
-                # If the conflict is past the closest-point-of-approach (CPA),
-                # find the right waypoint/altitude using trajectory_recovery(),
-                # And using direct() activate this waypoint
-                else:
-                    # Find the next active waypoint and delete the conflict from conflist_all
-                    iwpid1 = self.traf.route[id1].trajectory_recovery(self.traf,id1)
-                    if iwpid1 != -1: # To avoid problems if there are no waypoints
-                        self.traf.route[id1].direct(self.traf, id1, self.traf.route[id1].wpname[iwpid1])
-                    iwpid2 = self.traf.route[id2].trajectory_recovery(self.traf,id2)
-                    if iwpid2 != -1: # To avoid problems if there are no waypoints
-                        self.traf.route[id2].direct(self.traf, id2, self.traf.route[id2].wpname[iwpid2])
-                    
-                    # if conflict is solved, remove it from the conflist_all
-                    self.conflist_all.remove(conflict)
-
-            # If aircraft id1 cannot be found in traffic, start trajectory recovery for aircraft id2
-            # And remove the conflict from the conflict_all list
-            elif id1 == "Fail" and id2!= "Fail":
-                 iwpid2 = self.traf.route[id2].trajectory_recovery(self.traf,id2)
-                 if iwpid2 != -1: # To avoid problems if there are no waypoints
-                     self.traf.route[id2].direct(self.traf, id2, self.traf.route[id2].wpname[iwpid2])
-                 self.conflist_all.remove(conflict)
-
-            # If aircraft id2 cannot be found in traffic, start trajectory recovery for aircraft id1
-            # And remove the conflict from the conflict_all list
-            elif id2 == "Fail" and id1 != "Fail":
-                iwpid1 = self.traf.route[id1].trajectory_recovery(self.traf,id1)
-                if iwpid1 != -1: # To avoid problems if there are no waypoints
-                    self.traf.route[id1].direct(self.traf, id1, self.traf.route[id1].wpname[iwpid1])
-                self.conflist_all.remove(conflict)
-            
-            # if both are fail, then remove the conflict from the conflist_all list
-            else:
-                self.conflist_all.remove(conflict)
-                     
-                
-            
+        # Indices of both aircraft, -1 when they have been deleted
+        keys = np.array(self.conflist_all.keys())
+        ids  = traf.uids2idx(np.array(self.conflist_all.values(), dtype=int).reshape(-1, 2))
+        id1  = ids[:, 0]
+        id2  = ids[:, 1]
+
+        # Conflicts of which both aircraft still exist, and are not past CPA
+        both    = (id1 >= 0) * (id2 >= 0)
+        pastCPA = np.ones(len(keys), dtype=bool)
+        pastCPA[both] = self.ConflictIsPastCPA(traf, id1[both], id2[both])
+        active  = both * ~pastCPA
+
+        # If the conflict is not past the closest-point-of-approach (CPA),
+        # indicate that the A/C must follow their ASAS
+        traf.asasactive[id1[active]] = True
+        traf.inconflict[id1[active]] = True
+        traf.asasactive[id2[active]] = True
+        traf.inconflict[id2[active]] = True
+
+        # If the conflict is past CPA, or one of the aircraft has been deleted,
+        # the remaining aircraft recover their trajectory and the conflict is
+        # removed from conflist_all
+        done    = ~active
+        recover = np.unique(np.concatenate((id1[done], id2[done])))
+        self.recover(recover[recover >= 0])
+
+        for conflict in keys[done].tolist():
+            del self.conflist_all[conflict]
+
         return
 
+    def recover(self, idx):
+        """Trajectory recovery of aircraft idx (array of indices): find the
+           right waypoint/altitude using trajectory_recovery() and activate
+           this waypoint using direct(). Done once per aircraft, also when it
+           was in more than one conflict."""
+        for i in idx:
+            route = self.traf.route[i]
+            iwpid = route.trajectory_recovery(self.traf, i)
+            if iwpid != -1: # To avoid problems if there are no waypoints
+                route.direct(self.traf, i, route.wpname[iwpid])
+
 #========================= Check if past CPA ==================================
-        
+
     def ConflictIsPastCPA(self, traf, id1, id2):
+        """Check whether conflicts between aircraft id1 and id2 (indices or
+           arrays of indices) are past CPA"""
 
-        d = np.array([traf.lon[id2]-traf.lon[id1],traf.lat[id2]-traf.lat[id1]])
+        dlon = traf.lon[id2] - traf.lon[id1]
+        dlat = traf.lat[id2] - traf.lat[id1]
 
         # find track in degrees
         t1 = np.radians(traf.trk[id1])
         t2 = np.radians(traf.trk[id2])
-        
-        # write velocities as vectors and find relative velocity vector              
-        v1 = np.array([np.sin(t1)*traf.tas[id1],np.cos(t1)*traf.tas[id1]])
-        v2 = np.array([np.sin(t2)*traf.tas[id2],np.cos(t2)*traf.tas[id2]])
-        v  = np.array(v2-v1) 
-        
+
+        # relative velocity vector
+        du = np.sin(t2) * traf.tas[id2] - np.sin(t1) * traf.tas[id1]
+        dv = np.cos(t2) * traf.tas[id2] - np.cos(t1) * traf.tas[id1]
+
         # the conflict has past CPA if the horizontal
         # velocities of the two aircraft are not pointing at each other
-        pastCPA = np.dot(d,v)>0.
-        
+        pastCPA = dlon * du + dlat * dv > 0.
+
         # In case of hLOS, pastCPA stays False to avoid intrusion with negatice tcpa
-        dx = (self.traf.lat[id1]-self.traf.lat[id2])*111319.
-        dy = (self.traf.lon[id1]-self.traf.lon[id2])*111319.
-        hdist2 = dx**2+dy**2
-        hLOS  = hdist2<self.R**2
-        
+        dx = (traf.lat[id1] - traf.lat[id2]) * 111319.
+        dy = (traf.lon[id1] - traf.lon[id2]) * 111319.
+        hdist2 = dx**2 + dy**2
+        hLOS   = hdist2 < self.R**2
+
         # If two aircraft solved the conflict vertically, pastCPA is false as long as there is HLOS,
         # to avoid that the aircraft recover their route too fast, into an intrusion with negative tcpa
-        if hLOS:
-            pastCPA = False
         # If two aircraft have a conflict with small delta hdg, pastCPA is only past CPA when the distance is more than Rm.
         # This is to avoid that these conflicts become a 'traffic light' conflict resulting in intrusion
-        if (abs(traf.trk[id1] - traf.trk[id2]) < 30.) &  (hdist2<self.Rm**2):
-            pastCPA = False
+        smalltrk = (np.abs(traf.trk[id1] - traf.trk[id2]) < 30.) * (hdist2 < self.Rm**2)
+        pastCPA  = pastCPA * ~hLOS * ~smalltrk
 
         # If both aircraft leveled off, check vertical separation.
         # If both aircraft are seperated enough, we are pastCPA to recover route
-        if abs(traf.vs[id1]) < 0.1 and abs(traf.vs[id2]) < 0.1 and abs(traf.alt[id1]-traf.alt[id2]) > 1000*ft:
-            pastCPA = True
+        leveloff = (np.abs(traf.vs[id1]) < 0.1) * (np.abs(traf.vs[id2]) < 0.1) * \
+                   (np.abs(traf.alt[id1] - traf.alt[id2]) > 1000*ft)
 
-        return pastCPA
+        return pastCPA + leveloff
 
-#====================== Give A/C indices of conflict pair =====================
-        
-    def ConflictToIndices(self,conflict):
-        ac1,ac2 = conflict.split(" ")
-
-        try:
-            id1=self.traf.id.index(ac1)
-            id2=self.traf.id.index(ac2)
-        except:
-            return "Fail","Fail"
+#====================== Integer key of conflict pairs =========================
 
-        return id1,id2
+    def pairkeys(self, i, j):
+        """Integer key per aircraft pair (arrays of indices i and j), based on
+           the unique aircraft numbers: the same for (i,j) and (j,i), and it
+           does not change when other aircraft are deleted"""
+        uidi = self.traf.uid[i]
+        uidj = self.traf.uid[j]
+        return np.minimum(uidi, uidj) * 2**32 + np.maximum(uidi, uidj)
 
 #====================== Check for Loss of Separation =====================
     
@@ -489,109 +1009,108 @@ class Dbconf():
 
 #====================== Conflict Probe: check for neccesity of preventiVe ASAS maneuver=====================
 
-    def conflictprobe(self,simt,i,vs,newavs):
-        """ Preventive ASAS detection funtion: based on future state of aircraft i. 
-            If aircraft i has a conflict within dtlookahead_conflictprobe, postpone the VNAV maneuver"""
-        
+    def conflictprobe(self, simt, idx, newavs):
+        """ Preventive ASAS detection funtion: based on future state of aircraft idx
+            (array of indices) with new vertical speeds newavs. Returns an array
+            with True for the aircraft that have a conflict within
+            dtlookahead_conflictprobe: these postpone their VNAV maneuver"""
+        traf   = self.traf
+        idx    = np.asarray(idx, dtype=int)
+        newavs = np.asarray(newavs, dtype=float)
+        cfl    = np.zeros(len(idx), dtype=bool)
+
         # If not swasas, don't perform a conflict check
-        if not self.swasas:
-            return False
-    
+        if not self.swasas or traf.ntraf < 2:
+            return cfl
+
         # Filter: If the aircraft is below 1000 ft, no conflicts are detected
-        if self.traf.alt[i] < 1000*ft:
-            return False
-        
+        iprobe = np.where(traf.alt[idx] >= 1000*ft)[0]
+        if len(iprobe) == 0:
+            return cfl
+
+        tlook = self.dtlookahead_conflictprobe
+
+        # Candidate pairs: all aircraft within the latitude band that can be
+        # reached within the lookahead time, using aircraft sorted on latitude
+        dhor   = self.R + max(2. * np.max(traf.gs), 1e-3) * tlook
+        dlat   = np.degrees(dhor / 6356752.314245)  # smallest earth radius of WGS'84
+        order  = np.argsort(traf.lat)
+        latsrt = traf.lat[order]
+        lo     = np.searchsorted(latsrt, traf.lat[idx[iprobe]] - dlat, 'left')
+        hi     = np.searchsorted(latsrt, traf.lat[idx[iprobe]] + dlat, 'right')
+        n      = hi - lo
+        ipair  = np.repeat(iprobe, n)  # index in idx
+        k      = order[np.repeat(lo, n) + np.arange(np.sum(n)) - np.repeat(np.cumsum(n) - n, n)]
+        i      = idx[ipair]
+        near   = (k != i) & self.kwiknear(traf.lat[i], traf.lon[i], traf.lat[k],
+                                          traf.lon[k], dhor)
+        ipair, i, k = ipair[near], i[near], k[near]
+
         #### Horizontal crossing of disk (R) ####
-                
-        # Calculate the distance and heading between aircraft i and all the others
-        qdlst = qdrdist_vector(self.traf.lat[i],self.traf.lon[i], \
-                    self.traf.lat,self.traf.lon)
-        qdr      = np.array(qdlst[0])
-        dist     = np.array(qdlst[1])*nm
+
+        # Calculate the distance and heading between aircraft i and the others
+        qdr, dist = geo.qdrdist(traf.lat[i], traf.lon[i], traf.lat[k], traf.lon[k])
+        dist      = np.asarray(dist) * nm
 
         qdrrad  = np.radians(qdr)
         dx      = dist * np.sin(qdrrad) # is positions relative to i
         dy      = dist * np.cos(qdrrad) # is positions relative to i
-        
-        trkrad = np.radians(self.traf.trk)
-        u      = self.traf.gs*np.sin(trkrad)  # m/s
-        v      = self.traf.gs*np.cos(trkrad)  # m/s
-        
-        du = u - u[i]  # Speed du is perceived eastern speed of all aricraft relative to i
-        dv = v - v[i]  # Speed dv is perceived eastern speed of all aricraft relative to i
-        
+
+        trkrad = np.radians(traf.trk)
+        u      = traf.gs * np.sin(trkrad)  # m/s
+        v      = traf.gs * np.cos(trkrad)  # m/s
+
+        du = u[k] - u[i]  # Speed du is perceived eastern speed of other aircraft relative to i
+        dv = v[k] - v[i]  # Speed dv is perceived northern speed of other aircraft relative to i
+
         dv2  = du*du+dv*dv
         dv2  = np.where(np.abs(dv2)<1e-6,1e-6,dv2) # limit lower absolute value
-        
+
         vrel = np.sqrt(dv2)
-        
-        tcpa = (-(du*dx + dv*dy) / dv2)[0]
-        
-        # Calculate CPA positions
-        xcpa = tcpa*du
-        ycpa = tcpa*dv
-        
+
+        tcpa = -(du*dx + dv*dy) / dv2
+
         # Calculate distance^2 at CPA (minimum distance^2)
         dcpa2 = dist*dist-tcpa*tcpa*dv2
-        
+
         # Check for horizontal conflict
         R2        = self.R*self.R
         swhorconf = dcpa2<R2 # conflict or not
-        swhorconf = swhorconf[0]
-        
+
         # Calculate times of entering and leaving horizontal conflict
         dxinhor   = np.sqrt(np.maximum(0.,R2-dcpa2)) # half the distance travelled inzide zone
         dtinhor   = dxinhor/vrel
-        
+
         tinhor    = np.where(swhorconf,tcpa - dtinhor,1e8) # Set very large if no conf
-        
+
         touthor   = np.where(swhorconf,tcpa + dtinhor,-1e8) # set very large if no conf
-        
+
         # Check for horizontal conflicts, using dtlookahead_conflictprobe
-        # Store the indices of conflicting aircraft in idx_hor
-        horizontalcfl = swhorconf * (tinhor<=touthor)*  (touthor>0.)*(tinhor<self.dtlookahead_conflictprobe)
-        idx_hor = np.where(horizontalcfl == True)[1]
+        horizontalcfl = swhorconf * (tinhor<=touthor)*  (touthor>0.)*(tinhor<tlook)
 
         #### Vertical crossing of disk (-dh,+dh) ####
 
-        I             = np.eye(self.traf.ntraf) # Identity matric of order ntraf
-
-        alt       = self.traf.alt.reshape((1,self.traf.ntraf))
-        adsbalt   = self.traf.adsbalt.reshape((1,self.traf.ntraf))
-        if self.traf.ADSBtransnoise:
+        adsbalt = traf.adsbalt
+        if traf.ADSBtransnoise:
             # error in the determined altitude of other a/c
-            alterror=np.random.normal(0,self.traf.transerror[2],adsbalt.shape) #degrees
-            adsbalt+=alterror
-    
-        dalt      = alt - adsbalt.T
+            adsbalt = adsbalt + np.random.normal(0, traf.transerror[2], traf.ntraf)
 
-        newvs = vs - 0.0
-        newvs[i] = newavs
-        newvs  = newvs.reshape(1,len(newvs))
+        # Altitude of i relative to the others, with the new vertical speed of i
+        dalt = traf.alt[i] - adsbalt[k]
+        dvs  = newavs[ipair] - traf.adsbvs[k]
 
-        avs = self.traf.adsbvs
-        avs = avs.reshape(1,len(avs))
-        
-        dvs = newvs-avs.T
-        
         # Check for passing through each others zone
         dvs       = np.where(np.abs(dvs)<1e-6,1e-6,dvs) # prevent division by zero
         tcrosshi  = (dalt + self.dh)/-dvs
         tcrosslo  = (dalt - self.dh)/-dvs
-        
+
         tinver    = np.minimum(tcrosshi,tcrosslo)
         toutver   = np.maximum(tcrosshi,tcrosslo)
-        
+
         # Check for vertical conflicts, using dtlookahead_conflictprobe
-        verticalcfl = (tinver<=toutver)*  (toutver>0.)*(tinver<self.dtlookahead_conflictprobe)
-        
-        # For all aircraft in horizontal conflict, check the vertical conflict
-        for k in idx_hor:
-            if verticalcfl[k][i] == True and k != i:
-                # If aicraft i has a conflict within dtlookahead_conflictprobe,
-                # return a True value
-                return True
-    
-        # If no conflict detected, return False and start VNAV maneuver
-        return False
+        verticalcfl = (tinver<=toutver)*  (toutver>0.)*(tinver<tlook)
+
+        # Aircraft with a conflict within dtlookahead_conflictprobe
+        cfl[ipair[horizontalcfl * verticalcfl]] = True
+        return cfl
 
@@ -1411,19 +1411,11 @@ class Metric():
             
         print "Number of Aircraft in Research Area (FIR):" + str(self.metric[self.metric_number].ntraf)
         
-        deleteAC = []
-        for i in range(0,sim.traf.ntraf):
-            if sim.traf.avs[i] <= 0 and (sim.traf.aalt[i]/ft) < 750 and sim.traf.aspd[i] < 300:
-                deleteAC.append(sim.traf.id[i])
+        traf = sim.traf
+        deleteAC = (traf.avs <= 0) * (((traf.aalt/ft) < 750) * (traf.aspd < 300) + \
+                                      ((traf.aalt/ft) < 10) + (traf.aspd < 10))
 
-            elif sim.traf.avs[i] <=0 and (sim.traf.aalt[i]/ft) < 10:
-                deleteAC.append(sim.traf.id[i])
-            
-            if sim.traf.avs[i] <=0 and sim.traf.aspd[i] < 10:
-                deleteAC.append(sim.traf.id[i])
-        
-        for i in range(0,len(deleteAC)):
-            sim.traf.delete(deleteAC[i])
+        traf.delete_batch(np.where(deleteAC)[0])
 
         # Heartbeat for test
         self.write(sim.simt,"NTRAF;"+str(sim.traf.ntraf))
@@ -324,77 +324,79 @@ class Perf():
         return
 
     def reset(self):
-        """Reset database"""
+        """Reset database: register per-aircraft performance data in traffic"""
+        add = self.traf.arrays.add
+
         # list of aircraft indices
-        self.coeffidxlist = np.array([])
+        add(self, 'coeffidxlist', int, 0)
 
         # geometry and weight
-        self.mass = np.array ([])
-        self.Sref = np.array ([])               
+        add(self, 'mass')
+        add(self, 'Sref')
         
         # speeds         
-        self.to_spd =np.array ([]) # nominal takeoff speed
-        self.ld_spd    = np.array([]) # nominal landing speed
+        add(self, 'to_spd')           # nominal takeoff speed
+        add(self, 'ld_spd')           # nominal landing speed
         
         # reference velocities
-        self.refma= np.array ([]) # reference Mach
-        self.refcas= np.array ([]) # reference CAS        
+        add(self, 'refma')            # reference Mach
+        add(self, 'refcas')           # reference CAS
         
         # limits
-        self.vm_to = np.array([]) # min takeoff spd (w/o mass, density)
-        self.vm_ld = np.array([]) # min landing spd (w/o mass, density) 
-        self.vmto = np.array([]) # min TO spd
-        self.vmic = np.array([]) # min. IC speed
-        self.vmcr = np.array([]) # min cruise spd
-        self.vmap = np.array([]) # min approach speed
-        self.vmld = np.array([]) # min landing spd     
-        self.vmin = np.array([]) # min speed over all phases          
-        self.vmo  = np.array ([]) # max CAS
-        self.mmo  = np.array ([]) # max Mach    
+        add(self, 'vm_to')            # min takeoff spd (w/o mass, density)
+        add(self, 'vm_ld')            # min landing spd (w/o mass, density)
+        add(self, 'vmto')             # min TO spd
+        add(self, 'vmic')             # min. IC speed
+        add(self, 'vmcr')             # min cruise spd
+        add(self, 'vmap')             # min approach speed
+        add(self, 'vmld')             # min landing spd
+        add(self, 'vmin')             # min speed over all phases
+        add(self, 'vmo')              # max CAS
+        add(self, 'mmo')              # max Mach
         
-        self.hmaxact = np.array([]) # max. altitude
-        self.maxthr = np.array([]) # maximum thrust
+        add(self, 'hmaxact')          # max. altitude
+        add(self, 'maxthr')           # maximum thrust
 
         # aerodynamics
-        self.CD0       = np.array([])  # parasite drag coefficient
-        self.k         = np.array([])  # induced drag factor      
-        self.clmaxcr   = np.array([])   # max. cruise lift coefficient
-        self.qS        = np.array([])
+        add(self, 'CD0')              # parasite drag coefficient
+        add(self, 'k')                # induced drag factor
+        add(self, 'clmaxcr')          # max. cruise lift coefficient
+        add(self, 'qS')
         
         # engines
-        self.traf.engines = [] # avaliable engine type per aircraft type
-        self.etype = np.array ([]) # jet /turboprop
+        self.traf.arrays.addlist(self.traf, 'engines') # avaliable engine type per aircraft type
+        add(self, 'etype')            # jet /turboprop
         
         # jet engines:
-        self.rThr = np.array([]) # rated thrust (all engines)
-        self.Thr_s = np.array([]) # chosen thrust setting
-        self.SFC  = np.array([]) # specific fuel consumption in cruise
-        self.ff = np.array([]) # fuel flow
-        self.ffto = np.array([]) # fuel flow takeoff
-        self.ffcl = np.array([]) # fuel flow climb
-        self.ffcr = np.array ([]) # fuel flow cruise
-        self.ffid = np.array([]) # fuel flow idle
-        self.ffap = np.array([]) # fuel flow approach
+        add(self, 'rThr')             # rated thrust (all engines)
+        add(self, 'SFC')              # specific fuel consumption in cruise
+        add(self, 'ff')               # fuel flow
+        add(self, 'ffto')             # fuel flow takeoff
+        add(self, 'ffcl')             # fuel flow climb
+        add(self, 'ffcr')             # fuel flow cruise
+        add(self, 'ffid')             # fuel flow idle
+        add(self, 'ffap')             # fuel flow approach
         self.Thr_s= np.array([1., 0.85, 0.07, 0.3 ]) # Thrust settings per flight phase according to ICAO
 
         # turboprop engines
-        self.P = np.array([])    # avaliable power at takeoff conditions
-        self.PSFC_TO = np.array([]) # specific fuel consumption takeoff
-        self.PSFC_CR = np.array([]) # specific fuel consumption cruise
+        add(self, 'P')                # avaliable power at takeoff conditions
+        add(self, 'PSFC_TO')          # specific fuel consumption takeoff
+        add(self, 'PSFC_CR')          # specific fuel consumption cruise
         self.eta = 0.8           # propeller efficiency according to Raymer
         
-        self.Thr = np.array([]) # Thrust
-        self.D = np.array([]) # Drag
-        self.ESF = np.array([]) # Energy share factor according to EUROCONTROL
+        add(self, 'Thr')              # Thrust
+        add(self, 'D')                # Drag
+        add(self, 'ESF', float, 1.)   # Energy share factor according to EUROCONTROL
         
         # flight phase
-        self.phase = np.array([]) # flight phase
-        self.bank = np.array ([]) # bank angle        
+        add(self, 'phase')            # flight phase
+        add(self, 'bank')             # bank angle
         return
        
 
-    def create(self, actype):
-        """Create new aircraft"""
+    def create(self, actype, idx):
+        """Create new aircraft: set type specific data of aircraft idx (all of type actype)"""
+
         # note: coefficients are initialized in SI units
         if actype in coeffBS.atype:
             # aircraft
@@ -405,44 +407,32 @@ class Perf():
             if not Perf.warned:
                   print "aircraft is using default aircraft performance (Boeing 747-400)."
             Perf.warned = True
-        self.coeffidxlist = np.append(self.coeffidxlist, self.coeffidx)
-        self.mass = np.append(self.mass, coeffBS.MTOW[self.coeffidx]) # aircraft weight
-        self.Sref = np.append(self.Sref, coeffBS.Sref[self.coeffidx]) # wing surface reference area
-        self.etype = np.append(self.etype, coeffBS.etype[self.coeffidx]) # engine type of current aircraft
-        self.traf.engines.append(coeffBS.engines[self.coeffidx]) # avaliable engine type per aircraft type   
+        self.coeffidxlist[idx] = self.coeffidx
+        self.mass[idx] = coeffBS.MTOW[self.coeffidx] # aircraft weight
+        self.Sref[idx] = coeffBS.Sref[self.coeffidx] # wing surface reference area
+        self.etype[idx] = coeffBS.etype[self.coeffidx] # engine type of current aircraft
+        for i in idx:
+            self.traf.engines[i] = coeffBS.engines[self.coeffidx] # avaliable engine type per aircraft type
 
-        # speeds         
+        # speeds
         # self.to_spd    = np.append(self.to_spd, coeffBS.to_spd[self.coeffidx]) # nominal takeoff speed
-        # self.ld_spd    = np.append(self.ld_spd, coeffBS.ld_spd[self.coeffidx]) # nominal landing speed            
-
-        self.refma  = np.append(self.refma, coeffBS.cr_Ma[self.coeffidx]) # nominal cruise Mach at 35000 ft
-        self.refcas = np.append(self.refcas, vtas2cas(coeffBS.cr_spd[self.coeffidx], 35000*ft)) # nominal cruise CAS
-
-        # limits   
-        self.vm_to = np.append(self.vm_to, coeffBS.vmto[self.coeffidx])
-        self.vm_ld = np.append(self.vm_ld, coeffBS.vmld[self.coeffidx])   
-        self.vmto = np.append(self.vmto, 0.0)
-        self.vmic = np.append(self.vmic, 0.0)        
-        self.vmcr = np.append(self.vmcr, 0.0)
-        self.vmap = np.append(self.vmap, 0.0)
-        self.vmld = np.append(self.vmld, 0.0)
-        self.vmin = np.append (self.vmin, 0.0)
-        self.mmo    = np.append(self.mmo, coeffBS.max_Ma[self.coeffidx]) # maximum Mach
-        self.vmo   = np.append(self.vmo, coeffBS.max_spd[self.coeffidx]) # maximum CAS
-        self.hmaxact   = np.append(self.hmaxact, coeffBS.max_alt[self.coeffidx]) # maximum altitude  
-        
+        # self.ld_spd    = np.append(self.ld_spd, coeffBS.ld_spd[self.coeffidx]) # nominal landing speed
+
+        self.refma[idx]  = coeffBS.cr_Ma[self.coeffidx] # nominal cruise Mach at 35000 ft
+        self.refcas[idx] = vtas2cas(coeffBS.cr_spd[self.coeffidx], 35000*ft) # nominal cruise CAS
+
+        # limits
+        self.vm_to[idx] = coeffBS.vmto[self.coeffidx]
+        self.vm_ld[idx] = coeffBS.vmld[self.coeffidx]
+        self.mmo[idx]    = coeffBS.max_Ma[self.coeffidx] # maximum Mach
+        self.vmo[idx]   = coeffBS.max_spd[self.coeffidx] # maximum CAS
+        self.hmaxact[idx]   = coeffBS.max_alt[self.coeffidx] # maximum altitude
+
         # aerodynamics
-        self.CD0       = np.append(self.CD0, coeffBS.CD0[self.coeffidx])  # parasite drag coefficient
-        self.k         = np.append(self.k, coeffBS.k[self.coeffidx])  # induced drag factor   
-        self.clmaxcr   = np.append(self.clmaxcr, coeffBS.clmax_cr[self.coeffidx])   # max. cruise lift coefficient
-        self.qS        = np.append(self.qS, 0.0)
-        # performance - initialise neutrally       
-        self.D = np.append(self.D, 0.) 
-        self.ESF = np.append(self.ESF, 1.)
-        
-        # flight phase
-        self.phase = np.append(self.phase, 0.)
-        self.bank  = np.append(self.bank, 0.)
+        self.CD0[idx]       = coeffBS.CD0[self.coeffidx] # parasite drag coefficient
+        self.k[idx]         = coeffBS.k[self.coeffidx] # induced drag factor
+        self.clmaxcr[idx]   = coeffBS.clmax_cr[self.coeffidx] # max. cruise lift coefficient
+
         # engines
 
         # turboprops
@@ -455,20 +445,19 @@ class Perf():
                     print "prop aircraft is using standard engine. Please check valid engine types per aircraft type"
                     Perf.warned2 = True
 
-            self.P = np.append(self.P, coeffBS.P[self.propengidx]*coeffBS.n_eng[self.coeffidx])                     
-            self.PSFC_TO = np.append(self.PSFC_TO, coeffBS.PSFC_TO[self.propengidx]) 
-            self.PSFC_CR = np.append(self.PSFC_CR, coeffBS.PSFC_CR[self.propengidx])
-            self.ff = np.append(self.ff, 0.) # neutral initialisation            
+            self.P[idx] = coeffBS.P[self.propengidx]*coeffBS.n_eng[self.coeffidx]
+            self.PSFC_TO[idx] = coeffBS.PSFC_TO[self.propengidx]
+            self.PSFC_CR[idx] = coeffBS.PSFC_CR[self.propengidx]
             # jet characteristics needed for numpy calculations
-            self.rThr = np.append(self.rThr, 1.) 
-            self.Thr = np.append(self.Thr, 1.)        
-            self.maxthr = np.append (self.maxthr, 1.) 
-            self.SFC = np.append(self.SFC, 1.)
-            self.ffto = np.append(self.ffto, 1.)
-            self.ffcl = np.append(self.ffcl, 1.)
-            self.ffcr = np.append(self.ffcr, 1.)
-            self.ffid = np.append(self.ffid, 1.)
-            self.ffap = np.append(self.ffap, 1.)  
+            self.rThr[idx] = 1.
+            self.Thr[idx] = 1.
+            self.maxthr[idx] = 1.
+            self.SFC[idx] = 1.
+            self.ffto[idx] = 1.
+            self.ffcl[idx] = 1.
+            self.ffcr[idx] = 1.
+            self.ffid[idx] = 1.
+            self.ffap[idx] = 1.
 
 
         # jet (also default)
@@ -483,84 +472,20 @@ class Perf():
                     print " jet aircraft is using standard engine. Please check valid engine types per aircraft type"
                     self.warned2 = True
 
-            self.rThr   = np.append(self.rThr, coeffBS.rThr[self.jetengidx]*coeffBS.n_eng[self.coeffidx])  # rated thrust (all engines)
-            self.Thr    = np.append(self.Thr, coeffBS.rThr[self.jetengidx]*coeffBS.n_eng[self.coeffidx])  # initialize thrust with rated thrust       
-            self.maxthr = np.append (self.maxthr, coeffBS.rThr[self.jetengidx]*coeffBS.n_eng[self.coeffidx]*1.2)  # maximum thrust - initialize with 1.2*rThr
-            self.SFC    = np.append(self.SFC, coeffBS.SFC[self.jetengidx])
-            self.ff     = np.append(self.ff, 0.)  # neutral initialisation
-            self.ffto   = np.append(self.ffto, coeffBS.ffto[self.jetengidx]*coeffBS.n_eng[self.coeffidx])
-            self.ffcl   = np.append(self.ffcl, coeffBS.ffcl[self.jetengidx]*coeffBS.n_eng[self.coeffidx])
-            self.ffcr   = np.append(self.ffcr, coeffBS.ffcr[self.jetengidx]*coeffBS.n_eng[self.coeffidx])
-            self.ffid   = np.append(self.ffid, coeffBS.ffid[self.jetengidx]*coeffBS.n_eng[self.coeffidx])
-            self.ffap   = np.append(self.ffap, coeffBS.ffap[self.jetengidx]*coeffBS.n_eng[self.coeffidx])
+            self.rThr[idx]   = coeffBS.rThr[self.jetengidx]*coeffBS.n_eng[self.coeffidx]  # rated thrust (all engines)
+            self.Thr[idx]    = coeffBS.rThr[self.jetengidx]*coeffBS.n_eng[self.coeffidx] # initialize thrust with rated thrust
+            self.maxthr[idx] = coeffBS.rThr[self.jetengidx]*coeffBS.n_eng[self.coeffidx]*1.2 # maximum thrust - initialize with 1.2*rThr
+            self.SFC[idx]    = coeffBS.SFC[self.jetengidx]
+            self.ffto[idx]   = coeffBS.ffto[self.jetengidx]*coeffBS.n_eng[self.coeffidx]
+            self.ffcl[idx]   = coeffBS.ffcl[self.jetengidx]*coeffBS.n_eng[self.coeffidx]
+            self.ffcr[idx]   = coeffBS.ffcr[self.jetengidx]*coeffBS.n_eng[self.coeffidx]
+            self.ffid[idx]   = coeffBS.ffid[self.jetengidx]*coeffBS.n_eng[self.coeffidx]
+            self.ffap[idx]   = coeffBS.ffap[self.jetengidx]*coeffBS.n_eng[self.coeffidx]
 
             # propeller characteristics needed for numpy calculations
-            self.P = np.append(self.P, 1.)
-            self.PSFC_TO = np.append(self.PSFC_TO, 1.)
-            self.PSFC_CR = np.append(self.PSFC_CR, 1.)
-
-        return
-
-    def delete(self, idx):
-        """Delete removed aircraft"""
-
-        del self.traf.engines[idx]
-
-        self.coeffidxlist = np.delete(self.coeffidxlist, idx)
-        self.mass = np.delete(self.mass, idx)    # aircraft weight
-        self.Sref = np.delete(self.Sref, idx)    # wing surface reference area
-        self.etype = np.delete(self.etype, idx)  # engine type of current aircraft
-
-        # limits
-        # self.to_spd    = np.append(self.to_spd, coeffBS.to_spd[self.coeffidx]) # nominal takeoff speed
-        # self.ld_spd    = np.append(self.ld_spd, coeffBS.ld_spd[self.coeffidx]) # nominal landing speed
-        self.vmo     = np.delete(self.vmo, idx)  # maximum CAS
-        self.mmo     = np.delete(self.mmo, idx)  # maximum Mach
-
-        self.vm_to   = np.delete(self.vm_to, idx)
-        self.vm_ld   = np.delete(self.vm_ld, idx)
-        self.vmto    = np.delete(self.vmto, idx)
-        self.vmic    = np.delete(self.vmic, idx)
-        self.vmcr    = np.delete(self.vmcr, idx)
-        self.vmap    = np.delete(self.vmap, idx)
-        self.vmld    = np.delete(self.vmld, idx)
-        self.vmin    = np.delete(self.vmin, idx)
-        self.maxthr  = np.delete(self.maxthr, idx)
-        self.hmaxact = np.delete(self.hmaxact, idx)
-
-        # reference speeds
-        self.refma   = np.delete(self.refma, idx)   # nominal cruise Mach at 35000 ft
-        self.refcas  = np.delete(self.refcas, idx)  # nominal cruise CAS
-
-        # aerodynamics
-        self.CD0     = np.delete(self.CD0, idx)      # parasite drag coefficient
-        self.k       = np.delete(self.k, idx)        # induced drag factor
-        self.clmaxcr = np.delete(self.clmaxcr, idx)  # max. cruise lift coefficient
-        self.qS      = np.delete(self.qS, idx)
-
-        # engine
-        self.rThr    = np.delete(self.rThr, idx)     # rated thrust (all engines)
-        self.SFC     = np.delete(self.SFC, idx)
-        self.ffto    = np.delete(self.ffto, idx)
-        self.ffcl    = np.delete(self.ffcl, idx)
-        self.ffcr    = np.delete(self.ffcr, idx)
-        self.ffid    = np.delete(self.ffid, idx)
-        self.ffap    = np.delete(self.ffap, idx)
-        self.ff      = np.delete(self.ff, idx)
-
-        # turboprop engines
-        self.P       = np.delete(self.P, idx)        # avaliable power at takeoff conditions
-        self.PSFC_TO = np.delete(self.PSFC_TO, idx)  # specific fuel consumption takeoff
-        self.PSFC_CR = np.delete(self.PSFC_CR, idx)  # specific fuel consumption cruise
-
-        # performance
-        self.Thr     = np.delete(self.Thr, idx)
-        self.D       = np.delete(self.D, idx)
-        self.ESF     = np.delete(self.ESF, idx)
-
-        # flight phase
-        self.phase   = np.delete(self.phase, idx)
-        self.bank    = np.delete(self.bank, idx)
+            self.P[idx] = 1.
+            self.PSFC_TO[idx] = 1.
+            self.PSFC_CR[idx] = 1.
 
         return
 
@@ -647,7 +572,7 @@ class Perf():
         # determine vertical speed
         swvs = (np.abs(self.traf.desvs) > self.traf.eps)
         vspd = swvs * self.traf.desvs + (1. - swvs) * self.traf.avsdef * np.sign(self.traf.delalt)
-        swaltsel = np.abs(self.traf.delalt) > np.abs(2. * self.traf.perfdt * np.abs(vspd))
+        swaltsel = np.abs(self.traf.delalt) > np.abs(2. * self.traf.sched.dt['PERF'] * np.abs(vspd))
         self.traf.vs = swaltsel * vspd  
 
         self.Thr = (((self.traf.vs*self.mass*g0)/(self.ESF*np.maximum(self.traf.eps, self.traf.tas))) + self.D) 
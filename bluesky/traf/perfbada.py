@@ -410,126 +410,132 @@ class PerfBADA():
         return False, "BADA performance model doesn't allow changing engine type"
 
     def reset(self):
-        """RESET DATABASE"""
+        """RESET DATABASE: register per-aircraft performance data in traffic"""
+        add = self.traf.arrays.add
+
 
         # engine
-        self.etype = np.array ([]) # jet, turboprop or piston
+        add(self, 'etype')            # jet, turboprop or piston
 
         # masses and dimensions
-        self.mass = np.array([]) # effective mass [kg]
+        add(self, 'mass', np.float64) # effective mass [kg] (integrated, so double)
         # self.mref = np.array([]) # ref. mass [kg]: 70% between min and max. mass
-        self.mmin = np.array([]) # OEW (or assumption) [kg]        
-        self.mmax = np.array([]) # MTOW (or assumption) [kg]
+        add(self, 'mmin')             # OEW (or assumption) [kg]
+        add(self, 'mmax')             # MTOW (or assumption) [kg]
         # self.mpyld = np.array([]) # MZFW-OEW (or assumption) [kg]
-        self.gw = np.array([]) # weight gradient on max. alt [m/kg]
-        self.Sref = np.array([]) # wing reference surface area [m^2]
+        add(self, 'gw')               # weight gradient on max. alt [m/kg]
+        add(self, 'Sref')             # wing reference surface area [m^2]
     
         # flight enveloppe
-        self.vmto = np.array([]) # min TO spd [m/s]
-        self.vmic = np.array([]) # min climb spd [m/s]
-        self.vmcr = np.array([]) # min cruise spd [m/s]
-        self.vmap = np.array([]) # min approach spd [m/s]
-        self.vmld = np.array([]) # min landing spd [m/s]   
-        self.vmin = np.array([]) # min speed over all phases [m/s]   
+        add(self, 'vmto')             # min TO spd [m/s]
+        add(self, 'vmic')             # min climb spd [m/s]
+        add(self, 'vmcr')             # min cruise spd [m/s]
+        add(self, 'vmap')             # min approach spd [m/s]
+        add(self, 'vmld')             # min landing spd [m/s]
+        add(self, 'vmin')             # min speed over all phases [m/s]
     
-        self.vmo =  np.array([]) # max operating speed [m/s]
-        self.mmo =  np.array([]) # max operating mach number [-]
-        self.hmax = np.array([]) # max. alt above standard MSL (ISA) at MTOW [m]
-        self.hmaxact = np.array([]) # max. alt depending on temperature gradient [m]
-        self.hmo =  np.array([]) # max. operating alt abov standard MSL [m]
-        self.gt =   np.array([]) # temp. gradient on max. alt [ft/k]
-        self.maxthr = np.array([]) # maximum thrust [N]
+        add(self, 'vmo')              # max operating speed [m/s]
+        add(self, 'mmo')              # max operating mach number [-]
+        add(self, 'hmax')             # max. alt above standard MSL (ISA) at MTOW [m]
+        add(self, 'hmaxact')          # max. alt depending on temperature gradient [m]
+        add(self, 'hmo')              # max. operating alt abov standard MSL [m]
+        add(self, 'gt')               # temp. gradient on max. alt [ft/k]
+        add(self, 'maxthr', float, 1000000.) # maximum thrust [N], initialize with excessive setting to avoid unrealistic limit setting
     
         # Buffet Coefficients
-        self.clbo = np.array([]) # buffet onset lift coefficient [-]
-        self.k =    np.array([]) # buffet coefficient [-]
-        self.cm16 = np.array([]) # CM16
+        add(self, 'clbo')             # buffet onset lift coefficient [-]
+        add(self, 'k')                # buffet coefficient [-]
+        add(self, 'cm16')             # CM16
         
         # reference CAS speeds
-        self.cascl  = np.array([]) # climb [m/s]
-        self.cascr  = np.array([]) # cruise [m/s]
-        self.casdes = np.array([]) # descent [m/s]
-        self.refcas    = np.array([]) # nominal cruise CAS  [m/s]
+        add(self, 'cascl')            # climb [m/s]
+        add(self, 'cascr')            # cruise [m/s]
+        add(self, 'casdes')           # descent [m/s]
+        add(self, 'refcas')           # nominal cruise CAS  [m/s]
         
         #reference mach numbers [-] 
-        self.macl = np.array([]) # climb 
-        self.macr = np.array([]) # cruise 
-        self.mades = np.array([]) # descent 
-        self.refma = np.array([]) # nominal cruise Mach at 35000 ft
+        add(self, 'macl')             # climb
+        add(self, 'macr')             # cruise
+        add(self, 'mades')            # descent
+        add(self, 'refma')            # nominal cruise Mach at 35000 ft
         
         # parasitic drag coefficients per phase [-]
-        self.cd0to = np.array([]) # phase takeoff 
-        self.cd0ic = np.array([]) # phase initial climb
-        self.cd0cr = np.array([]) # phase cruise
-        self.cd0ap = np.array([]) # phase approach
-        self.cd0ld = np.array([]) # phase land
-        self.gear  = np.array([]) # drag due to gear down
+        add(self, 'cd0to')            # phase takeoff
+        add(self, 'cd0ic')            # phase initial climb
+        add(self, 'cd0cr')            # phase cruise
+        add(self, 'cd0ap')            # phase approach
+        add(self, 'cd0ld')            # phase land
+        add(self, 'gear')             # drag due to gear down
         
         # induced drag coefficients per phase [-]
-        self.cd2to = np.array([]) # phase takeoff
-        self.cd2ic = np.array([]) # phase initial climb
-        self.cd2cr = np.array([]) # phase cruise
-        self.cd2ap = np.array([]) # phase approach
-        self.cd2ld = np.array([]) # phase land
+        add(self, 'cd2to')            # phase takeoff
+        add(self, 'cd2ic')            # phase initial climb
+        add(self, 'cd2cr')            # phase cruise
+        add(self, 'cd2ap')            # phase approach
+        add(self, 'cd2ld')            # phase land
     
         # max climb thrust coefficients
-        self.ctcth1 = np.array([]) # jet/piston [N], turboprop [ktN]
-        self.ctcth2 = np.array([]) # [ft]
-        self.ctcth3 = np.array([]) # jet [1/ft^2], turboprop [N], piston [ktN]
+        add(self, 'ctcth1')           # jet/piston [N], turboprop [ktN]
+        add(self, 'ctcth2')           # [ft]
+        add(self, 'ctcth3')           # jet [1/ft^2], turboprop [N], piston [ktN]
     
         # reduced climb power coefficient
-        self.cred = np.array([]) # [-]
+        add(self, 'cred')             # [-]
     
         # 1st and 2nd thrust temp coefficient 
-        self.ctct1 = np.array([]) # [k]
-        self.ctct2 = np.array([]) # [1/k]
-        self.dtemp = np.array([]) # [k]
+        add(self, 'ctct1')            # [k]
+        add(self, 'ctct2')            # [1/k]
+        add(self, 'dtemp')            # [k]
     
         # Descent Fuel Flow Coefficients
         # Note: Ctdes,app and Ctdes,lnd assume a 3 degree descent gradient during app and lnd
-        self.ctdesl =  np.array([]) # low alt descent thrust coefficient [-]
-        self.ctdesh =  np.array([]) # high alt descent thrust coefficient [-]
-        self.ctdesa =  np.array([]) # approach thrust coefficient [-]
-        self.ctdesld = np.array([]) # landing thrust coefficient [-]
+        add(self, 'ctdesl')           # low alt descent thrust coefficient [-]
+        add(self, 'ctdesh')           # high alt descent thrust coefficient [-]
+        add(self, 'ctdesa')           # approach thrust coefficient [-]
+        add(self, 'ctdesld')          # landing thrust coefficient [-]
     
         # transition altitude for calculation of descent thrust
-        self.hpdes = np.array([]) # [m]
+        add(self, 'hpdes')            # [m]
         
         # crossover altitude
-        self.atrans = np.array([]) # [m]
-        self.ESF = np.array([]) # [-]  
+        add(self, 'atrans')           # [m]
+        add(self, 'ESF', float, 1.)   # [-]
         
         # reference speed during descent
-        self.vdes = np.array([]) # [m/s]
-        self.mdes = np.array([]) # [-]
+        add(self, 'vdes')             # [m/s]
+        add(self, 'mdes')             # [-]
         
         # flight phase
-        self.phase = np.array([])
+        add(self, 'phase')
         
         # Thrust specific fuel consumption coefficients
-        self.cf1 = np.array([]) # jet [kg/(min*kN)], turboprop [kg/(min*kN*knot)], piston [kg/min]
-        self.cf2 = np.array([]) # [knots]
-        self.cf3 = np.array([]) # [kg/min]
-        self.cf4 = np.array([]) # [ft]
-        self.cf5 = np.array([]) # [-]
+        add(self, 'cf1')              # jet [kg/(min*kN)], turboprop [kg/(min*kN*knot)], piston [kg/min]
+        add(self, 'cf2')              # [knots]
+        add(self, 'cf3')              # [kg/min]
+        add(self, 'cf4')              # [ft]
+        add(self, 'cf5')              # [-]
 
         # performance
-        self.Thr = np.array([]) # thrust
-        self.D   = np.array([]) # drag
-        self.ff  = np.array([]) # fuel flow
+        add(self, 'qS')
+        add(self, 'hact')
+        add(self, 'bank')
+        add(self, 'Thr')              # thrust
+        add(self, 'D')                # drag
+        add(self, 'ff')               # fuel flow
     
         # ground
-        self.tol = np.array([]) # take-off length[m]
-        self.ldl = np.array([]) #landing length[m]
-        self.ws  = np.array([]) # wingspan [m]
-        self.len = np.array([]) # aircraft length[m] 
+        add(self, 'tol')              # take-off length[m]
+        add(self, 'ldl')              #landing length[m]
+        add(self, 'ws')               # wingspan [m]
+        add(self, 'len')              # aircraft length[m]
 
         return
        
 
 
-    def create(self, actype):
-        """CREATE NEW AIRCRAFT"""
+    def create(self, actype, idx):
+        """CREATE NEW AIRCRAFT: set type specific data of aircraft idx (all of type actype)"""
+
         # note: coefficients are initialized in SI units
 
         # general        
@@ -542,89 +548,87 @@ class PerfBADA():
                   print "Aircraft is using default B747-400 performance."
             self.warned = True
         # designate aicraft to its aircraft type
-        self.etype = np.append(self.etype, coeff.etype[self.coeffidx])        
+        self.etype[idx] = coeff.etype[self.coeffidx]
        
         # Initial aircraft mass is currently reference mass. 
         # BADA 3.12 also supports masses between 1.2*mmin and mmax
         # self.mref = np.append(self.mref, coeff.mref[self.coeffidx]*1000)         
-        self.mass = np.append(self.mass, coeff.mref[self.coeffidx]*1000)   
-        self.mmin = np.append(self.mmin, coeff.mmin[self.coeffidx]*1000)
-        self.mmax = np.append(self.mmax, coeff.mmax[self.coeffidx]*1000)
+        self.mass[idx] = coeff.mref[self.coeffidx]*1000
+        self.mmin[idx] = coeff.mmin[self.coeffidx]*1000
+        self.mmax[idx] = coeff.mmax[self.coeffidx]*1000
         # self.mpyld = np.append(self.mpyld, coeff.mpyld[self.coeffidx]*1000)
-        self.gw = np.append(self.gw, coeff.gw[self.coeffidx]*ft)
+        self.gw[idx] = coeff.gw[self.coeffidx]*ft
         
         # Surface Area [m^2]
-        self.Sref = np.append(self.Sref, coeff.Sref[self.coeffidx])
+        self.Sref[idx] = coeff.Sref[self.coeffidx]
 
         # flight enveloppe
         # minimum speeds per phase
-        self.vmto = np.append(self.vmto, coeff.vmto[self.coeffidx]*kts)
-        self.vmic = np.append(self.vmic, coeff.vmic[self.coeffidx]*kts)
-        self.vmcr = np.append(self.vmcr, coeff.vmcr[self.coeffidx]*kts)
-        self.vmap = np.append(self.vmap, coeff.vmap[self.coeffidx]*kts)
-        self.vmld = np.append(self.vmld, coeff.vmld[self.coeffidx]*kts)    
-        self.vmin = np.append(self.vmin, 0.)
-        self.vmo = np.append(self.vmo, coeff.vmo[self.coeffidx]*kts)
-        self.mmo = np.append(self.mmo, coeff.mmo[self.coeffidx])
+        self.vmto[idx] = coeff.vmto[self.coeffidx]*kts
+        self.vmic[idx] = coeff.vmic[self.coeffidx]*kts
+        self.vmcr[idx] = coeff.vmcr[self.coeffidx]*kts
+        self.vmap[idx] = coeff.vmap[self.coeffidx]*kts
+        self.vmld[idx] = coeff.vmld[self.coeffidx]*kts
+        self.vmo[idx] = coeff.vmo[self.coeffidx]*kts
+        self.mmo[idx] = coeff.mmo[self.coeffidx]
         
         # max. altitude parameters
-        self.hmo = np.append(self.hmo, coeff.hmo[self.coeffidx]*ft)        
-        self.hmax = np.append(self.hmax, coeff.hmax[self.coeffidx]*ft)
-        self.hmaxact = np.append(self.hmaxact, coeff.hmax[self.coeffidx]*ft) # initialize with hmax
-        self.gt = np.append(self.gt, coeff.gt[self.coeffidx]*ft)
+        self.hmo[idx] = coeff.hmo[self.coeffidx]*ft
+        self.hmax[idx] = coeff.hmax[self.coeffidx]*ft
+        self.hmaxact[idx] = coeff.hmax[self.coeffidx]*ft # initialize with hmax
+        self.gt[idx] = coeff.gt[self.coeffidx]*ft
         
         # max thrust setting
-        self.maxthr = np.append(self.maxthr, 1000000.) # initialize with excessive setting to avoid unrealistic limit setting
 
         # Buffet Coefficients
-        self.clbo = np.append(self.clbo, coeff.clbo[self.coeffidx])
-        self.k = np.append(self.k, coeff.k[self.coeffidx])
-        self.cm16 = np.append(self.cm16, coeff.cm16[self.coeffidx])
+        self.clbo[idx] = coeff.clbo[self.coeffidx]
+        self.k[idx] = coeff.k[self.coeffidx]
+        self.cm16[idx] = coeff.cm16[self.coeffidx]
 
         # reference speeds
         # reference CAS speeds
-        self.cascl = np.append(self.cascl, coeff.cascl[self.coeffidx]*kts)
-        self.cascr = np.append(self.cascr, coeff.cascr[self.coeffidx]*kts)
-        self.casdes = np.append(self.casdes, coeff.casdes[self.coeffidx]*kts)
+        self.cascl[idx] = coeff.cascl[self.coeffidx]*kts
+        self.cascr[idx] = coeff.cascr[self.coeffidx]*kts
+        self.casdes[idx] = coeff.casdes[self.coeffidx]*kts
 
         # reference mach numbers
-        self.macl = np.append(self.macl, coeff.macl[self.coeffidx])
-        self.macr = np.append(self.macr, coeff.macr[self.coeffidx] )
-        self.mades = np.append(self.mades, coeff.mades[self.coeffidx] )      
+        self.macl[idx] = coeff.macl[self.coeffidx]
+        self.macr[idx] = coeff.macr[self.coeffidx]
+        self.mades[idx] = coeff.mades[self.coeffidx]
 
         # reference speed during descent
-        self.vdes = np.append(self.vdes, coeff.vdes[self.coeffidx]*kts)
-        self.mdes = np.append(self.mdes, coeff.mdes[self.coeffidx])
+        self.vdes[idx] = coeff.vdes[self.coeffidx]*kts
+        self.mdes[idx] = coeff.mdes[self.coeffidx]
 
         # aerodynamics                
         # parasitic drag coefficients per phase
-        self.cd0to = np.append(self.cd0to, coeff.cd0to[self.coeffidx])
-        self.cd0ic = np.append(self.cd0ic, coeff.cd0ic[self.coeffidx])
-        self.cd0cr = np.append(self.cd0cr, coeff.cd0cr[self.coeffidx])
-        self.cd0ap = np.append(self.cd0ap, coeff.cd0ap[self.coeffidx])
-        self.cd0ld = np.append(self.cd0ld, coeff.cd0ld[self.coeffidx])
-        self.gear = np.append(self.gear, coeff.gear[self.coeffidx])
+        self.cd0to[idx] = coeff.cd0to[self.coeffidx]
+        self.cd0ic[idx] = coeff.cd0ic[self.coeffidx]
+        self.cd0cr[idx] = coeff.cd0cr[self.coeffidx]
+        self.cd0ap[idx] = coeff.cd0ap[self.coeffidx]
+        self.cd0ld[idx] = coeff.cd0ld[self.coeffidx]
+        self.gear[idx] = coeff.gear[self.coeffidx]
 
         # induced drag coefficients per phase
-        self.cd2to = np.append(self.cd2to, coeff.cd2to[self.coeffidx])
-        self.cd2ic = np.append(self.cd2ic, coeff.cd2ic[self.coeffidx])
-        self.cd2cr = np.append(self.cd2cr, coeff.cd2cr[self.coeffidx])
-        self.cd2ap = np.append(self.cd2ap, coeff.cd2ap[self.coeffidx])
-        self.cd2ld = np.append(self.cd2ld, coeff.cd2ld[self.coeffidx])
+        self.cd2to[idx] = coeff.cd2to[self.coeffidx]
+        self.cd2ic[idx] = coeff.cd2ic[self.coeffidx]
+        self.cd2cr[idx] = coeff.cd2cr[self.coeffidx]
+        self.cd2ap[idx] = coeff.cd2ap[self.coeffidx]
+        self.cd2ld[idx] = coeff.cd2ld[self.coeffidx]
 
         # reduced climb coefficient
         #jet
-        if self.etype [self.traf.ntraf-1] == 1:
-            self.cred = np.append(self.cred, coeff.credj)
+        if coeff.etype[self.coeffidx] == 1:
+            self.cred[idx] = coeff.credj
         # turboprop
-        elif self.etype [self.traf.ntraf-1]  ==2:
-            self.cred = np.append(self.cred, coeff.credt)
+        elif coeff.etype[self.coeffidx]  ==2:
+            self.cred[idx] = coeff.credt
         #piston
         else:
-            self.cred = np.append(self.cred, coeff.credp)
+            self.cred[idx] = coeff.credp
 
         # NOTE: model only validated for jet and turbo aircraft
-        if not self.warned2 and self.etype[self.traf.ntraf-1] == 3:
+        if not self.warned2 and coeff.etype[self.coeffidx] == 3:
             print "Using piston aircraft performance.",
             print "Not valid for real performance calculations."
             self.warned2 = True        
@@ -632,179 +636,44 @@ class PerfBADA():
         # performance
 
         # max climb thrust coefficients
-        self.ctcth1 = np.append(self.ctcth1, coeff.ctcth1[self.coeffidx]) # jet/piston [N], turboprop [ktN]
-        self.ctcth2 = np.append(self.ctcth2, coeff.ctcth2[self.coeffidx]) # [ft]
-        self.ctcth3 = np.append(self.ctcth3, coeff.ctcth3[self.coeffidx]) # jet [1/ft^2], turboprop [N], piston [ktN]
+        self.ctcth1[idx] = coeff.ctcth1[self.coeffidx] # jet/piston [N], turboprop [ktN]
+        self.ctcth2[idx] = coeff.ctcth2[self.coeffidx] # [ft]
+        self.ctcth3[idx] = coeff.ctcth3[self.coeffidx] # jet [1/ft^2], turboprop [N], piston [ktN]
 
         # 1st and 2nd thrust temp coefficient 
-        self.ctct1 = np.append(self.ctct1, coeff.ctct1[self.coeffidx]) # [k]
-        self.ctct2 = np.append(self.ctct2, coeff.ctct2[self.coeffidx]) # [1/k]
-        self.dtemp = np.append(self.dtemp, 0.) # [k], difference from current to ISA temperature. At the moment: 0, as ISA environment
+        self.ctct1[idx] = coeff.ctct1[self.coeffidx] # [k]
+        self.ctct2[idx] = coeff.ctct2[self.coeffidx] # [1/k]
 
         # Descent Fuel Flow Coefficients
         # Note: Ctdes,app and Ctdes,lnd assume a 3 degree descent gradient during app and lnd
-        self.ctdesl = np.append(self.ctdesl, coeff.ctdesl[self.coeffidx])
-        self.ctdesh = np.append(self.ctdesh, coeff.ctdesh[self.coeffidx])
-        self.ctdesa = np.append(self.ctdesa, coeff.ctdesa[self.coeffidx])
-        self.ctdesld = np.append(self.ctdesld, coeff.ctdesld[self.coeffidx])
+        self.ctdesl[idx] = coeff.ctdesl[self.coeffidx]
+        self.ctdesh[idx] = coeff.ctdesh[self.coeffidx]
+        self.ctdesa[idx] = coeff.ctdesa[self.coeffidx]
+        self.ctdesld[idx] = coeff.ctdesld[self.coeffidx]
 
         # transition altitude for calculation of descent thrust
-        self.hpdes = np.append(self.hpdes, coeff.hpdes[self.coeffidx]*ft)
-        self.ESF   = np.append(self.ESF, 1.) # neutral initialisation
-
-        # flight phase
-        self.phase = np.append(self.phase, 0)
+        self.hpdes[idx] = coeff.hpdes[self.coeffidx]*ft
 
          # Thrust specific fuel consumption coefficients
-        self.cf1 = np.append(self.cf1, coeff.cf1[self.coeffidx])      
+        self.cf1[idx] = coeff.cf1[self.coeffidx]
         # prevent from division per zero in fuelflow calculation
         if coeff.cf2[self.coeffidx]==0:
-            self.cf2 = np.append(self.cf2, 1) 
+            self.cf2[idx] = 1
         else:
-            self.cf2 = np.append(self.cf2, coeff.cf2[self.coeffidx])
-        self.cf3 = np.append(self.cf3, coeff.cf3[self.coeffidx])       
+            self.cf2[idx] = coeff.cf2[self.coeffidx]
+        self.cf3[idx] = coeff.cf3[self.coeffidx]
         # prevent from division per zero in fuelflow calculation
         if coeff.cf2[self.coeffidx]==0:
-            self.cf4 = np.append(self.cf4, 1)
+            self.cf4[idx] = 1
         else:
-            self.cf4 = np.append(self.cf4, coeff.cf4[self.coeffidx])            
-        self.cf5 = np.append(self.cf5, coeff.cf5[self.coeffidx])
-
-        self.Thr = np.append(self.Thr, 0.)
-        self.D = np.append(self.D, 0.)         
-        self.ff = np.append(self.ff, 0.)
+            self.cf4[idx] = coeff.cf4[self.coeffidx]
+        self.cf5[idx] = coeff.cf5[self.coeffidx]
 
         # ground
-        self.tol = np.append(self.tol, coeff.tol[self.coeffidx])
-        self.ldl = np.append(self.ldl, coeff.ldl[self.coeffidx])
-        self.ws = np.append(self.ws, coeff.ws[self.coeffidx])
-        self.len = np.append(self.len, coeff.len[self.coeffidx])         
-        return
-
-
-    def delete(self, idx):
-        """Delete REMOVED AIRCRAFT"""        
-        
-        # mass and dimensions
-        # self.mref = np.delete(self.mref, idx)
-        self.mass = np.delete(self.mass, idx)
-        self.mmin = np.delete(self.mmin, idx)
-        self.mmax = np.delete(self.mmax, idx)
-        # self.mpyld = np.delete(self.mpyld, idx)
-        self.gw = np.delete(self.gw, idx)
-
-        self.Sref = np.delete(self.Sref, idx)
-
-        # engine
-        self.etype = np.delete(self.etype, idx)
-
-        # flight enveloppe
-        # speeds
-        self.vmto = np.delete(self.vmto, idx)
-        self.vmic = np.delete(self.vmic, idx)
-        self.vmcr = np.delete(self.vmcr, idx)
-        self.vmap = np.delete(self.vmap, idx)
-        self.vmld = np.delete(self.vmld, idx) 
-        self.vmin = np.delete(self.vmin, idx)
-        self.vmo = np.delete(self.vmo, idx)
-        self.mmo = np.delete(self.mmo, idx)
-
-        # altitude
-        self.hmo = np.delete(self.hmo, idx)
-        self.hmax = np.delete(self.hmax, idx)
-        self.hmaxact = np.delete (self.hmaxact, idx)
-        self.maxthr = np.delete(self.maxthr, idx)
-        self.gt = np.delete(self.gt, idx)
-
-        # buffet coefficients
-        self.clbo = np.delete(self.clbo, idx)
-        self.k = np.delete(self.k, idx)
-        self.cm16 = np.delete(self.cm16, idx)
-
-        # reference speeds        
-        # reference CAS
-        self.cascl = np.delete(self.cascl, idx)
-        self.cascr = np.delete(self.cascr, idx)
-        self.casdes = np.delete(self.casdes, idx)
-        self.refcas = np.delete(self.refcas, idx)
-
-        # reference Mach
-        self.macl = np.delete(self.macl, idx)
-        self.macr = np.delete(self.macr, idx)
-        self.mades = np.delete(self.mades, idx)      
-        self.refma = np.delete(self.refma, idx)        
-
-        # reference speed during descent
-        self.vdes = np.delete(self.vdes, idx)
-        self.mdes = np.delete(self.mdes, idx)
-
-        # aerodynamics
-        self.qS = np.delete(self.qS, idx)
-
-        # parasitic drag coefficients per phase
-        self.cd0to = np.delete(self.cd0to, idx)
-        self.cd0ic = np.delete(self.cd0ic, idx)
-        self.cd0cr = np.delete(self.cd0cr, idx)
-        self.cd0ap = np.delete(self.cd0ap, idx)
-        self.cd0ld = np.delete(self.cd0ld, idx)
-        self.gear = np.delete(self.gear, idx)
-
-        # induced drag coefficients per phase
-        self.cd2to = np.delete(self.cd2to, idx)
-        self.cd2ic = np.delete(self.cd2ic, idx)
-        self.cd2cr = np.delete(self.cd2cr, idx)
-        self.cd2ap = np.delete(self.cd2ap, idx)
-        self.cd2ld = np.delete(self.cd2ld, idx)
-
-        # performance        
-        # reduced climb coefficient
-        self.cred = np.delete(self.cred, idx)
-
-        # max climb thrust coefficients
-        self.ctcth1 = np.delete(self.ctcth1, idx) # jet/piston [N], turboprop [ktN]
-        self.ctcth2 = np.delete(self.ctcth2, idx) # [ft]
-        self.ctcth3 = np.delete(self.ctcth3, idx) # jet [1/ft^2], turboprop [N], piston [ktN]
-
-        # 1st and 2nd thrust temp coefficient 
-        self.ctct1 = np.delete(self.ctct1, idx) # [k]
-        self.ctct2 = np.delete(self.ctct2, idx) # [1/k]
-        self.dtemp = np.delete(self.dtemp, idx) # [k]
-
-        # Descent Fuel Flow Coefficients
-        self.ctdesl = np.delete(self.ctdesl, idx)
-        self.ctdesh = np.delete(self.ctdesh, idx)
-        self.ctdesa = np.delete(self.ctdesa, idx)
-        self.ctdesld = np.delete(self.ctdesld, idx)
-
-        # transition altitude for calculation of descent thrust
-        self.hpdes = np.delete(self.hpdes, idx)
-        self.hact = np.delete(self.hact, idx)
-
-        # crossover altitude
-        self.atrans = np.delete(self.atrans, idx)
-        self.ESF = np.delete (self.ESF, idx)
-
-        # flight phase
-        self.phase = np.delete(self.phase, idx)
-        self.bank = np.delete(self.bank, idx)
-
-        # Thrust specific fuel consumption coefficients
-        self.cf1 = np.delete(self.cf1, idx)
-        self.cf2 = np.delete(self.cf2, idx)
-        self.cf3 = np.delete(self.cf3, idx)
-        self.cf4 = np.delete(self.cf4, idx)
-        self.cf5 = np.delete(self.cf5, idx)
-
-        self.Thr = np.delete(self.Thr, idx)
-        self.D = np.delete(self.D, idx)         
-        self.ff = np.delete(self.ff, idx)
-
-        # ground
-        self.tol = np.delete(self.tol, idx)
-        self.ldl = np.delete(self.ldl, idx)
-        self.ws  = np.delete(self.ws, idx)
-        self.len = np.delete(self.len, idx)
-        
+        self.tol[idx] = coeff.tol[self.coeffidx]
+        self.ldl[idx] = coeff.ldl[self.coeffidx]
+        self.ws[idx] = coeff.ws[self.coeffidx]
+        self.len[idx] = coeff.len[self.coeffidx]
         return
 
 
@@ -1045,7 +914,7 @@ class PerfBADA():
         self.ff = np.maximum.reduce([ffto, ffic, ffcc, ffcrl, ffcd, ffap, ffld, ffgd])/60. # convert from kg/min to kg/sec
 
         # update mass
-        self.mass = self.mass - self.ff*self.traf.perfdt # Use fuelflow in kg/min
+        self.mass = self.mass - self.ff*self.traf.sched.dt['PERF'] # Use fuelflow in kg/min
         return
 
     
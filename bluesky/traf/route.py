@@ -1,20 +1,33 @@
 from numpy import *
-from ..tools.aero import ft, kts, g0, nm, cas2tas, tas2cas
+from ..tools.aero import ft, kts, g0, nm, cas2tas, tas2cas, mach2cas
 try:
     from ..tools import cgeo as geo
 except ImportError:
     from ..tools import geo
 from ..tools.misc import degto180
 
+# Row of the waypoint table of traffic, which holds the waypoints of all routes
+# (see Route.wprows and Traffic.updatewptable)
+wpdtype = [('lat', float), ('lon', float), ('alt', float), ('spd', float),
+           ('xtoalt', float), ('toalt', float), ('flyby', float),
+           ('dirfrom', float)]
 
-class Route():
+
+class Route(object):
     """
     Route class definition   : Route data for an aircraft (basic FMS functionality)
 
     addwpt(name,wptype,lat,lon,alt) : Add waypoint (closest to la/lon whene from navdb
+    attach(traf,uid)                : Connect route to aircraft uid of traffic
+    wprows()                        : Waypoints as rows of the waypoint table
 
     For lat/lon waypoints: use call sign as wpname, number will be added
 
+    Once attached, the active waypoint index (iactwp) is stored in traf.iactwp,
+    and changes of the waypoints are reported to traf, which copies them into
+    its waypoint table. This way the FMS switches waypoints of all aircraft
+    at once without calling the route of each aircraft.
+
     Created by  : Jacco M. Hoekstra
     """
 
@@ -26,6 +39,11 @@ class Route():
     calcwp   = 4   # Calculated waypoint (T/C, T/D, A/C)
 
     def __init__(self, navdb):
+        # Traffic object and unique number of the aircraft (see attach)
+        self.traf    = None
+        self.uid     = None
+        self._iactwp = -1
+
         # Add pointer to self navdb object
         self.navdb  = navdb
         self.nwp    = 0
@@ -46,6 +64,52 @@ class Route():
 
         return
 
+    def attach(self, traf, uid):
+        """Connect route to aircraft uid of traf"""
+        iactwp    = self.iactwp
+        self.traf = traf
+        self.uid  = uid
+        self.iactwp = iactwp
+        self.changed()
+
+    def getiactwp(self):
+        if self.uid is not None:
+            idx = self.traf.uids2idx(self.uid)
+            if idx >= 0:
+                self._iactwp = int(self.traf.iactwp[idx])
+        return self._iactwp
+
+    def setiactwp(self, iactwp):
+        self._iactwp = iactwp
+        if self.uid is not None:
+            idx = self.traf.uids2idx(self.uid)
+            if idx >= 0:
+                self.traf.iactwp[idx] = iactwp
+
+    # Index of active waypoint, kept in traf.iactwp when attached
+    iactwp = property(getiactwp, setiactwp)
+
+    def changed(self):
+        """Waypoints changed: traf copies them into its waypoint table"""
+        if self.uid is not None:
+            self.traf.rtechanged.add(self.uid)
+
+    def wprows(self):
+        """Waypoints as rows of the waypoint table (wpdtype)"""
+        rows = zeros(self.nwp, dtype=wpdtype)
+        for name, values, default in [('lat', self.wplat, 0.),
+                                      ('lon', self.wplon, 0.),
+                                      ('alt', self.wpalt, -999.),
+                                      ('spd', self.wpspd, -999.),
+                                      ('xtoalt', getattr(self, 'wpxtoalt', []), 1.),
+                                      ('toalt', getattr(self, 'wptoalt', []), 0.),
+                                      ('flyby', self.wpflyby, 1.),
+                                      ('dirfrom', getattr(self, 'wpdirfrom', []), 0.)]:
+            n = len(values) if len(values) < self.nwp else self.nwp
+            rows[name][:n] = values[:n]
+            rows[name][n:] = default
+        return rows
+
     def addwptStack(self, traf, idx, *args):
         "ADDWPT acid, (wpname/lat,lon),[alt],[spd],[afterwp]"
         if len(args) == 1:
@@ -93,6 +157,7 @@ class Route():
         """Adds waypoint an returns index of waypoint, lat/lon [deg], alt[m]"""
         self.traf = traf  # Traffic object
         self.iac = iac    # a/c to which this route belongs
+        self.changed()
 
         # For safety
         self.nwp = len(self.wplat)
@@ -396,6 +461,7 @@ class Route():
         if idx == -1:
             return False, "Waypoint " + delwpname + " not found"
 
+        self.changed()
         self.nwp = self.nwp-1
         del self.wpname[idx]
         del self.wplat[idx]
@@ -555,6 +621,7 @@ class Route():
         self.wpalt.insert(i,-999.)
         self.wpspd.insert(i,-999.)
         self.wptype.insert(i,self.calcwp)
+        self.changed()
         return          
 
 
@@ -562,6 +629,7 @@ class Route():
         """Do flight plan calculations"""
         self.delwpt("T/D")
         self.delwpt("T/C")
+        self.changed()
 
         # Direction to waypoint
         self.nwp = len(self.wpname)
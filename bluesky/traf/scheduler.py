@@ -0,0 +1,110 @@
+from math import ceil
+
+
+class Scheduler:
+    """
+    Scheduler class definition : update rates of traffic sub-models
+
+    Sub-models that do not need an update every simulation step (FMS, ASAS,
+    performance, area check) register a task with an update interval dt and a
+    phase offset. Different phase offsets let the tasks run in different
+    simulation steps, instead of all in the same step.
+
+    A task that works per aircraft can also be split over nsplit subsets of
+    the aircraft: it then runs nsplit times per interval, each time for the
+    next subset (every nsplit-th aircraft), which spreads the work evenly
+    over the simulation steps.
+
+    Methods:
+        Scheduler()                 : constructor
+        add(name,dt,phase,cansplit) : register a task
+        due(name,simt)              : when task is due, returns the aircraft to
+                                      update (a slice), otherwise None
+        setrate(name,dt,phase,nsplit): change update rate of task (SCHED command)
+    """
+
+    eps = 1e-6  # [s] margin for rounding errors in the simulation time
+
+    def __init__(self):
+        self.names    = []   # task names in order of registration
+        self.dt       = {}   # [s] update interval per task
+        self.phase    = {}   # [s] phase offset per task
+        self.nsplit   = {}   # number of aircraft subsets per task
+        self.cansplit = {}   # whether task can be split over aircraft subsets
+        self.isplit   = {}   # next aircraft subset per task
+        self.t0       = {}   # [s] last time task was called
+        self.tnext    = {}   # [s] next time task is due
+
+    def add(self, name, dt, phase=0., cansplit=False):
+        """Register a task with update interval dt and phase offset [s]"""
+        self.names.append(name)
+        self.dt[name]       = dt
+        self.phase[name]    = phase
+        self.nsplit[name]   = 1
+        self.cansplit[name] = cansplit
+        self.isplit[name]   = 0
+        self.t0[name]       = float('-inf')
+        self.tnext[name]    = phase
+
+    def due(self, name, simt):
+        """Check whether task is due, returns the aircraft to update or None"""
+        # Restart when the simulation time went back (e.g. after a reset)
+        if simt < self.t0[name]:
+            self.t0[name]     = float('-inf')
+            self.tnext[name]  = simt
+            self.isplit[name] = 0
+
+        if simt < self.tnext[name] - self.eps:
+            return None
+
+        # Next time: keep the fixed rate, but do not try to catch up
+        interval = self.dt[name] / self.nsplit[name]
+        self.t0[name] = simt
+        self.tnext[name] = self.tnext[name] + interval
+        if self.tnext[name] <= simt:
+            self.tnext[name] = simt + interval
+
+        isplit = self.isplit[name]
+        self.isplit[name] = (isplit + 1) % self.nsplit[name]
+        return slice(isplit, None, self.nsplit[name])
+
+    def setrate(self, name=None, dt=None, phase=None, nsplit=None):
+        """SCHED command: show or change update interval, phase and number of
+           aircraft subsets of a task"""
+        if name is None:
+            return True, "\n".join([self.info(nm) for nm in self.names])
+
+        name = name.upper()
+        if name not in self.dt:
+            return False, "Unknown task " + name + \
+                          ", use one of " + ", ".join(self.names)
+
+        if dt is None:
+            return True, self.info(name)
+
+        if dt <= 0.:
+            return False, "Update interval should be larger than zero"
+
+        if nsplit is not None and nsplit != 1 and not self.cansplit[name]:
+            return False, name + " can not be split over aircraft subsets"
+
+        self.dt[name] = dt
+        if phase is not None:
+            self.phase[name] = phase
+        if nsplit is not None:
+            self.nsplit[name] = max(1, nsplit)
+            self.isplit[name] = 0
+
+        # Next time this task is due, with the new rate and phase
+        interval = self.dt[name] / self.nsplit[name]
+        if self.t0[name] == float('-inf'):
+            self.tnext[name] = self.phase[name]
+        else:
+            n = ceil((self.t0[name] - self.phase[name]) / interval + self.eps)
+            self.tnext[name] = self.phase[name] + max(n, 0.) * interval
+
+        return True, self.info(name)
+
+    def info(self, name):
+        return "%s: dt = %g s, phase = %g s, subsets = %d" % \
+               (name, self.dt[name], self.phase[name], self.nsplit[name])
@@ -0,0 +1,163 @@
+import numpy as np
+
+
+class TrafArrays:
+    """
+    TrafArrays class definition : Registry and storage of per-aircraft data
+
+    Traffic and its sub-models (performance, ASAS, ...) register their
+    per-aircraft variables here, together with a type and a default value.
+    Creating, deleting and resetting aircraft is then done by this registry
+    for all variables at once, so a new variable only needs to be registered.
+
+    Numpy columns live in a buffer with spare capacity. The owner object only
+    sees the first n elements of each buffer as a normal numpy array (a view),
+    so creating an aircraft does not copy all arrays: the buffers are only
+    reallocated (doubled in size) when the capacity is exhausted.
+
+    Code elsewhere regularly replaces a column with a new array of the same
+    length (e.g. traf.lat = traf.lat + dlat). Such columns are copied back
+    into their buffer before the number of aircraft changes.
+
+    Columns registered with dtype float get the floating point type of the
+    registry (floattype), so the precision of the traffic state can be chosen
+    in one place. Columns that need double precision (positions, times)
+    are registered with dtype np.float64.
+
+    Methods:
+        TrafArrays(owner,floattype) : constructor
+        add(owner,name,dtype,default): register numpy column owner.name
+        addlist(owner,name,default) : register list owner.name, default can be a
+                                      function returning a new object per aircraft
+        grow(count)                 : add count aircraft with default values to
+                                      all variables, returns first index
+        delete(idx)                 : remove aircraft idx (index or array of
+                                      indices) from all variables
+    """
+
+    mincapacity = 64  # [-] initial size of the buffers
+
+    def __init__(self, owner, floattype=np.float64):
+        self.owner    = owner
+        self.floattype = floattype  # type of columns registered as float
+        self.n        = 0   # number of aircraft in use
+        self.capacity = 0   # number of aircraft allocated
+
+        # Numpy columns: owner, name and default per column
+        self.columns  = []
+        self.buffers  = []  # allocated array per column
+        self.views    = []  # array handed out to the owner per column
+
+        # List variables: owner, name and default per list
+        self.lists    = []
+
+    def add(self, owner, name, dtype=float, default=0.):
+        """Register a per-aircraft numpy array, which becomes owner.name"""
+        if dtype is float:
+            dtype = self.floattype
+        buf = np.zeros(self.capacity, dtype=dtype)
+        buf[:self.n] = default
+
+        i = self.find(self.columns, owner, name)
+        if i < 0:
+            self.columns.append((owner, name, default))
+            self.buffers.append(buf)
+            self.views.append(None)
+            i = len(self.columns) - 1
+        else:
+            self.columns[i] = (owner, name, default)
+            self.buffers[i] = buf
+
+        self.setview(i)
+
+    def addlist(self, owner, name, default=None):
+        """Register a per-aircraft list, which becomes owner.name"""
+        i = self.find(self.lists, owner, name)
+        if i < 0:
+            self.lists.append((owner, name, default))
+        else:
+            self.lists[i] = (owner, name, default)
+
+        setattr(owner, name, [self.newitem(default) for j in xrange(self.n)])
+
+    def find(self, registered, owner, name):
+        for i, (o, nm, default) in enumerate(registered):
+            if o is owner and nm == name:
+                return i
+        return -1
+
+    def newitem(self, default):
+        return default() if callable(default) else default
+
+    def setview(self, i):
+        owner, name, default = self.columns[i]
+        view = self.buffers[i][:self.n]
+        self.views[i] = view
+        setattr(owner, name, view)
+
+    def sync(self):
+        """Copy columns that have been replaced by their owner into the buffer"""
+        for i, (owner, name, default) in enumerate(self.columns):
+            arr = getattr(owner, name)
+            if arr is not self.views[i]:
+                self.buffers[i][:self.n] = arr
+                self.setview(i)
+
+    def grow(self, count=1):
+        """Add count aircraft with default values, returns index of the first one"""
+        self.sync()
+        start = self.n
+        n     = start + count
+
+        # Double the buffers when they are full
+        if n > self.capacity:
+            capacity = max(self.capacity, self.mincapacity)
+            while capacity < n:
+                capacity = 2 * capacity
+
+            for i, old in enumerate(self.buffers):
+                buf = np.empty(capacity, dtype=old.dtype)
+                buf[:start] = old[:start]
+                self.buffers[i] = buf
+
+            self.capacity = capacity
+
+        self.n = n
+        for i, (owner, name, default) in enumerate(self.columns):
+            self.buffers[i][start:n] = default
+            self.setview(i)
+
+        for owner, name, default in self.lists:
+            getattr(owner, name).extend([self.newitem(default) for j in xrange(count)])
+
+        return start
+
+    def delete(self, idx):
+        """Remove aircraft idx (an index or an array of indices) from all
+           variables, keeping the order of the others. All columns are
+           compacted once, also when many aircraft are removed."""
+        self.sync()
+        if np.ndim(idx) == 0:
+            for buf in self.buffers:
+                buf[idx:self.n - 1] = buf[idx + 1:self.n]
+
+            for owner, name, default in self.lists:
+                del getattr(owner, name)[idx]
+
+            self.n = self.n - 1
+
+        else:
+            keep = np.ones(self.n, dtype=bool)
+            keep[idx] = False
+            n = np.count_nonzero(keep)
+            for buf in self.buffers:
+                buf[:n] = buf[:self.n][keep]
+
+            for owner, name, default in self.lists:
+                items = getattr(owner, name)
+                items[:] = [item for item, k in zip(items, keep) if k]
+
+            self.n = n
+
+        for i in xrange(len(self.columns)):
+            self.setview(i)
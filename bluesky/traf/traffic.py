@@ -1,19 +1,22 @@
 import numpy as np
 from math import *
-from random import random, randint
-from ..tools.aero import fpm, kts, ft, nm, g0,  tas2eas, tas2mach, tas2cas, mach2tas,  \
+from random import randint
+from ..tools.aero import fpm, kts, ft, nm, g0, tas2cas, mach2tas, \
                          mach2cas, cas2tas, cas2mach, Rearth, vatmos, \
-                         vcas2tas, vtas2cas,  vtas2mach, vcas2mach, vmach2tas
+                         vcas2tas, vtas2cas,  vtas2mach, vcas2mach, vmach2tas, \
+                         vtas2eas, vmach2cas
 try:
     from ..tools import cgeo as geo
 except ImportError:
     from ..tools import geo
 from ..tools.misc import degto180
 
-from route import Route
+from route import Route, wpdtype
 from params import Trails
 from adsbmodel import ADSBModel
 from asas import Dbconf
+from trafarrays import TrafArrays
+from scheduler import Scheduler
 from .. import settings
 
 try:
@@ -42,6 +45,8 @@ class Traffic:
         deletall()           : delete all traffic
         update(sim)          : do a numerical integration step
         id2idx(name)         : return index in traffic database of given call sign
+        ids2idx(names)       : return array of indices of a list of call signs
+        uids2idx(uids)       : return array of indices of unique aircraft numbers
         selhdg(i,hdg)        : set autopilot heading and activate heading select mode
         selspd(i,spd)        : set autopilot CAS/Mach and activate heading select mode
 
@@ -64,6 +69,22 @@ class Traffic:
     def reset(self, navdb):
         self.dts = []
         self.ntraf = 0
+        self.idindex = {}  # index in traffic arrays per call sign, see id2idx
+        self.nextuid = 0   # unique number of the next created aircraft
+
+        # Traffic list & arrays definition
+        # All per-aircraft data is registered in self.arrays with a default
+        # value, which takes care of creating and deleting aircraft for all of
+        # them. Per-aircraft numpy arrays: self.arrays.add(self, name, dtype, default)
+        # Per-aircraft lists: self.arrays.addlist(self, name, default)
+        # In mixed precision mode, arrays registered as float are float32, so
+        # positions, altitudes (also selected ones) and times are registered
+        # as np.float64 explicitly.
+        self.ftype  = np.float32 if settings.traf_precision == 'mixed' \
+                                 else np.float64
+        self.arrays = TrafArrays(self, self.ftype)
+        add     = self.arrays.add
+        addlist = self.arrays.addlist
 
         #  model-specific parameters.
         # Default: BlueSky internal performance model.
@@ -72,136 +93,122 @@ class Traffic:
 
         self.perf = Perf(self)
 
-        self.dts = []
-
-        self.ntraf = 0
-
-        # Traffic list & arrays definition
-
-        # !!!IMPORTANT NOTE!!!
-        # Any variables added here should also be added in the Traffic
-        # methods self.create() (append) and self.delete() (delete)
-        # which can be found directly below __init__
-
         # Traffic basic flight data
-
-        # Traffic basic flight data
-        self.id     = []  # identifier (string)
-        self.type   = []  # aircaft type (string)
-        self.lat    = np.array([])  # latitude [deg]
-        self.lon    = np.array([])  # longitude [deg]
-        self.trk    = np.array([])  # track angle [deg]
-        self.tas    = np.array([])  # true airspeed [m/s]
-        self.gs     = np.array([])  # ground speed [m/s]
-        self.cas    = np.array([])  # calibrated airspeed [m/s]
-        self.M      = np.array([])  # mach number
-        self.alt    = np.array([])  # altitude [m]
-        self.fll    = np.array([])  # flight level [ft/100]
-        self.vs     = np.array([])  # vertical speed [m/s]
-        self.p      = np.array([])  # atmospheric air pressure [N/m2]
-        self.rho    = np.array([])  # atmospheric air density [kg/m3]
-        self.Temp   = np.array([])  # atmospheric air temperature [K]
-        self.dtemp  = np.array([])  # delta t for non-ISA conditions
-
-        # Traffic performance data
-        self.avsdef = np.array([])  # [m/s]default vertical speed of autopilot
-        self.aphi   = np.array([])  # [rad] bank angle setting of autopilot
-        self.ax     = np.array([])  # [m/s2] absolute value of longitudinal accelleration
-        self.bank   = np.array([])  # nominal bank angle, [radian]
-        self.bphase = np.array([])  # standard bank angles per phase
-        self.hdgsel = np.array([])  # determines whether aircraft is turning
+        addlist(self, 'id', '')             # identifier (string)
+        addlist(self, 'type', '')           # aircaft type (string)
+        add(self, 'uid', int, -1)           # unique number, not reused after deletion (see uids2idx)
+        add(self, 'lat', np.float64)        # latitude [deg]
+        add(self, 'lon', np.float64)        # longitude [deg]
+        add(self, 'trk')                    # track angle [deg]
+        add(self, 'tas')                    # true airspeed [m/s]
+        add(self, 'gs')                     # ground speed [m/s]
+        add(self, 'cas')                    # calibrated airspeed [m/s]
+        add(self, 'M')                      # mach number
+        add(self, 'alt', np.float64)        # altitude [m]
+        add(self, 'fll')                    # flight level [ft/100]
+        add(self, 'vs')                     # vertical speed [m/s]
+        add(self, 'p')                      # atmospheric air pressure [N/m2]
+        add(self, 'rho')                    # atmospheric air density [kg/m3]
+        add(self, 'Temp')                   # atmospheric air temperature [K]
+        add(self, 'dtemp')                  # delta t for non-ISA conditions (at the moment just ISA)
+
+        # Traffic performance data (temporarily default values)
+        add(self, 'avsdef', float, 1500. * fpm)  # [m/s]default vertical speed of autopilot
+        add(self, 'aphi', float, radians(25.))   # [rad] bank angle setting of autopilot
+        add(self, 'ax', float, kts)         # [m/s2] absolute value of longitudinal accelleration
+        add(self, 'bank', float, radians(25.))   # nominal bank angle, [radian]
+        add(self, 'hdgsel', bool, False)    # determines whether aircraft is turning
+        self.bphase = np.deg2rad(np.array([15, 35, 35, 35, 15, 45]))  # standard bank angles per phase
 
         # Help variables to save computation time
-        self.coslat = np.array([])  # Cosine of latitude for flat-earth aproximations
+        add(self, 'coslat')                 # Cosine of latitude for flat-earth aproximations
 
         # Crossover altitude
-        self.abco   = np.array([])
-        self.belco  = np.array([])
+        add(self, 'abco', float, 0.)
+        add(self, 'belco', float, 1.)
 
         # Traffic autopilot settings
-        self.ahdg   = []  # selected heading [deg]
-        self.aspd   = []  # selected spd(CAS) [m/s]
-        self.aptas  = []  # just for initializing
-        self.ama    = []  # selected spd above crossover altitude (Mach) [-]
-        self.aalt   = []  # selected alt[m]
-        self.afll   = []  # selected fl [ft/100]
-        self.avs    = []  # selected vertical speed [m/s]
-
-        # limit settings
-        self.lspd   = []  # limit speed
-        self.lalt   = []  # limit altitude
-        self.lvs    = []  # limit vertical speed due to thrust limitation
+        add(self, 'ahdg')                   # selected heading [deg]
+        add(self, 'aspd')                   # selected spd(CAS) [m/s]
+        add(self, 'aptas')                  # just for initializing
+        add(self, 'ama')                    # selected spd above crossover altitude (Mach) [-]
+        add(self, 'aalt', np.float64)       # selected alt[m]
+        add(self, 'afll')                   # selected fl [ft/100]
+        add(self, 'avs')                    # selected vertical speed [m/s]
+
+        # limit settings: initialize with 0
+        add(self, 'lspd')                   # limit speed
+        add(self, 'lalt', np.float64)       # limit altitude
+        add(self, 'lvs')                    # limit vertical speed due to thrust limitation
 
         # Traffic navigation information
-        self.orig   = []  # Four letter code of origin airport
-        self.dest   = []  # Four letter code of destination airport
+        addlist(self, 'orig', '')           # Four letter code of origin airport
+        addlist(self, 'dest', '')           # Four letter code of destination airport
 
         # LNAV route navigation
-        self.swlnav = np.array([])  # Lateral (HDG) based on nav?
-        self.swvnav = np.array([])  # Vertical/longitudinal (ALT+SPD) based on nav info
-
-        self.actwplat  = np.array([])  # Active WP latitude
-        self.actwplon  = np.array([])  # Active WP longitude
-        self.actwpalt  = np.array([])  # Active WP altitude to arrive at
-        self.actwpspd  = np.array([])  # Active WP speed
-        self.actwpturn = np.array([])  # Distance when to turn to next waypoint
-        self.actwpflyby = np.array([])  # Distance when to turn to next waypoint
-      
+        add(self, 'swlnav', bool, False)    # Lateral (HDG) based on nav?
+        add(self, 'swvnav', bool, False)    # Vertical/longitudinal (ALT+SPD) based on nav info
+
+        add(self, 'actwplat', np.float64, 89.99) # Active WP latitude
+        add(self, 'actwplon', np.float64)   # Active WP longitude
+        add(self, 'actwpalt', np.float64)   # Active WP altitude to arrive at
+        add(self, 'actwpspd', float, -999.) # Active WP speed
+        add(self, 'actwpturn', float, 1.)   # Distance when to turn to next waypoint
+        add(self, 'actwpflyby', float, 1.)  # Flyby/fly-over switch
 
         # VNAV variablescruise level
-        self.crzalt  = np.array([])    # Cruise altitude[m]
-        self.dist2vs = np.array([])    # Distance to start V/S of VANAV
-        self.actwpvs = np.array([])    # Actual V/S to use
-
-        # Route info
-        self.route = []
-
-        # ASAS info per aircraft:
-        self.iconf      = []            # index in 'conflicting' aircraft database
-        self.asasactive = np.array([])  # whether the autopilot follows ASAS or not
-        self.asashdg    = np.array([])  # heading provided by the ASAS [deg]
-        self.asasspd    = np.array([])  # speed provided by the ASAS (eas) [m/s]
-        self.asasalt    = np.array([])  # speed alt by the ASAS [m]
-        self.asasvsp    = np.array([])  # speed vspeed by the ASAS [m/s]
-
-        self.desalt     = np.array([])  # desired altitude [m]
-        self.deshdg     = np.array([])  # desired heading
-        self.desvs      = np.array([])  # desired vertical speed [m/s]
-        self.desspd     = np.array([])  # desired speed [m/s]
+        add(self, 'crzalt', np.float64, -999.) # Cruise altitude[m] <0=None
+        add(self, 'dist2vs', float, -999.)  # Distance to start V/S of VANAV
+        add(self, 'actwpvs')                # Actual V/S to use
+        add(self, 'swvnavvs')               # Switch whether to follow VNAV V/S and altitude
+
+        # Route info: empty route connected with nav database
+        addlist(self, 'route', lambda: Route(self.navdb))
+        add(self, 'iactwp', int, -1)        # Index of active waypoint in route
+        add(self, 'rtewp0', int, 0)         # First row of route in waypoint table
+        add(self, 'rtenwp', int, 0)         # Number of waypoints in waypoint table
+
+        # Desired values
+        add(self, 'desalt', np.float64)     # desired altitude [m]
+        add(self, 'deshdg')                 # desired heading
+        add(self, 'desvs')                  # desired vertical speed [m/s]
+        add(self, 'desspd')                 # desired speed [m/s]
 
         # Display information on label
-        self.label      = []  # Text and bitmap of traffic label
-        self.trailcol   = []  # Trail color: default 'Blue'
+        addlist(self, 'label', lambda: ['', '', '', 0])  # Text and bitmap of traffic label
 
         # Transmitted data to other aircraft due to truncated effect
-        self.adsbtime   = np.array([])
-        self.adsblat    = np.array([])
-        self.adsblon    = np.array([])
-        self.adsbalt    = np.array([])
-        self.adsbtrk    = np.array([])
-        self.adsbtas    = np.array([])
-        self.adsbgs     = np.array([])
-        self.adsbvs     = np.array([])
-
-        self.inconflict = np.array([], dtype=bool)
+        add(self, 'adsbtime', np.float64)
+        add(self, 'adsblat', np.float64)
+        add(self, 'adsblon', np.float64)
+        add(self, 'adsbalt', np.float64)
+        add(self, 'adsbtrk')
+        add(self, 'adsbtas')
+        add(self, 'adsbgs')
+        add(self, 'adsbvs')
 
         #-----------------------------------------------------------------------------
         # Not per aircraft data
 
-        # Scheduling of FMS and ASAS
-        self.t0fms = -999.  # last time fms was called
-        self.dtfms = 1.00  # interval for fms
+        # Scheduling of sub-models: update interval and phase offset [s]
+        # (FMS and AREA check can also be split over aircraft subsets)
+        self.sched = Scheduler()
+        self.sched.add('FMS', 1.0, 0.0, cansplit=True)
+        self.sched.add('ASAS', 1.0, 0.5)
+        self.sched.add('PERF', 0.1)             # performance limits
+        self.sched.add('AREA', 5.0, 0.25, cansplit=True)
+
+        # Waypoint table: waypoints of all routes, copied from routes that
+        # changed (rtechanged: uids) when the FMS needs them
+        self.wptable    = np.zeros(64, dtype=wpdtype)
+        self.nwptable   = 0
+        self.rtechanged = set()
 
-        self.t0asas = -999.  # last time ASAS was called
-        self.dtasas = 1.00  # interval for ASAS
-        
         # Layers settings
         self.swlayer = False
         self.layerconcept = ''
 
-        # Flight performance scheduling
-        self.perfdt = 0.1           # [s] update interval of performance limits
-        self.perft0 = -self.perfdt  # [s] last time checked (in terms of simt)
+        # Flight performance
         self.warned2 = False        # Flag: Did we warn for default engine parameters yet?
 
         # ADS-B transmission-receiver model
@@ -220,11 +227,9 @@ class Traffic:
         self.arealon0  = 0.0  # [deg] lower longitude defining area
         self.arealon1  = 0.0  # [deg] upper longitude defining area
         self.areafloor = -999999.0  # [m] Delete when descending through this h
-        self.areadt    = 5.0  # [s] frequency of area check (simtime)
-        self.areat0    = -100.  # last time checked
         self.arearadius    = 100.0 # [NM] radius of experiment area if it is a circle
 
-        self.inside = []
+        addlist(self, 'inside', False)  # set to False to avoid deletion upon creation outside
         self.fir_circle_point = (0.0, 0.0)
         self.fir_circle_radius = 1.0
         
@@ -238,16 +243,30 @@ class Traffic:
         self.area = ""
 
         # Bread crumbs for trails
-        self.lastlat  = []
-        self.lastlon  = []
-        self.lasttim  = []
+        add(self, 'lastlat', np.float64)
+        add(self, 'lastlon', np.float64)
+        add(self, 'lasttim', np.float64)
         self.trails   = Trails()
+        addlist(self, 'trailcol', self.trails.defcolor)  # Trail color: default 'Blue'
         self.swtrails = False  # Default switched off
 
         # Noise (turbulence, ADBS-transmission noise, ADSB-truncated effect)
         self.setNoise(False)
 
-        self.eps = np.array([])
+        add(self, 'eps', float, 0.01)
+
+        # Autopilot and kinematics in place: scratch arrays for intermediate results
+        self.inplace = settings.inplace_kinematics
+        add(self, 'delspd')                 # speed difference with desired speed [m/s]
+        add(self, 'delalt', np.float64)     # altitude difference with selected altitude [m]
+        if self.inplace:
+            add(self, 'tmp0')
+            add(self, 'tmp1')
+            add(self, 'tmp2')
+            add(self, 'tmp3')
+            add(self, 'swtmp0', bool, False)
+            add(self, 'swtmp1', bool, False)
+            add(self, 'swtmp2', bool, False)
 
         return
 
@@ -257,152 +276,115 @@ class Traffic:
         if actype is None:
             actype = 'B744'
 
-        for i in xrange(count):
-            acid  = idbase + '%05d' % i
-            aclat = random() * (area[1] - area[0]) + area[0]
-            aclon = random() * (area[3] - area[2]) + area[2]
-            achdg = float(randint(1, 360))
-            acalt = (randint(2000, 39000) * ft) if alt is None else alt
-            acspd = (randint(250, 450) * kts) if spd is None else spd
+        acid  = [idbase + '%05d' % i for i in xrange(count)]
+        aclat = np.random.rand(count) * (area[1] - area[0]) + area[0]
+        aclon = np.random.rand(count) * (area[3] - area[2]) + area[2]
+        achdg = np.random.randint(1, 361, count).astype(float)
+        acalt = (np.random.randint(2000, 39001, count) * ft) if alt is None else count * [alt]
+        acspd = (np.random.randint(250, 451, count) * kts) if spd is None else count * [spd]
 
-            self.create(acid, actype, aclat, aclon, achdg, acalt, acspd)
+        return self.create_batch(acid, count * [actype], aclat, aclon, achdg, acalt, acspd)
 
     def create(self, acid, actype, aclat, aclon, achdg, acalt, casmach):
         """Create an aircraft"""
-        # Check if not already exist
-        if self.id.count(acid.upper()) > 0:
-            return False, acid + " already exists."  # already exists do nothing
-
-        # Increase number of aircraft
-        self.ntraf = self.ntraf + 1
-
-        # Convert speed
-        if 0.1 < casmach < 1.0 :
-            acspd = mach2tas(casmach, acalt)
-        else:
-            acspd = cas2tas(casmach * kts, acalt)
-
-        # Process input
-        self.id.append(acid.upper())
-        self.type.append(actype)
-        self.lat   = np.append(self.lat, aclat)
-        self.lon   = np.append(self.lon, aclon)
-        self.trk   = np.append(self.trk, achdg)  # TBD: add conversion hdg => trk
-        self.alt   = np.append(self.alt, acalt)
-        self.fll   = np.append(self.fll, (acalt)/(100 * ft))
-        self.vs    = np.append(self.vs, 0.)
-        c_temp, c_rho, c_p = vatmos(acalt)
-        self.p     = np.append(self.p, c_p)
-        self.rho   = np.append(self.rho, c_rho)
-        self.Temp  = np.append(self.Temp, c_temp)
-        self.dtemp = np.append(self.dtemp, 0)  # at the moment just ISA conditions
-        self.tas   = np.append(self.tas, acspd)
-        self.gs    = np.append(self.gs, acspd)
-        self.cas   = np.append(self.cas, tas2cas(acspd, acalt))
-        self.M     = np.append(self.M, tas2mach(acspd, acalt))
-
-        # AC is initialized with neutral max bank angle
-        self.bank = np.append(self.bank, radians(25.))
-        if self.ntraf < 2:
-            self.bphase = np.deg2rad(np.array([15, 35, 35, 35, 15, 45]))
-        self.hdgsel = np.append(self.hdgsel, False)
-
-        #------------------------------Performance data--------------------------------
-        # Type specific data
-        #(temporarily default values)
-        self.avsdef = np.append(self.avsdef, 1500. * fpm)  # default vertical speed of autopilot
-        self.aphi   = np.append(self.aphi, radians(25.))  # bank angle setting of autopilot
-        self.ax     = np.append(self.ax, kts)  # absolute value of longitudinal accelleration
-
-        # Crossover altitude
-        self.abco   = np.append(self.abco, 0)
-        self.belco  = np.append(self.belco, 1)
-
-        # performance data
-        self.perf.create(actype)
-
-        # Traffic autopilot settings: hdg[deg], spd (CAS,m/s), alt[m], vspd[m/s]
-        self.ahdg = np.append(self.ahdg, achdg)  # selected heading [deg]
-        self.aspd = np.append(self.aspd, tas2cas(acspd, acalt))  # selected spd(cas) [m/s]
-        self.aptas = np.append(self.aptas, acspd) # [m/s]
-        self.ama  = np.append(self.ama, 0.) # selected spd above crossover (Mach) [-]
-        self.aalt = np.append(self.aalt, acalt)  # selected alt[m]
-        self.afll = np.append(self.afll, (acalt/(100 * ft))) # selected fl[ft/100]
-        self.avs = np.append(self.avs, 0.)  # selected vertical speed [m/s]
-        
-        # limit settings: initialize with 0
-        self.lspd = np.append(self.lspd, 0.0)
-        self.lalt = np.append(self.lalt, 0.0)
-        self.lvs = np.append(self.lvs, 0.0)
-
-        # Help variables to save computation time
-        self.coslat = np.append(self.coslat,cos(radians(aclat)))  # Cosine of latitude for flat-earth aproximations
-
-        # Traffic navigation information
-        self.dest.append("")
-        self.orig.append("")
-
-        # LNAV route navigation
-        self.swlnav = np.append(self.swlnav, False)  # Lateral (HDG) based on nav
-        self.swvnav = np.append(self.swvnav, False)  # Vertical/longitudinal (ALT+SPD) based on nav info
-
-        self.actwplat  = np.append(self.actwplat, 89.99)  # Active WP latitude
-        self.actwplon  = np.append(self.actwplon, 0.0)   # Active WP longitude
-        self.actwpalt  = np.append(self.actwpalt, 0.0)   # Active WP altitude
-        self.actwpspd  = np.append(self.actwpspd, -999.)   # Active WP speed
-        self.actwpturn = np.append(self.actwpturn, 1.0)   # Distance to active waypoint where to turn
-        self.actwpflyby = np.append(self.actwpflyby, 1.0)   # Flyby/fly-over switch
-
-        # VNAV cruise level
-        self.crzalt = np.append(self.crzalt,-999.) # Cruise altitude[m] <0=None
-        self.dist2vs = np.append(self.dist2vs,-999.)  # Distance to start V/S of VANAV
-        self.actwpvs = np.append(self.actwpvs,0.0)    # Actual V/S to use then
-
-        # Route info
-        self.route.append(Route(self.navdb))  # create empty route connected with nav databse
-
-        eas = tas2eas(acspd, acalt)
-
-        # ASAS info: no conflict => -1
-        self.iconf.append(-1)  # index in 'conflicting' aircraft database
-
-        # ASAS output commanded values
-        self.asasactive = np.append(self.asasactive, False)
-        self.asashdg = np.append(self.asashdg, achdg)
-        self.asasspd = np.append(self.asasspd, eas)
-        self.asasalt = np.append(self.asasalt, acalt)
-        self.asasvsp = np.append(self.asasvsp, 0.)
-
-        self.desalt  = np.append(self.desalt, acalt)
-        self.desvs   = np.append(self.desvs, 0.0)
-        self.desspd  = np.append(self.desspd, eas)
-        self.deshdg  = np.append(self.deshdg, achdg)
-
-        # Area variable set to False to avoid deletion upon creation outside
-        self.inside.append(False)
-
-        # Display information on label
-        self.label.append(['', '', '', 0])
-
-        # Bread crumbs for trails
-        self.trailcol.append(self.trails.defcolor)
-        self.lastlat = np.append(self.lastlat, aclat)
-        self.lastlon = np.append(self.lastlon, aclon)
-        self.lasttim = np.append(self.lasttim, 0.0)
-
-        # Transmitted data to other aircraft due to truncated effect
-        self.adsbtime=np.append(self.adsbtime,np.random.rand(self.trunctime))
-        self.adsblat=np.append(self.adsblat,aclat)
-        self.adsblon=np.append(self.adsblon,aclon)
-        self.adsbalt=np.append(self.adsbalt,acalt)
-        self.adsbtrk=np.append(self.adsbtrk,achdg)
-        self.adsbtas=np.append(self.adsbtas,acspd)
-        self.adsbgs=np.append(self.adsbgs,acspd)
-        self.adsbvs=np.append(self.adsbvs,0.)
-
-        self.inconflict=np.append(self.inconflict,False)        
+        return self.create_batch([acid], [actype], [aclat], [aclon], [achdg],
+                                 [acalt], [casmach])
+
+    def create_batch(self, acids, actypes, aclats, aclons, achdgs, acalts, casmachs):
+        """Create multiple aircraft at once, arguments are lists/arrays
+           with one element per aircraft (see create)"""
+        # Skip aircraft that already exist (or are given twice)
+        acids    = [acid.upper() for acid in acids]
+        existing = set(self.idindex)
+        icreate  = []
+        skipped  = []
+        for i, acid in enumerate(acids):
+            if acid in existing:
+                skipped.append(acid)
+            else:
+                existing.add(acid)
+                icreate.append(i)
+
+        count = len(icreate)
+        if count > 0:
+            acid    = [acids[i] for i in icreate]
+            actype  = np.array(actypes)[icreate]
+            aclat   = np.array(aclats, dtype=float)[icreate]
+            aclon   = np.array(aclons, dtype=float)[icreate]
+            achdg   = np.array(achdgs, dtype=float)[icreate]
+            acalt   = np.array(acalts, dtype=float)[icreate]
+            casmach = np.array(casmachs, dtype=float)[icreate]
+
+            # Increase number of aircraft: add defaults to all registered variables
+            n0  = self.arrays.grow(count)
+            idx = np.arange(n0, n0 + count)
+            new = slice(n0, n0 + count)
+            self.ntraf = self.ntraf + count
 
-        self.eps = np.append(self.eps, 0.01)
+            # Convert speed
+            ismach = (0.1 < casmach) * (casmach < 1.0)
+            acspd  = np.where(ismach, vmach2tas(casmach, acalt),
+                                      vcas2tas(casmach * kts, acalt))
+
+            # Process input
+            self.id[new]    = acid
+            self.idindex.update(zip(acid, xrange(n0, n0 + count)))
+            self.uid[new]   = np.arange(self.nextuid, self.nextuid + count)
+            self.nextuid    = self.nextuid + count
+            for i in idx:
+                self.route[i].attach(self, int(self.uid[i]))
+            self.type[new]  = list(actype)
+            self.lat[new]   = aclat
+            self.lon[new]   = aclon
+            self.trk[new]   = achdg  # TBD: add conversion hdg => trk
+            self.alt[new]   = acalt
+            self.fll[new]   = (acalt)/(100 * ft)
+            self.p[new], self.rho[new], self.Temp[new] = vatmos(acalt)
+            self.tas[new]   = acspd
+            self.gs[new]    = acspd
+            self.cas[new]   = vtas2cas(acspd, acalt)
+            self.M[new]     = vtas2mach(acspd, acalt)
+
+            # performance data: one coefficient lookup per aircraft type
+            for typ in np.unique(actype):
+                self.perf.create(typ, idx[actype == typ])
+
+            # Traffic autopilot settings: hdg[deg], spd (CAS,m/s), alt[m], vspd[m/s]
+            self.ahdg[new]  = achdg  # selected heading [deg]
+            self.aspd[new]  = self.cas[new]  # selected spd(cas) [m/s]
+            self.aptas[new] = acspd # [m/s]
+            self.aalt[new]  = acalt  # selected alt[m]
+            self.afll[new]  = (acalt/(100 * ft)) # selected fl[ft/100]
+
+            # Help variables to save computation time
+            self.coslat[new] = np.cos(np.radians(aclat))  # Cosine of latitude for flat-earth aproximations
+
+            eas = vtas2eas(acspd, acalt)
+
+            # ASAS output commanded values
+            self.asashdg[new] = achdg
+            self.asasspd[new] = eas
+            self.asasalt[new] = acalt
+
+            self.desalt[new]  = acalt
+            self.desspd[new]  = eas
+            self.deshdg[new]  = achdg
+
+            # Bread crumbs for trails
+            self.lastlat[new] = aclat
+            self.lastlon[new] = aclon
+
+            # Transmitted data to other aircraft due to truncated effect
+            self.adsbtime[new] = np.random.rand(count) * self.trunctime
+            self.adsblat[new]  = aclat
+            self.adsblon[new]  = aclon
+            self.adsbalt[new]  = acalt
+            self.adsbtrk[new]  = achdg
+            self.adsbtas[new]  = acspd
+            self.adsbgs[new]   = acspd
+
+        if len(skipped) > 0:
+            return False, ", ".join(skipped) + " already exists."  # already exists do nothing
 
         return True
 
@@ -416,120 +398,20 @@ class Traffic:
         if idx<0:
             return False
 
-        del self.id[idx]
-        del self.type[idx]
-
-        # Traffic basic data
-        self.lat    = np.delete(self.lat, idx)
-        self.lon    = np.delete(self.lon, idx)
-        self.trk    = np.delete(self.trk, idx)
-        self.alt    = np.delete(self.alt, idx)
-        self.fll    = np.delete(self.fll, idx)
-        self.vs     = np.delete(self.vs, idx)
-        self.tas    = np.delete(self.tas, idx)
-        self.gs     = np.delete(self.gs, idx)
-        self.cas    = np.delete(self.cas, idx)
-        self.M      = np.delete(self.M, idx)
-
-        self.p      = np.delete(self.p, idx)
-        self.rho    = np.delete(self.rho, idx)
-        self.Temp   = np.delete(self.Temp, idx)
-        self.dtemp  = np.delete(self.dtemp, idx)
-        self.hdgsel = np.delete(self.hdgsel, idx)
-        self.bank   = np.delete(self.bank, idx)
-
-        # Crossover altitude
-        self.abco   = np.delete(self.abco, idx)
-        self.belco  = np.delete(self.belco, idx)
-
-        # Type specific data (temporarily default values)
-        self.avsdef = np.delete(self.avsdef, idx)
-        self.aphi   = np.delete(self.aphi, idx)
-        self.ax     = np.delete(self.ax, idx)
-
-        # performance data
-        self.perf.delete(idx)
-
-        # Traffic autopilot settings: hdg[deg], spd (CAS,m/s), alt[m], vspd[m/s]
-        self.ahdg   = np.delete(self.ahdg, idx)
-        self.aspd   = np.delete(self.aspd, idx)
-        self.ama    = np.delete(self.ama, idx)
-        self.aptas  = np.delete(self.aptas, idx)
-        self.aalt   = np.delete(self.aalt, idx)
-        self.afll   = np.delete(self.afll, idx)
-        self.avs    = np.delete(self.avs, idx)
-
-        # limit settings
-        self.lspd   = np.delete(self.lspd, idx)
-        self.lalt   = np.delete(self.lalt, idx)
-        self.lvs    = np.delete(self.lvs, idx)
-
-        # Help variables to save computation time
-        self.coslat = np.delete(self.coslat,idx)  # Cosine of latitude for flat-earth aproximations
-
-        # Traffic navigation variables
-        del self.dest[idx]
-        del self.orig[idx]
-
-        self.swlnav = np.delete(self.swlnav, idx)
-        self.swvnav = np.delete(self.swvnav, idx)
-
-        self.actwplat  = np.delete(self.actwplat,  idx)
-        self.actwplon  = np.delete(self.actwplon,  idx)
-        self.actwpalt  = np.delete(self.actwpalt,  idx)
-        self.actwpspd  = np.delete(self.actwpspd,  idx)
-        self.actwpturn = np.delete(self.actwpturn, idx)
-        self.actwpflyby = np.delete(self.actwpflyby, idx)
-
-        # VNAV cruise level
-        self.crzalt    = np.delete(self.crzalt,  idx)
-        self.dist2vs   = np.delete(self.dist2vs, idx)    # Distance to start V/S of VANAV
-        self.actwpvs   = np.delete(self.actwpvs, idx)    # Actual V/S to use
-
-        # Route info
-        del self.route[idx]
-
-        # ASAS output commanded values
-        del self.iconf[idx]
-        self.asasactive = np.delete(self.asasactive, idx)
-        self.asashdg    = np.delete(self.asashdg, idx)
-        self.asasspd    = np.delete(self.asasspd, idx)
-        self.asasalt    = np.delete(self.asasalt, idx)
-        self.asasvsp    = np.delete(self.asasvsp, idx)
-
-        self.desalt     = np.delete(self.desalt, idx)
-        self.desvs      = np.delete(self.desvs, idx)
-        self.desspd     = np.delete(self.desspd, idx)
-        self.deshdg     = np.delete(self.deshdg, idx)
-
-        # Metrics, area
-        del self.inside[idx]
-
-        # Traffic display data: label
-        del self.label[idx]
-
-        # Delete bread crumb data
-        self.lastlat = np.delete(self.lastlat, idx)
-        self.lastlon = np.delete(self.lastlon, idx)
-        self.lasttim = np.delete(self.lasttim, idx)
-        del self.trailcol[idx]
-
-        # Transmitted data to other aircraft due to truncated effect
-        self.adsbtime = np.delete(self.adsbtime, idx)
-        self.adsblat  = np.delete(self.adsblat, idx)
-        self.adsblon  = np.delete(self.adsblon, idx)
-        self.adsbalt  = np.delete(self.adsbalt, idx)
-        self.adsbtrk  = np.delete(self.adsbtrk, idx)
-        self.adsbtas  = np.delete(self.adsbtas, idx)
-        self.adsbgs   = np.delete(self.adsbgs, idx)
-        self.adsbvs   = np.delete(self.adsbvs, idx)
+        # Same as deleting a batch of one: the call sign index of the aircraft
+        # behind it is rebuilt in one go
+        return self.delete_batch([idx])
 
-        self.inconflict = np.delete(self.inconflict, idx)
+    def delete_batch(self, idx):
+        """Delete multiple aircraft at once, idx = array/list of indices"""
+        if len(idx) == 0:
+            return False
 
-        # Decrease number fo aircraft
-        self.ntraf = self.ntraf - 1
+        # All arrays are compacted only once
+        self.arrays.delete(idx)
+        self.ntraf = self.arrays.n
+        self.idindex = dict(zip(self.id, xrange(self.ntraf)))
 
-        self.eps = np.delete(self.eps, idx)
         return True
 
     def update(self, simt, simdt):
@@ -539,16 +421,34 @@ class Traffic:
 
         self.dts.append(simdt)
 
+        # In place: in the traffic arrays and the scratch arrays (see
+        # kinematics_inplace), else in new arrays
+        if self.inplace:
+            tmp = (self.tmp0, self.tmp1, self.tmp2)
+
         #---------------- Atmosphere ----------------
-        self.p, self.rho, self.Temp = vatmos(self.alt)
+        if self.inplace:
+            vatmos(self.alt, out=(self.p, self.rho, self.Temp))
+        else:
+            self.p, self.rho, self.Temp = vatmos(self.alt)
 
         #-------------- Performance limits autopilot settings --------------
         # Check difference with AP settings for trafperf and autopilot
-        self.delalt = self.aalt - self.alt  # [m]
+        if self.inplace:
+            np.subtract(self.aalt, self.alt, out=self.delalt)  # [m]
+        else:
+            self.delalt = self.aalt - self.alt  # [m]
         
         # below crossover altitude: CAS=const, above crossover altitude: MA = const
         # aptas hast to be calculated before delspd
-        self.aptas = vcas2tas(self.aspd, self.alt)*self.belco + vmach2tas(self.ama, self.alt)*self.abco
+        if self.inplace:
+            vcas2tas(self.aspd, self.alt, out=self.aptas, tmp=tmp)
+            self.aptas *= self.belco
+            vmach2tas(self.ama, self.alt, out=self.tmp3, tmp=tmp)
+            self.tmp3 *= self.abco
+            self.aptas += self.tmp3
+        else:
+            self.aptas = vcas2tas(self.aspd, self.alt)*self.belco + vmach2tas(self.ama, self.alt)*self.abco
 
         ###############################################################################
         # Debugging: add 10000 random aircraft
@@ -565,30 +465,46 @@ class Traffic:
 
         #-------------------- ADSB update: --------------------
 
-        self.adsbtime = self.adsbtime + simdt
-        if self.ADSBtrunc:
-            ADSB_update = np.where(self.adsbtime > self.trunctime)
+        if self.ADSBtrunc and self.inplace:
+            # Only aircraft whose broadcast is due (swtmp0) copy their state
+            self.adsbtime += simdt
+            iupd = np.greater(self.adsbtime, self.trunctime, out=self.swtmp0)
+            np.subtract(self.adsbtime, self.trunctime, out=self.adsbtime, where=iupd)
+            for name in ['lat', 'lon', 'alt', 'trk', 'tas', 'gs', 'vs']:
+                np.copyto(getattr(self, 'adsb' + name), getattr(self, name), where=iupd)
+        elif self.ADSBtrunc:
+            # Only aircraft whose broadcast is due copy their state
+            self.adsbtime = self.adsbtime + simdt
+            iupd = self.adsbtime > self.trunctime
+            self.adsbtime[iupd] = self.adsbtime[iupd] - self.trunctime
+            self.adsblat[iupd]  = self.lat[iupd]
+            self.adsblon[iupd]  = self.lon[iupd]
+            self.adsbalt[iupd]  = self.alt[iupd]
+            self.adsbtrk[iupd]  = self.trk[iupd]
+            self.adsbtas[iupd]  = self.tas[iupd]
+            self.adsbgs[iupd]   = self.gs[iupd]
+            self.adsbvs[iupd]   = self.vs[iupd]
+        elif self.inplace:
+            # No truncation: broadcast state is the actual state at the start of
+            # the step, copied as the state itself is updated in place
+            for name in ['lat', 'lon', 'alt', 'trk', 'tas', 'gs', 'vs']:
+                np.copyto(getattr(self, 'adsb' + name), getattr(self, name))
         else:
-            ADSB_update = range(self.ntraf)
-
-        for i in ADSB_update:
-            self.adsbtime[i] = self.adsbtime[i] - self.trunctime
-            self.adsblat[i]  = self.lat[i]
-            self.adsblon[i]  = self.lon[i]
-            self.adsbalt[i]  = self.alt[i]
-            self.adsbtrk[i]  = self.trk[i]
-            self.adsbtas[i]  = self.tas[i]
-            self.adsbgs[i]   = self.gs[i]
-            self.adsbvs[i]   = self.vs[i]
+            # No truncation: broadcast state is the actual state, no need to copy
+            self.adsblat = self.lat
+            self.adsblon = self.lon
+            self.adsbalt = self.alt
+            self.adsbtrk = self.trk
+            self.adsbtas = self.tas
+            self.adsbgs  = self.gs
+            self.adsbvs  = self.vs
 
         # New version ADSB Model
         self.adsb.update()
 
         #------------------- ASAS update: ---------------------
         # Scheduling: when dt has passed or restart:
-        if self.t0asas + self.dtasas < simt or simt < self.t0asas \
-            and self.dbconf.swasas:
-            self.t0asas = simt
+        if self.sched.due('ASAS', simt) is not None:
 
             # Save old result
             iconf0 = np.array(self.iconf)
@@ -607,139 +523,198 @@ class Traffic:
 
 
         #-----------------  FMS GUIDANCE & NAVIGATION  ------------------
-        # Scheduling: when dt has passed or restart:
-        if self.t0fms+self.dtfms<simt or simt<self.t0fms:
-            self.t0fms = simt
-            
+        # Scheduling: when dt has passed or restart, sel = aircraft to update
+        sel = self.sched.due('FMS', simt)
+        if sel is not None:
+            acidx = np.arange(self.ntraf)[sel]
+
             # FMS LNAV mode:
-            qdr, dist = geo.qdrdist(self.lat, self.lon, self.actwplat, self.actwplon) #[deg][nm])
+            qdr, dist = geo.qdrdist(self.lat[sel], self.lon[sel], self.actwplat[sel], self.actwplon[sel]) #[deg][nm])
 
             # Check whether shift based dist [nm] is required, set closer than WP turn distance
-            iwpclose = np.where(self.swlnav*(dist < self.actwpturn))[0]
+            iwpclose = np.where(self.swlnav[sel]*(dist < self.actwpturn[sel]))[0]
             
             # Shift waypoints for aircraft i where necessary
-            for i in iwpclose:
-
-                # Get next wp (lnavon = False if no more waypoints)
-                lat, lon, alt, spd, xtoalt, toalt, lnavon, flyby =  \
-                       self.route[i].getnextwp()  # note: xtoalt,toalt in [m]
-
-                # End of route/no more waypoints: switch off LNAV
-                if not lnavon:
-                    self.swlnav[i] = False # Drop LNAV at end of route
-
-                # In case of no LNAV, do not allow VNAV mode on it sown
-                if not self.swlnav[i]:
-                    self.swvnav[i] = False
-
-                self.actwplat[i]   = lat
-                self.actwplon[i]   = lon
-                self.actwpflyby[i] = int(flyby) # 1.0 in case of fly by, els fly over
-
-                # User entered altitude
-
-                if alt >= 0.:
-                    self.actwpalt[i] = alt
-                    
-                # VNAV=-ALT mode
-                # calculated altitude is available and active
-                if toalt  >= 0. and self.swvnav[i]: # somewhere there is an altitude constraint ahead
-
-                    # Descent VNAV mode (T/D logic)
-                    if self.alt[i] > toalt+10.*ft:       
-
-                        #Steepness dh/dx in [m/m], for now 1:3 rule of thumb
-                        steepness = 3000.*ft/(10.*nm)
-                        
-                        #Calculate max allowed altitude at next wp (above toalt)
-                        self.actwpalt[i] = toalt + xtoalt*steepness
-
-                        # Dist to waypoint where descent should start
-                        self.dist2vs[i] = (self.alt[i]-self.actwpalt[i])/steepness
-
-                    # Climb VNAV mode: climb as soon as possible (T/C logic)                        
-                    elif self.swvnav[i] and self.alt[i]<toalt-10.*ft:
-
-                        self.actwpalt[i] = toalt
-                        self.aalt[i]     = self.actwpalt[i] # dial in altitude of next waypoint as calculated
-                        self.dist2vs[i]  = 9999.
-
-                    # Level leg: never start V/S
-                    else:
-                        self.dist2vs[i] = -999.
-                        
-                #No altirude defined: never start V/S
-                else:
-                    self.dist2vs[i] = -999.
-               
-                # VNAV spd mode: use speed of this waypoint as commaded speed
-                # while passing waypoint and save next speed for passing next wp
-                if self.swvnav[i] and self.actwpspd[i]>0.0: # check mode and value
-
-                    # Select CAS or Mach command by checking value of actwpspd
-                    if self.actwpspd[i]<2.0: # Mach command
-
-                       self.aspd[i] = mach2cas(self.actwpspd[i],self.alt[i])
-                       self.ama[i]  = self.actwpspd[i]                            
-
-                    else:    # CAS command
-                       self.aspd[i] = self.actwpspd[i]
-                       self.ama[i]  = cas2tas(spd,self.alt[i])
-                    
-                
-                if spd>0. and self.swlnav[i] and self.swvnav[i]: # Valid speed and LNAV and VNAV ap modes are on
-                   self.actwpspd[i] = spd                           
-                else:
-                   self.actwpspd[i] = -999.
-
-                # Calculate distance before waypoint where to start the turn
-                # Turn radius:      R = V^2 / tan phi / g
-                # Distance to turn: wpturn = R * tan (1/2 delhdg) but max 4 times radius
-                # using default bank angle per flight phase
-                turnrad = self.tas[i]*self.tas[i]/tan(self.bank[i]) /g0 /nm # [nm]
-
-                dy = (self.actwplat[i]-self.lat[i])
-                dx = (self.actwplon[i]-self.lon[i])*self.coslat[i]
-                qdr[i] = degrees(atan2(dx,dy))     
-                
-                self.actwpturn[i] = self.actwpflyby[i]*np.max((10.,\
-                                    abs(turnrad*tan(radians(0.5*degto180(qdr[i]\
-                                    -self.route[i].wpdirfrom[self.route[i].iactwp]))))))
- 
+            if len(iwpclose) > 0:
+                qdr[iwpclose] = self.switchwp(acidx[iwpclose], qdr[iwpclose])
+
             # End of Waypoint switching loop
 
             # Do VNAV start of descent check
-            dy = (self.actwplat-self.lat)
-            dx = (self.actwplon-self.lon)*self.coslat
+            dy = (self.actwplat[sel]-self.lat[sel])
+            dx = (self.actwplon[sel]-self.lon[sel])*self.coslat[sel]
             dist2wp = 60.*nm*np.sqrt(dx*dx+dy*dy)
             steepness = 3000.*ft/(10.*nm)
 
             # VNAV AP LOGIC
 
             # Switch for which aircaft have to follow VNAV
-            self.swvnavvs = self.swlnav*self.swvnav*((dist2wp<self.dist2vs) + \
-                                     (self.actwpalt>self.alt))+self.swdecent*(1-self.swlnav)
+            swlnav = self.swlnav[sel]
+            self.swvnavvs[sel] = swlnav*self.swvnav[sel]*((dist2wp<self.dist2vs[sel]) + \
+                                     (self.actwpalt[sel]>self.alt[sel]))+self.swdecent*(1-swlnav)
             if self.dbconf.swasas and self.dbconf.swpasas:
                 # Find the aircraft that should start descending and store their index in icflvnav
-                icflvnav = np.where((self.swvnavvs == 1.) & (self.vs == 0.))[0]
-                for i in icflvnav:
+                icflvnav = acidx[np.where((self.swvnavvs[sel] == 1.) & (self.vs[sel] == 0.))[0]]
+                if len(icflvnav) > 0:
                     # newavs: calculate the future state to be used in the conflict probe
-                    newavs = np.sign(self.actwpalt[i]-self.alt[i]) * (3000.*ft/(10.*nm)*self.gs[i])
+                    newavs = np.sign(self.actwpalt[icflvnav]-self.alt[icflvnav]) * \
+                             (3000.*ft/(10.*nm)*self.gs[icflvnav])
                     # Using the future state, check wether this state will result in a short-term-conflict or not
-                    cfl = self.dbconf.conflictprobe(simt,i,self.vs,newavs)
+                    cfl = self.dbconf.conflictprobe(simt, icflvnav, newavs)
                     # If it results in a short-term-conflict, postpone the VNAV by setting the swvnavvs to 0.0
-                    if cfl:
-                        self.swvnavvs[i] = 0.0
+                    self.swvnavvs[icflvnav[cfl]] = 0.0
             
             # Set autopilot settings for Vertical Speed and Altitude using the swvnavvs switch
-            self.avs = (1-self.swvnavvs)*self.avs + self.swvnavvs*steepness*self.gs
-            self.aalt = (1-self.swvnavvs)*self.aalt + self.swvnavvs*self.actwpalt
+            swvnavvs = self.swvnavvs[sel]
+            self.avs[sel] = (1-swvnavvs)*self.avs[sel] + swvnavvs*steepness*self.gs[sel]
+            self.aalt[sel] = (1-swvnavvs)*self.aalt[sel] + swvnavvs*self.actwpalt[sel]
 
             # Set headings based on swlnav
-            self.ahdg = np.where(self.swlnav, qdr, self.ahdg)
+            self.ahdg[sel] = np.where(swlnav, qdr, self.ahdg[sel])
 
         #-------------END of FMS update -------------------
       
+        #---------- Autopilot and kinematics ----------
+        if self.inplace:
+            self.kinematics_inplace(simt, simdt)
+        else:
+            self.kinematics(simt, simdt)
+
+        # Update trails when switched on
+        if self.swtrails:
+            self.trails.update(simt, self.lat, self.lon,
+                               self.lastlat, self.lastlon,
+                               self.lasttim, self.id, self.trailcol)
+        else:
+            self.lastlat[:] = self.lat
+            self.lastlon[:] = self.lon
+            self.lasttim[:] = simt
+
+        # ----------------AREA check----------------
+        # Update area at the rate of the AREA task, sel = aircraft to check
+        sel = self.sched.due('AREA', simt) if self.swarea else None
+        if sel is not None:
+            lat, lon, alt = self.lat[sel], self.lon[sel], self.alt[sel]
+
+            # Check all aircraft
+            if self.area == "Square":
+                inside = (self.arealat0 <= lat) * (lat <= self.arealat1) * \
+                         (self.arealon0 <= lon) * (lon <= self.arealon1) * \
+                         (alt >= self.areafloor) * \
+                         ((alt >= 1500*ft) + self.swtaxi)
+
+            elif self.area == "Circle":
+
+                # delete aircraft if it is too far from the center of the circular area, or if has decended below the minimum altitude
+                distance = geo.kwikdist(lat, lon, self.arealat0, self.arealon0)  # [NM]
+                inside = (distance < self.arearadius) * (alt >= self.areafloor)
+
+            # Compare with previous: when leaving area: delete
+            wasinside = np.array(self.inside, dtype=bool)
+            leaving = wasinside[sel] * (inside == False)
+            ileaving = np.arange(self.ntraf)[sel][leaving]
+
+            # Update area status
+            wasinside[sel] = inside
+            self.inside = list(wasinside)
+            if len(ileaving) > 0:
+                self.delete_batch(ileaving)
+
+        return
+
+    def switchwp(self, i, qdr):
+        """FMS: switch aircraft i to their next waypoint and set the autopilot
+           for it. qdr is the direction to the active waypoint of these
+           aircraft [deg], the direction to the new one is returned."""
+        # Copy waypoints of changed routes into the waypoint table
+        self.updatewptable()
+
+        # Aircraft without waypoints (LNAV switched on for all): drop LNAV
+        empty = (self.rtenwp[i] == 0)
+        self.swlnav[i[empty]] = False
+        qdr  = np.array(qdr)
+        keep = np.logical_not(empty)
+        i    = i[keep]
+
+        # Get next wp (lnavon = False if no more waypoints) from the
+        # waypoint table, for all switching aircraft at once
+        lnavon = (self.iactwp[i] + 1 < self.rtenwp[i])
+        self.iactwp[i] = self.iactwp[i] + lnavon
+        wp = self.wptable[self.rtewp0[i] +
+                          np.minimum(self.iactwp[i], self.rtenwp[i] - 1)]
+        lat, lon, alt, spd = wp['lat'], wp['lon'], wp['alt'], wp['spd']
+        xtoalt, toalt      = wp['xtoalt'], wp['toalt']  # [m]
+        flyby, wpdirfrom   = wp['flyby'], wp['dirfrom']
+
+        # End of route/no more waypoints: switch off LNAV
+        self.swlnav[i] = self.swlnav[i] * (lnavon > 0.)  # Drop LNAV at end of route
+
+        # In case of no LNAV, do not allow VNAV mode on it sown
+        self.swvnav[i] = self.swvnav[i] * self.swlnav[i]
+
+        self.actwplat[i]   = lat
+        self.actwplon[i]   = lon
+        self.actwpflyby[i] = flyby # 1.0 in case of fly by, els fly over
+
+        # User entered altitude
+        self.actwpalt[i] = np.where(alt >= 0., alt, self.actwpalt[i])
+
+        # VNAV=-ALT mode
+        # calculated altitude is available and active: somewhere there is an altitude constraint ahead
+        alti = self.alt[i]
+        vnav = (toalt >= 0.) * self.swvnav[i]
+
+        #Steepness dh/dx in [m/m], for now 1:3 rule of thumb
+        steepness = 3000.*ft/(10.*nm)
+
+        # Descent VNAV mode (T/D logic)
+        # Calculate max allowed altitude at next wp (above toalt),
+        # and dist to waypoint where descent should start
+        descent = vnav * (alti > toalt + 10.*ft)
+        self.actwpalt[i] = np.where(descent, toalt + xtoalt*steepness, self.actwpalt[i])
+
+        # Climb VNAV mode: climb as soon as possible (T/C logic)
+        # dial in altitude of next waypoint as calculated
+        climb = vnav * (descent == False) * (alti < toalt - 10.*ft)
+        self.actwpalt[i] = np.where(climb, toalt, self.actwpalt[i])
+        self.aalt[i]     = np.where(climb, toalt, self.aalt[i])
+
+        # Level leg or no altitude defined: never start V/S
+        self.dist2vs[i] = np.where(descent, (alti - self.actwpalt[i])/steepness,
+                                   np.where(climb, 9999., -999.))
+
+        # VNAV spd mode: use speed of this waypoint as commaded speed
+        # while passing waypoint and save next speed for passing next wp
+        # Select CAS or Mach command by checking value of actwpspd
+        actwpspd = self.actwpspd[i]
+        vnavspd  = self.swvnav[i] * (actwpspd > 0.0) # check mode and value
+        mach     = vnavspd * (actwpspd < 2.0)       # Mach command
+        cas      = vnavspd * (actwpspd >= 2.0)      # CAS command
+        self.aspd[i[mach]] = vmach2cas(actwpspd[mach], alti[mach])
+        self.aspd[i[cas]]  = actwpspd[cas]
+        self.ama[i[mach]]  = actwpspd[mach]
+        self.ama[i[cas]]   = vcas2tas(spd[cas], alti[cas])
+
+        # Valid speed and LNAV and VNAV ap modes are on
+        self.actwpspd[i] = np.where((spd > 0.) * self.swlnav[i] * self.swvnav[i], spd, -999.)
+
+        # Calculate distance before waypoint where to start the turn
+        # Turn radius:      R = V^2 / tan phi / g
+        # Distance to turn: wpturn = R * tan (1/2 delhdg) but max 4 times radius
+        # using default bank angle per flight phase
+        turnrad = self.tas[i]*self.tas[i]/np.tan(self.bank[i]) /g0 /nm # [nm]
+
+        dy = (self.actwplat[i]-self.lat[i])
+        dx = (self.actwplon[i]-self.lon[i])*self.coslat[i]
+        qdr[keep] = np.degrees(np.arctan2(dx,dy))
+
+        self.actwpturn[i] = self.actwpflyby[i]*np.maximum(10.,
+                            np.abs(turnrad*np.tan(np.radians(0.5*degto180(qdr[keep]
+                            -wpdirfrom)))))
+        return qdr
+
+    def kinematics(self, simt, simdt):
+        """Autopilot and kinematics: speed, altitude, heading and position"""
         # NOISE: Turbulence
         if self.turbulence:
             timescale=np.sqrt(simdt)
@@ -830,8 +805,7 @@ class Traffic:
         self.M   = vtas2mach(self.tas, self.alt)
 
         # Update performance every self.perfdt seconds
-        if abs(simt - self.perft0) >= self.perfdt:               
-            self.perft0 = simt            
+        if self.sched.due('PERF', simt) is not None:
             self.perf.perf()
 
         # update altitude
@@ -880,54 +854,241 @@ class Traffic:
         self.lon = self.lon + np.degrees(ds * np.sin(np.radians(self.trk)+turblon) \
                                          / self.coslat / Rearth)
 
-        # Update trails when switched on
-        if self.swtrails:
-            self.trails.update(simt, self.lat, self.lon,
-                               self.lastlat, self.lastlon,
-                               self.lasttim, self.id, self.trailcol)
+    def kinematics_inplace(self, simt, simdt):
+        """Autopilot and kinematics, same as kinematics(), but computed in
+           place in the traffic arrays and the scratch arrays tmp0..tmp3 and
+           swtmp0..swtmp2. Only the random turbulence and the Mach number of
+           aircraft passing the crossover altitude return new arrays."""
+        tmp0, tmp1, tmp2, tmp3 = self.tmp0, self.tmp1, self.tmp2, self.tmp3
+        sw0, sw1, sw2 = self.swtmp0, self.swtmp1, self.swtmp2
+
+        # NOISE: Turbulence
+        if self.turbulence:
+            timescale = np.sqrt(simdt)
+            turb = np.maximum(self.standardturbulence, 1e-6)
+            turbhf  = np.random.normal(0, turb[0]*timescale, self.ntraf) #[m]
+            turbhw  = np.random.normal(0, turb[1]*timescale, self.ntraf) #[m]
+            turbalt = np.random.normal(0, turb[2]*timescale, self.ntraf) #[m]
+
+            # latitudinal, longitudinal direction
+            np.radians(self.trk, out=tmp0)
+            turblat = np.cos(tmp0)*turbhf-np.sin(tmp0)*turbhw #[m]
+            turblon = np.sin(tmp0)*turbhf+np.cos(tmp0)*turbhw #[m]
+
+        #--------- Input to Autopilot settings to follow: destination or ASAS ----------
+        # desired autopilot settings due to ASAS
+        np.copyto(self.deshdg, self.ahdg)
+        np.copyto(self.deshdg, self.asashdg, where=self.asasactive)
+        np.copyto(self.desspd, self.aptas)
+        np.copyto(self.desspd, self.asasspd, where=self.asasactive)
+        np.copyto(self.desalt, self.aalt)
+        if self.dbconf.swresodir != "HORIZ":
+            np.copyto(self.desalt, self.asasalt, where=self.asasactive)
+        np.copyto(self.desvs, self.avs)
+        np.copyto(self.desvs, self.asasvsp, where=self.asasactive)
+
+        # check for the flight envelope
+        self.perf.limits()
+
+        # Update autopilot settings with values within the flight envelope
+
+        # Autopilot selected speed setting [m/s]: limited when above limit
+        # speed, zero when exactly at the limit speed (as in kinematics())
+        lspd = vcas2tas(self.lspd, self.alt, out=tmp3, tmp=(tmp0, tmp1, tmp2))
+        np.not_equal(self.lspd, 0.0, out=sw0)
+        np.greater(self.desspd, lspd, out=sw1)
+        np.logical_and(sw0, sw1, out=sw1)
+        np.equal(self.desspd, lspd, out=sw2)
+        np.logical_and(sw0, sw2, out=sw2)
+        np.copyto(self.desspd, lspd, where=sw1)
+        np.copyto(self.desspd, 0., where=sw2)
+
+        # Autopilot selected altitude [m]
+        np.not_equal(self.lalt, 0.0, out=sw0)
+        np.copyto(self.desalt, self.lalt, where=sw0)
+
+        # Autopilot selected vertical speed (V/S)
+        np.not_equal(self.lvs, 0.0, out=sw0)
+        np.copyto(self.desvs, self.lvs, where=sw0)
+
+        # below crossover altitude: CAS=const, above crossover altitude: MA = const
+        # ama is fixed when above crossover
+        np.equal(self.ama, 0., out=sw0)
+        np.logical_and(sw0, self.abco, out=sw0)
+        if sw0.any():
+            self.ama[sw0] = vcas2mach(self.desspd[sw0], self.alt[sw0])
+
+        # ama is deleted when below crossover
+        np.not_equal(self.ama, 0., out=sw0)
+        np.logical_and(sw0, self.belco, out=sw0)
+        self.ama[sw0] = 0.
+
+        #---------- Basic Autopilot  modes ----------
+
+        # SPD HOLD/SEL mode: accelerate with ax when more than 0.4 m/s off
+        np.subtract(self.desspd, self.tas, out=self.delspd)
+        np.abs(self.delspd, out=tmp0)
+        np.greater(tmp0, 0.4, out=sw0)  # <1 kts = 0.514444 m/s
+        tmp0 /= max(1e-8, simdt)
+        np.minimum(tmp0, self.ax, out=tmp0)
+        np.sign(self.delspd, out=tmp1)
+        tmp0 *= tmp1
+        tmp0 *= simdt
+        np.add(self.tas, tmp0, out=self.tas, where=sw0)
+
+        # Speed conversions
+        vtas2cas(self.tas, self.alt, out=self.cas, tmp=(tmp0, tmp1, tmp2))
+        np.copyto(self.gs, self.tas)
+        vtas2mach(self.tas, self.alt, out=self.M, tmp=(tmp0, tmp1, tmp2))
+
+        # Update performance every self.perfdt seconds
+        if self.sched.due('PERF', simt) is not None:
+            self.perf.perf()
+
+        # update altitude: swaltsel (sw0) when more than a step away
+        np.subtract(self.desalt, self.alt, out=tmp0)
+        np.abs(tmp0, out=tmp1)
+        np.abs(self.vs, out=tmp2)
+        tmp2 *= 2. * simdt
+        np.maximum(tmp2, 3., out=tmp2)  # 3.[m] = 10 [ft] eps alt
+        np.greater(tmp1, tmp2, out=sw0)
+
+        # Vertical speed magnitude
+        np.abs(self.desvs, out=tmp1)
+        if self.dbconf.swresodir == "VERT":
+            # if asas is not active AND VNAV is not active, then it shouls use the standard climb rate.
+            # if asas is active AND VNAV is not active it should listen to the asasvs which is desvs
+            # if asas AND VNAV is active then use desvs
+            tmp2.fill(np.abs(1500./60.*ft))
+            np.copyto(tmp2, tmp1, where=self.asasactive)
         else:
-            self.lastlat = self.lat
-            self.lastlon = self.lon
-            self.lasttim[:] = simt
+            # Normal vertical speed selection
+            np.multiply(self.gs, 3000.*ft/(10.*nm), out=tmp2)
+        np.copyto(tmp2, tmp1, where=self.swvnav)
 
-        # ----------------AREA check----------------
-        # Update area once per areadt seconds:
-        if self.swarea and abs(simt - self.areat0) > self.areadt:
-            # Update loop timer
-            self.areat0 = simt
-            # Check all aircraft
-            i = 0
-            while (i < self.ntraf):
-                # Current status
-                if self.area == "Square":
-                    inside = self.arealat0 <= self.lat[i] <= self.arealat1 and \
-                             self.arealon0 <= self.lon[i] <= self.arealon1 and \
-                             self.alt[i] >= self.areafloor and \
-                             (self.alt[i] >= 1500*ft or self.swtaxi)
-
-                elif self.area == "Circle":
-
-                    # delete aircraft if it is too far from the center of the circular area, or if has decended below the minimum altitude
-                    distance = geo.kwikdist(self.arealat0, self.arealon0, self.lat[i], self.lon[i])  # [NM]
-                    inside = distance < self.arearadius and self.alt[i] >= self.areafloor
-
-                # Compare with previous: when leaving area: delete command
-                if self.inside[i] and not inside:
-                    self.delete(self.id[i])
-
-                else:
-                    # Update area status
-                    self.inside[i] = inside
-                    i = i + 1
+        np.sign(tmp0, out=tmp0)
+        np.multiply(tmp0, tmp2, out=tmp0)
+        np.multiply(tmp0, sw0, out=self.vs)
+
+        np.multiply(self.vs, simdt, out=tmp0)
+        np.add(self.alt, tmp0, out=self.alt, where=sw0)
+        np.logical_not(sw0, out=sw1)
+        np.copyto(self.alt, self.desalt, where=sw1)
+        if self.turbulence:
+            self.alt += turbalt
+
+        # HDG HOLD/SEL mode: ahdg = ap selected heading
+        np.subtract(self.deshdg, self.trk, out=tmp0)
+        tmp0 += 180.
+        np.mod(tmp0, 360., out=tmp0)
+        tmp0 -= 180.  # delhdg [deg]
+
+        # nominal bank angles per phase from BADA 3.12
+        np.tan(self.bank, out=tmp1)
+        tmp1 *= g0
+        np.maximum(self.tas, self.eps, out=tmp2)
+        tmp1 /= tmp2
+        np.degrees(tmp1, out=tmp1)  # omega [deg/s]
+
+        np.abs(tmp1, out=tmp2)
+        tmp2 *= 2. * simdt
+        np.abs(tmp0, out=tmp3)
+        np.greater(tmp3, tmp2, out=self.hdgsel)
+
+        np.sign(tmp0, out=tmp0)
+        tmp1 *= simdt
+        tmp1 *= self.hdgsel
+        tmp1 *= tmp0
+        self.trk += tmp1
+        np.mod(self.trk, 360., out=self.trk)
+
+        #--------- Kinematics: update lat,lon,alt ----------
+        np.multiply(self.gs, simdt, out=tmp0)  # ds [m]
+        np.radians(self.trk, out=tmp1)
+
+        if self.turbulence:
+            np.add(tmp1, turblat, out=tmp2)
+            np.cos(tmp2, out=tmp2)
+        else:
+            np.cos(tmp1, out=tmp2)
+        tmp2 *= tmp0
+        tmp2 /= Rearth
+        np.degrees(tmp2, out=tmp2)
+        self.lat += tmp2
+
+        np.deg2rad(self.lat, out=self.coslat)
+        np.cos(self.coslat, out=self.coslat)
+
+        if self.turbulence:
+            np.add(tmp1, turblon, out=tmp2)
+            np.sin(tmp2, out=tmp2)
+        else:
+            np.sin(tmp1, out=tmp2)
+        tmp2 *= tmp0
+        tmp2 /= self.coslat
+        tmp2 /= Rearth
+        np.degrees(tmp2, out=tmp2)
+        self.lon += tmp2
 
         return
 
     def id2idx(self, acid):
         """Find index of aircraft id"""
-        try:
-            return self.id.index(acid.upper())
-        except:
-            return -1
+        return self.idindex.get(acid.upper(), -1)
+
+    def ids2idx(self, acids):
+        """Find indices of a list of aircraft ids (-1 when not found)"""
+        get = self.idindex.get
+        return np.array([get(acid.upper(), -1) for acid in acids], dtype=int)
+
+    def uids2idx(self, uids):
+        """Indices of aircraft with unique numbers uids (array), -1 for
+           aircraft that have been deleted"""
+        uids = np.asarray(uids)
+        if self.ntraf == 0:
+            return -np.ones(uids.shape, dtype=int)
+
+        # Aircraft are created with increasing uid and deleting keeps the
+        # order, so the uid array is sorted
+        idx = np.minimum(np.searchsorted(self.uid, uids), self.ntraf - 1)
+        return np.where(self.uid[idx] == uids, idx, -1)
+
+    def updatewptable(self):
+        """Copy the waypoints of changed routes into the waypoint table.
+           Rows of old routes stay in the table until it is full, then the
+           table is compacted (and grown when needed) at once."""
+        if len(self.rtechanged) == 0:
+            return
+        idx = self.uids2idx(list(self.rtechanged))
+        idx = idx[idx >= 0]
+        self.rtechanged.clear()
+
+        rows  = [self.route[i].wprows() for i in idx]
+        nrows = np.array([len(r) for r in rows], dtype=int)
+        self.rtenwp[idx] = 0
+
+        if self.nwptable + nrows.sum() > len(self.wptable):
+            nused    = self.rtenwp.sum()
+            capacity = len(self.wptable)
+            while capacity < 2 * (nused + nrows.sum()):
+                capacity = 2 * capacity
+
+            # Rows still in use, in the order of the aircraft
+            start = np.cumsum(self.rtenwp) - self.rtenwp
+            used  = np.repeat(self.rtewp0 - start, self.rtenwp) + np.arange(nused)
+            table = np.zeros(capacity, dtype=wpdtype)
+            table[:nused] = self.wptable[used]
+
+            self.wptable   = table
+            self.nwptable  = nused
+            self.rtewp0[:] = start
+
+        if len(rows) > 0:
+            n = self.nwptable + nrows.sum()
+            self.wptable[self.nwptable:n] = np.concatenate(rows)
+            self.rtewp0[idx] = self.nwptable + np.cumsum(nrows) - nrows
+            self.rtenwp[idx] = nrows
+            self.nwptable    = n
 
     def setTrails(self, *args):
         """ Set trails on/off, or change trail color of aircraft """
@@ -964,6 +1125,10 @@ class Traffic:
         self.ADSBtransnoise = self.noise
         self.ADSBtrunc      = self.noise
 
+        # Without truncation the ADS-B state is the actual state itself (see
+        # update): copy it into the ADS-B arrays, so they are updated separately
+        self.arrays.sync()
+
     def engchange(self, acid, engid):
         """Change of engines"""
         self.perf.engchange(acid, engid)
@@ -1133,7 +1298,7 @@ class Traffic:
                 return False, (self.orig[idx] + " not found.")
 
     def acinfo(self, acid):
-        idx      = self.id.index(acid)
+        idx      = self.id2idx(acid)
         actype   = self.type[idx]
         lat, lon = self.lat[idx], self.lon[idx]
         alt, hdg = self.alt[idx]/ft, self.trk[idx]
@@ -0,0 +1,37 @@
+"""
+Aero tests: conversions into given arrays (out) must give the same results
+as the conversions that return new arrays
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+import numpy as np
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+from bluesky.tools import aero
+
+
+class TestOut(unittest.TestCase):
+    def test_conversions(self):
+        rs  = np.random.RandomState(1)
+        h   = np.append(rs.rand(1000) * 20000., [0., 11000., -10.])
+        spd = rs.rand(len(h)) * 300.
+        out = np.empty(len(h))
+        tmp = [np.empty(len(h)) for i in range(3)]
+        for f, x in [(aero.vcas2tas, spd), (aero.vtas2cas, spd),
+                     (aero.vtas2mach, spd), (aero.vmach2tas, spd / 300.)]:
+            self.assertTrue(f(x, h, out=out, tmp=tmp) is out)
+            np.testing.assert_array_equal(out, f(x, h))
+            # Without scratch arrays
+            np.testing.assert_array_equal(f(x, h, out=np.empty(len(h))), f(x, h))
+
+        for ref, res in zip(aero.vatmos(h), aero.vatmos(h, out=tmp)):
+            np.testing.assert_array_equal(res, ref)
+
+
+if __name__ == '__main__':
+    unittest.main()
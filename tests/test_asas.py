@@ -0,0 +1,185 @@
+"""
+Conflict detection tests: the conflict pairs of the pair version of the
+detection (broad phase, blocks, compiled kernel) must be the same as those
+of the full matrix version (swmatrices), which is the reference.
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+import numpy as np
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(root)
+sys.path.insert(0, root)
+sys.path.append('bluesky/tools/')
+
+from bluesky.traf import Traffic
+from bluesky.tools.aero import ft
+
+
+class Navdb:
+    fir = []
+
+
+def maketraffic(n, lat0, flgrid, lon0=0., seed=1):
+    """Traffic of n aircraft around latitude lat0 and longitude lon0, at flight
+       levels (flgrid) or at any altitude. A part of the aircraft flies level."""
+    traf = Traffic(Navdb())
+    rs   = np.random.RandomState(seed)
+    traf.create_batch(['AC%04d' % i for i in range(n)], n * ['B744'],
+                      lat0 + 3. * rs.rand(n),
+                      (lon0 + 5. * rs.rand(n) + 180.) % 360. - 180.,
+                      360. * rs.rand(n), n * [30000. * ft], n * [250.])
+    if flgrid:
+        traf.alt[:] = rs.randint(250, 290, n) * 100. * ft
+    else:
+        traf.alt[:] = 25000. * ft + 4000. * ft * rs.rand(n)
+    traf.vs[:] = np.where(rs.rand(n) < 0.5, 0., 15. * (rs.rand(n) - 0.5))
+    traf.gs[:] = 150. + 150. * rs.rand(n)
+    traf.trk[:] = 360. * rs.rand(n)
+    for name in ['lat', 'lon', 'alt', 'trk', 'gs', 'vs']:
+        getattr(traf, 'adsb' + name)[:] = getattr(traf, name)
+    return traf
+
+
+def densepairs(dbconf):
+    """Conflict pairs of the full matrix version"""
+    dbconf.swmatrices = True
+    dbconf.detect()
+    dbconf.swmatrices = False
+    return dbconf.confpairs
+
+
+class TestDetect(unittest.TestCase):
+    def assertSamePairs(self, pairs, ref):
+        self.assertEqual(zip(pairs['i'], pairs['j']), zip(ref['i'], ref['j']))
+        for name in ['tcpa', 'tin', 'tout', 'dcpa', 'qdr', 'dist']:
+            np.testing.assert_allclose(pairs[name], ref[name], rtol=1e-9, atol=1e-6)
+
+    def check(self, lat0, flgrid, lon0=0., **options):
+        traf   = maketraffic(500, lat0, flgrid, lon0)
+        dbconf = traf.dbconf
+        dbconf.swcdetect = False
+        for name, value in options.items():
+            setattr(dbconf, name, value)
+        ref = densepairs(dbconf)
+        self.assertTrue(len(ref) > 0)
+        dbconf.detectpairs()
+        self.assertSamePairs(dbconf.confpairs, ref)
+
+    def test_latitudes(self):
+        # Adjacent flight levels are exactly dh apart, and the bearings are
+        # not symmetric at higher latitudes: (i,j) and (j,i) both calculated
+        for lat0 in [20., 50., 80.]:
+            for flgrid in [True, False]:
+                self.check(lat0, flgrid)
+
+    def test_grid(self):
+        # Broad phase over the date line and close to the pole
+        for lat0, lon0 in [(50., 178.5), (-20., -181.5), (86.5, 0.)]:
+            self.check(lat0, True, lon0)
+            self.check(lat0, True, lon0, swgrid=False)
+
+    def test_blocks(self):
+        for blocksize in [1, 64, 1000]:
+            self.check(50., True, blocksize=blocksize)
+            self.check(50., False, blocksize=blocksize, swgrid=False)
+
+    def test_kwik(self):
+        # Flat earth distance as first stage only: no pairs lost
+        for lat0, lon0 in [(20., 0.), (80., 0.), (50., 178.5)]:
+            self.check(lat0, True, lon0, swkwik=True)
+            self.check(lat0, False, lon0, swkwik=True, blocksize=64)
+
+    def test_truncation(self):
+        traf = maketraffic(300, 50., True)
+        traf.ADSBtrunc = True
+        traf.adsblat[:] += 0.01
+        traf.adsbalt[:] += 100. * ft
+        dbconf = traf.dbconf
+        dbconf.swcdetect = False
+        ref = densepairs(dbconf)
+        dbconf.detectpairs()
+        self.assertSamePairs(dbconf.confpairs, ref)
+
+
+def proberef(dbconf, i, newavs):
+    """Original conflict probe of aircraft i with new vertical speed newavs"""
+    from bluesky.traf.asas import geo
+    traf  = dbconf.traf
+    tlook = dbconf.dtlookahead_conflictprobe
+    if traf.alt[i] < 1000 * ft:
+        return False
+
+    R2 = dbconf.R**2
+    for k in range(traf.ntraf):
+        if k == i:
+            continue
+        qdr, dist = geo.qdrdist(traf.lat[i], traf.lon[i], traf.lat[k], traf.lon[k])
+        dist = dist * 1852.
+        dx = dist * np.sin(np.radians(qdr))
+        dy = dist * np.cos(np.radians(qdr))
+        du = traf.gs[k] * np.sin(np.radians(traf.trk[k])) - \
+            traf.gs[i] * np.sin(np.radians(traf.trk[i]))
+        dv = traf.gs[k] * np.cos(np.radians(traf.trk[k])) - \
+            traf.gs[i] * np.cos(np.radians(traf.trk[i]))
+        dv2 = max(du * du + dv * dv, 1e-6)
+        tcpa  = -(du * dx + dv * dy) / dv2
+        dcpa2 = dist * dist - tcpa * tcpa * dv2
+        if dcpa2 >= R2:
+            continue
+        dtin = np.sqrt(max(0., R2 - dcpa2)) / np.sqrt(dv2)
+        if not (tcpa + dtin > 0. and tcpa - dtin < tlook):
+            continue
+
+        dalt = traf.alt[i] - traf.adsbalt[k]
+        dvs  = newavs - traf.adsbvs[k]
+        if abs(dvs) < 1e-6:
+            dvs = 1e-6
+        tcrosshi = (dalt + dbconf.dh) / -dvs
+        tcrosslo = (dalt - dbconf.dh) / -dvs
+        if max(tcrosshi, tcrosslo) > 0. and min(tcrosshi, tcrosslo) < tlook:
+            return True
+    return False
+
+
+class TestConflictProbe(unittest.TestCase):
+    def test_probe(self):
+        traf   = maketraffic(300, 50., True)
+        dbconf = traf.dbconf
+        rs     = np.random.RandomState(2)
+        traf.alt[:20] = 500. * ft
+        for lat0 in [50., 80.]:
+            traf.lat[:] += lat0 - 50.
+            idx    = rs.permutation(traf.ntraf)[:150]
+            newavs = np.where(rs.rand(150) < 0.3, 0., 20. * (rs.rand(150) - 0.5))
+            cfl    = dbconf.conflictprobe(0., idx, newavs)
+            ref    = [proberef(dbconf, i, vs) for i, vs in zip(idx, newavs)]
+            self.assertEqual(list(cfl), ref)
+            self.assertTrue(0 < sum(ref) < len(ref))
+
+class TestKernel(unittest.TestCase):
+    def test_kernel(self):
+        # Compiled kernel of cgeo (bluesky/tools/ctools) against numpy
+        from bluesky.traf import asas
+        if not hasattr(asas.geo, 'cpapairs'):
+            raise unittest.SkipTest('cgeo not built')
+        for lat0 in [20., 50., 80.]:
+            for flgrid in [True, False]:
+                traf   = maketraffic(500, lat0, flgrid)
+                dbconf = traf.dbconf
+                dbconf.swcdetect = False
+                dbconf.detectpairs()
+                ref = dbconf.confpairs
+                for blocksize, swkwik in [(0, False), (64, True)]:
+                    dbconf.swcdetect = True
+                    dbconf.blocksize = blocksize
+                    dbconf.swkwik    = swkwik
+                    dbconf.detectpairs()
+                    TestDetect.assertSamePairs.im_func(self, dbconf.confpairs, ref)
+
+
+if __name__ == '__main__':
+    unittest.main()
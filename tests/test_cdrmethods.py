@@ -0,0 +1,68 @@
+"""
+CR method registry tests: loading methods by name, once, and methods of
+other packages
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+from bluesky.traf import CDRmethods
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        # Package with a CR method module, declared as entry point
+        self.path = tempfile.mkdtemp()
+        open(os.path.join(self.path, 'testcr.py'), 'w').write(
+            'def start(dbconf):\n    dbconf.CRname = "TESTCR"\n\n'
+            'def resolve(dbconf):\n    pass\n')
+        info = os.path.join(self.path, 'testcr-1.0.egg-info')
+        os.mkdir(info)
+        open(os.path.join(info, 'PKG-INFO'), 'w').write(
+            'Metadata-Version: 1.0\nName: testcr\nVersion: 1.0\n')
+        open(os.path.join(info, 'entry_points.txt'), 'w').write(
+            '[bluesky.cdrmethods]\nTestCR = testcr\n')
+        sys.path.append(self.path)
+        self.methods = dict(CDRmethods.methods)
+
+    def tearDown(self):
+        sys.path.remove(self.path)
+        shutil.rmtree(self.path)
+        CDRmethods.methods.clear()
+        CDRmethods.methods.update(self.methods)
+        CDRmethods.modules.pop('testcr', None)
+        sys.modules.pop('testcr', None)
+
+    def test_load(self):
+        mvp = CDRmethods.load('MVP')
+        self.assertEqual(mvp.__name__, 'bluesky.traf.CDRmethods.MVP')
+        self.assertTrue(CDRmethods.load('mvp') is mvp)
+        self.assertTrue(CDRmethods.load('Eby') is CDRmethods.load('EBY'))
+        self.assertRaises(KeyError, CDRmethods.load, 'NOSUCHMETHOD')
+
+    def test_register(self):
+        CDRmethods.register('mine', 'testcr')
+        module = CDRmethods.load('MINE')
+        self.assertEqual(module.__name__, 'testcr')
+        self.assertTrue(CDRmethods.load('testcr') is module)
+
+    def test_entrypoints(self):
+        try:
+            import pkg_resources
+        except ImportError:
+            raise unittest.SkipTest('pkg_resources not available')
+        pkg_resources.working_set.add_entry(self.path)
+        CDRmethods.discovered = False
+        module = CDRmethods.load('TESTCR')
+        self.assertEqual(module.__name__, 'testcr')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+"""
+Conflict list tests: the conflict list (CPA positions, conflicts and losses
+of separation with their severity) from the conflict pairs must be the same
+as that of the original pair by pair loop with call sign strings, which is
+kept here as reference.
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import unittest
+import numpy as np
+
+from test_asas import maketraffic
+from bluesky.tools import geo
+from bluesky.tools.aero import nm, ft
+# Reference with the same geo as the ASAS: cgeo when it is built
+from bluesky.traf.asas import geo as asasgeo
+
+
+class ConflictListRef:
+    """Original conflict list, per pair with call sign strings"""
+    def __init__(self):
+        self.conflist_all = []
+        self.conflist_exp = []
+        self.LOSlist_all  = []
+        self.LOSmaxsev    = []
+        self.LOShmaxsev   = []
+        self.LOSvmaxsev   = []
+
+    def update(self, dbconf):
+        traf = dbconf.traf
+        self.iconf = traf.ntraf * [-1]
+        self.idown = []
+        self.idoth = []
+        self.cpa   = []
+        self.conflist_now = []
+        self.LOSlist_now  = []
+
+        for idx, pair in enumerate(dbconf.confpairs):
+            i, j = pair['i'], pair['j']
+            tcpa = pair['tcpa']
+            self.idown.append(traf.id[i])
+            self.idoth.append(traf.id[j])
+            self.iconf[i] = idx
+
+            lato, lono = asasgeo.qdrpos(traf.lat[i], traf.lon[i], traf.trk[i],
+                                        tcpa * traf.gs[i] / nm)
+            lati, loni = asasgeo.qdrpos(traf.adsblat[j], traf.adsblon[j], traf.adsbtrk[j],
+                                        tcpa * traf.adsbgs[j] / nm)
+            self.cpa.append([lato, lono, traf.alt[i] + tcpa * traf.vs[i],
+                             lati, loni, traf.adsbalt[j] + tcpa * traf.adsbvs[j]])
+
+            dx = (traf.lat[i] - traf.lat[j]) * 111319.
+            dy = (traf.lon[i] - traf.lon[j]) * 111319.
+            hdist2 = dx**2 + dy**2
+            vdist  = abs(traf.alt[i] - traf.alt[j])
+            LOS    = hdist2 < dbconf.R**2 and vdist < dbconf.dh
+
+            combi  = traf.id[i] + " " + traf.id[j]
+            combi2 = traf.id[j] + " " + traf.id[i]
+            if combi not in self.conflist_all and combi2 not in self.conflist_all:
+                self.conflist_all.append(combi)
+                self.conflist_exp.append(combi)
+            if combi not in self.conflist_now and combi2 not in self.conflist_now:
+                self.conflist_now.append(combi)
+
+            if LOS:
+                if combi not in self.LOSlist_all and combi2 not in self.LOSlist_all:
+                    self.LOSlist_all.append(combi)
+                    self.LOSmaxsev.append(0.)
+                    self.LOShmaxsev.append(0.)
+                    self.LOSvmaxsev.append(0.)
+                if combi not in self.LOSlist_now and combi2 not in self.LOSlist_now:
+                    self.LOSlist_now.append(combi)
+
+                Ih = 1.0 - np.sqrt(hdist2) / dbconf.R
+                Iv = 1.0 - vdist / dbconf.dh
+                if combi in self.LOSlist_all:
+                    k = self.LOSlist_all.index(combi)
+                    if min(Ih, Iv) > self.LOSmaxsev[k]:
+                        self.LOSmaxsev[k]  = min(Ih, Iv)
+                        self.LOShmaxsev[k] = Ih
+                        self.LOSvmaxsev[k] = Iv
+
+
+def pastcparef(dbconf, id1, id2):
+    """Original past CPA check for one conflict"""
+    traf = dbconf.traf
+    d  = np.array([traf.lon[id2] - traf.lon[id1], traf.lat[id2] - traf.lat[id1]])
+    t1 = np.radians(traf.trk[id1])
+    t2 = np.radians(traf.trk[id2])
+    v1 = np.array([np.sin(t1) * traf.tas[id1], np.cos(t1) * traf.tas[id1]])
+    v2 = np.array([np.sin(t2) * traf.tas[id2], np.cos(t2) * traf.tas[id2]])
+    pastCPA = np.dot(d, v2 - v1) > 0.
+
+    dx = (traf.lat[id1] - traf.lat[id2]) * 111319.
+    dy = (traf.lon[id1] - traf.lon[id2]) * 111319.
+    hdist2 = dx**2 + dy**2
+    if hdist2 < dbconf.R**2:
+        pastCPA = False
+    if abs(traf.trk[id1] - traf.trk[id2]) < 30. and hdist2 < dbconf.Rm**2:
+        pastCPA = False
+    if abs(traf.vs[id1]) < 0.1 and abs(traf.vs[id2]) < 0.1 and \
+            abs(traf.alt[id1] - traf.alt[id2]) > 1000 * ft:
+        pastCPA = True
+    return pastCPA
+
+
+def aporasasref(dbconf, conflicts):
+    """Original ASAS or autopilot decision for conflicts (pairs of call signs):
+       returns the aircraft following ASAS, the aircraft that recover and the
+       remaining conflicts"""
+    traf    = dbconf.traf
+    active  = set()
+    recover = set()
+    remain  = []
+    for ac1, ac2 in conflicts:
+        id1 = traf.id2idx(ac1)
+        id2 = traf.id2idx(ac2)
+        if id1 >= 0 and id2 >= 0 and not pastcparef(dbconf, id1, id2):
+            active.update([id1, id2])
+            remain.append((ac1, ac2))
+        else:
+            recover.update([k for k in [id1, id2] if k >= 0])
+    return active, recover, remain
+
+
+def move(traf, dt):
+    """Straight flight of all aircraft for dt seconds"""
+    trk = np.radians(traf.trk)
+    traf.lat[:] += np.degrees(traf.gs * np.cos(trk) * dt / 6371000.)
+    traf.lon[:] += np.degrees(traf.gs * np.sin(trk) * dt / 6371000.) / \
+        np.cos(np.radians(traf.lat))
+    traf.alt[:] += traf.vs * dt
+    for name in ['lat', 'lon', 'alt']:
+        getattr(traf, 'adsb' + name)[:] = getattr(traf, name)
+
+
+class TestConflictList(unittest.TestCase):
+    def setUp(self):
+        self.traf   = maketraffic(400, 50., True)
+        self.dbconf = self.traf.dbconf
+        self.dbconf.swcdetect = False
+        self.ref    = ConflictListRef()
+        self.ids    = dict(zip(self.traf.uid, self.traf.id))
+
+    def step(self):
+        move(self.traf, 10.)
+        self.dbconf.detectpairs()
+        self.dbconf.conflictlist(0.)
+        self.ref.update(self.dbconf)
+
+    def names(self, key):
+        """Call signs of an integer pair key"""
+        return frozenset([self.ids[key // 2**32], self.ids[key % 2**32]])
+
+    def combis(self, combis):
+        return [frozenset(combi.split()) for combi in combis]
+
+    def test_cpa(self):
+        for k in range(5):
+            self.step()
+            dbconf, ref = self.dbconf, self.ref
+            self.assertEqual(dbconf.nconf, len(ref.idown))
+            self.assertEqual(dbconf.idown, ref.idown)
+            self.assertEqual(dbconf.idoth, ref.idoth)
+            self.assertEqual(self.traf.iconf, ref.iconf)
+            cpa = np.column_stack((dbconf.latowncpa, dbconf.lonowncpa, dbconf.altowncpa,
+                                   dbconf.latintcpa, dbconf.lonintcpa, dbconf.altintcpa))
+            np.testing.assert_allclose(cpa, np.array(ref.cpa).reshape(-1, 6), rtol=1e-12)
+
+
+    def test_lists(self):
+        nlos = 0
+        for k in range(10):
+            self.step()
+            dbconf, ref = self.dbconf, self.ref
+            nlos += len(ref.LOSlist_now)
+            self.assertEqual(set(map(self.names, dbconf.conflist_now)),
+                             set(self.combis(ref.conflist_now)))
+            self.assertEqual(set(map(self.names, dbconf.LOSlist_now)),
+                             set(self.combis(ref.LOSlist_now)))
+            self.assertEqual(map(self.names, dbconf.conflist_exp),
+                             self.combis(ref.conflist_exp))
+
+            # Conflicts stored with the pair that was found first
+            self.assertEqual(set((self.ids[i], self.ids[j]) for i, j in
+                                 dbconf.conflist_all.values()),
+                             set(tuple(combi.split()) for combi in ref.conflist_all))
+
+            # Most severe intrusion per LOS
+            self.assertEqual(set(map(self.names, dbconf.LOSlist_all)),
+                             set(self.combis(ref.LOSlist_all)))
+            for key in dbconf.LOSlist_all:
+                k = self.combis(ref.LOSlist_all).index(self.names(key))
+                self.assertAlmostEqual(dbconf.LOSmaxsev[key], ref.LOSmaxsev[k])
+                self.assertAlmostEqual(dbconf.LOShmaxsev[key], ref.LOShmaxsev[k])
+                self.assertAlmostEqual(dbconf.LOSvmaxsev[key], ref.LOSvmaxsev[k])
+        self.assertTrue(nlos > 0)
+
+    def test_aporasas(self):
+        recovered = []
+        self.dbconf.recover = lambda idx: recovered.extend(idx)
+        for k in range(10):
+            self.step()
+            if k == 5:
+                # Conflicts of deleted aircraft are removed
+                self.traf.delete_batch(np.arange(0, 400, 7))
+            conflicts = [(self.ids[i], self.ids[j]) for i, j in
+                         self.dbconf.conflist_all.values()]
+            active, recover, remain = aporasasref(self.dbconf, conflicts)
+
+            del recovered[:]
+            self.dbconf.APorASAS()
+            self.assertEqual(set(np.where(self.traf.asasactive)[0]), active)
+            self.assertEqual(set(np.where(self.traf.inconflict)[0]), active)
+            self.assertEqual(set(recovered), recover)
+            self.assertEqual(set((self.ids[i], self.ids[j]) for i, j in
+                                 self.dbconf.conflist_all.values()), set(remain))
+
+
+class TestCompiled(unittest.TestCase):
+    def test_qdrpos(self):
+        # CPA positions with the compiled cgeo (bluesky/tools/ctools) against
+        # the numpy version of geo
+        from bluesky.traf import asas
+        if asas.geo is geo:
+            raise unittest.SkipTest('cgeo not built')
+        traf   = maketraffic(400, 50., True)
+        dbconf = traf.dbconf
+        dbconf.detectpairs()
+        dbconf.conflictlist(0.)
+        i    = dbconf.iown
+        tcpa = dbconf.confpairs['tcpa']
+        self.assertTrue(dbconf.nconf > 0)
+        lat, lon = geo.qdrpos(traf.lat[i], traf.lon[i], traf.trk[i],
+                              tcpa * traf.gs[i] / nm)
+        np.testing.assert_allclose(dbconf.latowncpa, lat, rtol=1e-12)
+        np.testing.assert_allclose(dbconf.lonowncpa, lon, rtol=1e-12)
+
+        # Scalar arguments
+        np.testing.assert_allclose(asas.geo.qdrpos(52., 4., 30., 10.),
+                                   geo.qdrpos(52., 4., 30., 10.), rtol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Difgame tests: the method reports that it can not be loaded without the
+discretisation functions of the learner, and the control lookup of all
+conflict pairs at once gives the same controls as the original pair by pair
+lookup (kept here as reference), on a synthetic control table.
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import sys
+import types
+import unittest
+import numpy as np
+
+from test_asas import maketraffic
+from bluesky.tools import geo
+from bluesky.tools.aero import nm
+from bluesky.traf import CDRmethods
+
+package  = CDRmethods.__name__
+learner  = package + ".Difgamelearnerfunctions"
+difgame  = package + ".Difgame"
+
+
+def unload():
+    """Remove Difgame and the stand-in of the learner functions"""
+    for name in [learner, difgame]:
+        sys.modules.pop(name, None)
+        if hasattr(CDRmethods, name.rsplit(".", 1)[-1]):
+            delattr(CDRmethods, name.rsplit(".", 1)[-1])
+    CDRmethods.modules.pop(difgame, None)
+
+
+class DbConf:
+    """Discretisation and control table of the Difgame method"""
+    def __init__(self, traf, rs):
+        self.traf     = traf
+        self.Rm       = 1000.
+        self.dn_state = [9, 9, 5, 5, 8]
+        # Bins of the states x, y, v_o, v_w and phi (cyclic)
+        states = [np.linspace(-20., 20., 9) * nm, np.linspace(-7.5, 32.5, 9) * nm,
+                  np.linspace(110., 170., 5), np.linspace(110., 170., 5),
+                  np.pi * (np.arange(8) / 4. - 1.)]
+        self.statebins = []
+        for p, s in enumerate(states):
+            mid = 0.5 * (s[1:] + s[:-1])
+            if p == 4:
+                step = s[1] - s[0]
+                self.statebins.append(np.concatenate(([s[0] - step / 2.], mid,
+                                                      [s[-1] + step / 2.])))
+            else:
+                self.statebins.append(np.concatenate(([-np.inf], mid, [np.inf])))
+        self.Controls = np.zeros(self.dn_state, dtype=[('own', int, 2),
+                                                       ('wrong', int, 2)])
+        self.Controls['own']   = rs.randint(0, 3, self.Controls['own'].shape)
+        self.Controls['wrong'] = rs.randint(0, 3, self.Controls['wrong'].shape)
+
+
+def difgameref(dbconf, qdrs, dists, own, wrn):
+    """Controls of ownship own in its conflict with wrn (original version)"""
+    traf = dbconf.traf
+    pirates = (traf.id[own] == "WRN")
+    if pirates:
+        own, wrn = wrn, own
+
+    dist = dists[own, wrn]
+    qdr  = qdrs[own, wrn]
+    phi  = np.radians((traf.trk[wrn] - traf.trk[own] + 180) % 360 - 180)
+    qdrrel = qdr - traf.trk[own]
+    x = np.sin(np.radians(qdrrel)) * dist
+    y = np.cos(np.radians(qdrrel)) * dist
+    state = [x, y, traf.gs[own], traf.adsbgs[wrn], phi]
+
+    dstate = []
+    for p in range(5):
+        whichbin = int(np.digitize([state[p]], dbconf.statebins[p])[0] - 1)
+        if p == 4:
+            whichbin = whichbin % dbconf.dn_state[p]
+        dstate.append(whichbin)
+    # Field 0: controls of the ownship, field 1: of the 'pirate'
+    horC = dbconf.Controls[tuple(dstate)][int(pirates)]
+
+    if np.abs(traf.alt[own] - traf.alt[wrn]) < dbconf.Rm:
+        verC = 0 if traf.alt[own] < traf.alt[wrn] else 2
+    else:
+        verC = 1
+    return np.append(horC, verC)
+
+
+class TestLoad(unittest.TestCase):
+    def setUp(self):
+        unload()
+
+    def test_missinglearner(self):
+        # Without the learner functions Difgame can not be selected
+        with self.assertRaises(ImportError) as cm:
+            CDRmethods.load("DIFGAME")
+        self.assertIn("Difgamelearnerfunctions", str(cm.exception))
+
+        traf = maketraffic(2, 52., True)
+        name = traf.dbconf.CRname
+        ok, msg = traf.dbconf.SetCRmethod("DIFGAME")
+        self.assertFalse(ok)
+        self.assertIn("DIFGAME not available", msg)
+        self.assertIn("Difgamelearnerfunctions", msg)
+        self.assertEqual(traf.dbconf.CRname, name)
+
+
+class TestControls(unittest.TestCase):
+    def setUp(self):
+        # Stand-in for the learner functions, which are only used in start()
+        unload()
+        sys.modules[learner] = types.ModuleType(learner)
+        setattr(CDRmethods, learner.rsplit(".", 1)[-1], sys.modules[learner])
+        self.Difgame = CDRmethods.load("DIFGAME")
+
+    def tearDown(self):
+        unload()
+
+    def test_difgamehor(self):
+        n    = 30
+        traf = maketraffic(n, 52., False, seed=3)
+        traf.lat[:] = 52. + 0.3 * np.random.RandomState(4).rand(n)
+        traf.lon[:] = 4. + 0.5 * np.random.RandomState(5).rand(n)
+        traf.adsblat[:] = traf.lat
+        traf.adsblon[:] = traf.lon
+        traf.gs[:] = 100. + 80. * np.random.RandomState(6).rand(n)
+        traf.adsbgs[:] = traf.gs
+        for i in range(0, n, 4):
+            traf.id[i] = "WRN"
+        dbconf = DbConf(traf, np.random.RandomState(7))
+
+        # Relative positions of all aircraft pairs, as in the full matrices
+        qdrs  = np.zeros((n, n))
+        dists = np.zeros((n, n))
+        for i in range(n):
+            for j in range(n):
+                if i != j:
+                    qdr, dist = geo.qdrdist(traf.lat[i], traf.lon[i],
+                                            traf.lat[j], traf.lon[j])
+                    qdrs[i, j]  = qdr
+                    dists[i, j] = dist * nm
+
+        own, wrn = np.where(~np.eye(n, dtype=bool))
+        C = self.Difgame.Difgamehor(dbconf, own, wrn, qdrs[own, wrn], dists[own, wrn])
+        self.assertEqual(C.shape, (len(own), 3))
+
+        ref = np.array([difgameref(dbconf, qdrs, dists, i, j)
+                        for i, j in zip(own, wrn)])
+        np.testing.assert_array_equal(C, ref)
+
+        # All control indices occur
+        self.assertEqual(set(C[:, 0]) | set(C[:, 1]), set([0, 1, 2]))
+        self.assertEqual(set(C[:, 2]), set([0, 1, 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
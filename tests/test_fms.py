@@ -0,0 +1,205 @@
+"""
+FMS tests: switching to the next waypoint for all aircraft at once through
+the waypoint table gives the same autopilot settings as the original loop
+over the aircraft (kept here as reference), for routes with Mach, CAS and
+no speed waypoints and with altitude constraints.
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+import warnings
+import numpy as np
+from math import tan, atan2, degrees, radians
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(root)
+sys.path.insert(0, root)
+sys.path.append('bluesky/tools/')
+
+from bluesky.traf import Traffic
+from bluesky.tools.aero import ft, kts, nm, g0, vmach2cas, vcas2tas
+from bluesky.tools.misc import degto180
+
+
+class Navdb:
+    fir = []
+
+
+def switchwpref(traf, i, qdr):
+    """Switch aircraft i to their next waypoint (original loop, with the
+       speed conversions of the vectorised atmosphere as in the rest of
+       the traffic update)"""
+    qdr = np.array(qdr)
+    for k, j in enumerate(i):
+        # No waypoints: drop LNAV (the original raised an IndexError)
+        if traf.route[j].nwp == 0:
+            traf.swlnav[j] = False
+            continue
+
+        lat, lon, alt, spd, xtoalt, toalt, lnavon, flyby = \
+            traf.route[j].getnextwp()
+
+        if not lnavon:
+            traf.swlnav[j] = False
+        if not traf.swlnav[j]:
+            traf.swvnav[j] = False
+
+        traf.actwplat[j]   = lat
+        traf.actwplon[j]   = lon
+        traf.actwpflyby[j] = int(flyby)
+
+        if alt >= 0.:
+            traf.actwpalt[j] = alt
+
+        if toalt >= 0. and traf.swvnav[j]:
+            if traf.alt[j] > toalt + 10. * ft:
+                steepness = 3000. * ft / (10. * nm)
+                traf.actwpalt[j] = toalt + xtoalt * steepness
+                traf.dist2vs[j]  = (traf.alt[j] - traf.actwpalt[j]) / steepness
+            elif traf.swvnav[j] and traf.alt[j] < toalt - 10. * ft:
+                traf.actwpalt[j] = toalt
+                traf.aalt[j]     = traf.actwpalt[j]
+                traf.dist2vs[j]  = 9999.
+            else:
+                traf.dist2vs[j] = -999.
+        else:
+            traf.dist2vs[j] = -999.
+
+        if traf.swvnav[j] and traf.actwpspd[j] > 0.0:
+            if traf.actwpspd[j] < 2.0:
+                traf.aspd[j] = vmach2cas(traf.actwpspd[j:j + 1], traf.alt[j:j + 1])[0]
+                traf.ama[j]  = traf.actwpspd[j]
+            else:
+                traf.aspd[j] = traf.actwpspd[j]
+                traf.ama[j]  = vcas2tas(np.array([spd]), traf.alt[j:j + 1])[0]
+
+        if spd > 0. and traf.swlnav[j] and traf.swvnav[j]:
+            traf.actwpspd[j] = spd
+        else:
+            traf.actwpspd[j] = -999.
+
+        turnrad = traf.tas[j] * traf.tas[j] / tan(traf.bank[j]) / g0 / nm
+
+        dy = (traf.actwplat[j] - traf.lat[j])
+        dx = (traf.actwplon[j] - traf.lon[j]) * traf.coslat[j]
+        qdr[k] = degrees(atan2(dx, dy))
+        wpdirfrom = traf.route[j].wpdirfrom[traf.route[j].iactwp]
+        traf.actwpturn[j] = traf.actwpflyby[j] * max(10., abs(turnrad *
+                            tan(radians(0.5 * degto180(qdr[k] - wpdirfrom)))))
+    return qdr
+
+
+# Waypoint speeds: Mach, CAS and no speed, altitudes: descent, climb, none
+speeds = [0.82, 280. * kts, -999., 0.78, 250. * kts]
+alts   = [10000. * ft, 36000. * ft, -999., 24000. * ft]
+
+
+def maketraffic(n):
+    traf = Traffic(Navdb())
+    traf.create_batch(['AC%04d' % i for i in range(n)], n * ['B744'],
+                      50. + np.arange(n) * 0.1, 4. + np.arange(n) * 0.1,
+                      n * [90.], 30000. * ft + np.arange(n) * 500. * ft,
+                      n * [250.])
+    for i in range(n):
+        # Aircraft 3 has no waypoints, but LNAV on (as with LNAV ON for all)
+        if i == 3:
+            traf.swlnav[i] = True
+            continue
+        for k in range(2 + i % 4):
+            traf.route[i].addwptStack(traf, i, 50.1 + 0.1 * i + 0.2 * k,
+                                      4.3 + 0.1 * i + 0.3 * k,
+                                      alts[(i + k) % len(alts)],
+                                      speeds[(i + 2 * k) % len(speeds)])
+        traf.swvnav[i] = (i % 5 != 0)
+    traf.actwpspd[:] = [speeds[i % len(speeds)] for i in range(n)]
+    traf.bank[:] = np.radians(25.)
+    return traf
+
+
+def state(traf):
+    names = ['swlnav', 'swvnav', 'actwplat', 'actwplon', 'actwpalt', 'actwpspd',
+             'actwpturn', 'actwpflyby', 'dist2vs', 'aspd', 'ama', 'aalt']
+    s = dict((name, np.array(getattr(traf, name))) for name in names)
+    s['iactwp'] = np.array([route.iactwp for route in traf.route])
+    return s
+
+
+class TestSwitch(unittest.TestCase):
+    def assertSame(self, traf, ref):
+        s, r = state(traf), state(ref)
+        for name in s:
+            np.testing.assert_allclose(s[name].astype(float), r[name].astype(float),
+                                       rtol=1e-12, err_msg=name)
+
+    def switch(self, traf, ref):
+        """Switch all aircraft with LNAV on in both traffic objects"""
+        i   = np.where(ref.swlnav)[0]
+        qdr = np.zeros(len(i))
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            result = traf.switchwp(i, qdr)
+        np.testing.assert_allclose(result, switchwpref(ref, i, qdr), rtol=1e-12)
+        self.assertSame(traf, ref)
+
+    def test_switch(self):
+        n    = 24
+        traf = maketraffic(n)
+        ref  = maketraffic(n)
+        self.assertSame(traf, ref)
+
+        for step in range(3):
+            self.switch(traf, ref)
+
+        # Route changes reach the waypoint table, also for deleted aircraft
+        # and when the table is compacted
+        for t in [traf, ref]:
+            t.delete_batch([1, 5])
+            for i in range(0, t.ntraf, 3):
+                t.route[i].addwptStack(t, i, 51.5, 5.5 + 0.1 * i, 20000. * ft, 0.8)
+            t.route[9].delwpt(t.route[9].wpname[4])
+            t.swlnav[:] = True
+
+        for step in range(6):
+            self.switch(traf, ref)
+        self.assertFalse(traf.swlnav.any())
+
+    def assertTable(self, traf):
+        """Rows of each route in the waypoint table equal its waypoints"""
+        traf.updatewptable()
+        for i in range(traf.ntraf):
+            route = traf.route[i]
+            self.assertEqual(traf.rtenwp[i], route.nwp)
+            if route.nwp == 0:
+                continue
+            rows  = traf.wptable[traf.rtewp0[i]:traf.rtewp0[i] + traf.rtenwp[i]]
+            self.assertEqual(list(rows['lat']), route.wplat)
+            self.assertEqual(list(rows['spd']), route.wpspd)
+            self.assertEqual(list(rows['dirfrom']), route.wpdirfrom)
+
+    def test_table(self):
+        traf = maketraffic(10)
+        self.assertTable(traf)
+        self.assertEqual(traf.rtenwp[3], 0)
+
+        # Changed routes are added at the end, until the table is compacted
+        compacted = False
+        for k in range(40):
+            i  = (3 * k) % traf.ntraf
+            n0 = traf.nwptable
+            traf.route[i].addwptStack(traf, i, 52. + 0.01 * k, 5., -999., 0.8)
+            self.assertTable(traf)
+            compacted = compacted or traf.nwptable < n0
+        self.assertTrue(compacted)
+        self.assertLessEqual(len(traf.wptable), 4 * traf.rtenwp.sum())
+
+        # Active waypoint of the route is stored in the traffic arrays
+        traf.route[4].iactwp = 2
+        self.assertEqual(traf.iactwp[4], 2)
+        traf.delete_batch([0])
+        self.assertEqual(traf.route[3].iactwp, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+"""
+Conflict resolution tests: the pair resolution of Eby and MVP on all
+conflict pairs at once must give the same change in velocity, and MVP the same
+ASAS track, speed and vertical speed, as the original pair by pair loops,
+which are kept here as reference. The ASAS altitude only
+follows the first detected conflict of each aircraft.
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import unittest
+import numpy as np
+
+from test_asas import maketraffic
+from bluesky.tools.aero import ft, vtas2eas, veas2tas
+from bluesky.traf.CDRmethods import Eby, MVP
+from bluesky.traf.asas import confdtype
+
+
+def mvpref(dbconf, pair, swintrusion=True, swcapvs=True):
+    """MVP for one conflict pair (original version, the switches as in MVP)"""
+    traf = dbconf.traf
+    id1, id2 = pair['i'], pair['j']
+    dist = pair['dist']
+    qdr  = np.radians(pair['qdr'])
+    d  = np.array([np.sin(qdr) * dist, np.cos(qdr) * dist,
+                   traf.alt[id2] - traf.alt[id1]])
+    t1 = np.radians(traf.trk[id1])
+    t2 = np.radians(traf.trk[id2])
+    v1 = np.array([np.sin(t1) * traf.tas[id1], np.cos(t1) * traf.tas[id1], traf.vs[id1]])
+    v2 = np.array([np.sin(t2) * traf.tas[id2], np.cos(t2) * traf.tas[id2], traf.vs[id2]])
+    v  = v2 - v1
+    tcpa = pair['tcpa']
+
+    dcpa  = d + v * tcpa
+    dabsH = np.sqrt(dcpa[0] * dcpa[0] + dcpa[1] * dcpa[1])
+    dabsV = dcpa[2]
+    iH = dbconf.Rm - dabsH
+    iV = dbconf.dhm - dabsV
+    if swintrusion and (d[0] < dbconf.Rm or d[1] < dbconf.Rm):
+        iH = dbconf.Rm
+    if dabsH <= 10.:
+        dabsH = 10.
+        dcpa[0] = 10.
+        dcpa[1] = 10.
+    if dabsV <= 10.:
+        dabsV = 10.
+        if dbconf.swresodir == "VERT":
+            dcpa[2] = 10.
+
+    dv1 = (iH * dcpa[0]) / (abs(tcpa) * dabsH)
+    dv2 = (iH * dcpa[1]) / (abs(tcpa) * dabsH)
+    dv3 = (iV * dcpa[2]) / (abs(tcpa) * dabsV)
+    if swcapvs and dbconf.swresodir != "VERT":
+        dv3 = np.maximum(-200. / 60. * ft, np.minimum(200. / 60. * ft, dv3))
+    dv = np.array([dv1, dv2, dv3])
+
+    if dbconf.Rm < dist and dabsH < dist:
+        erratum = np.cos(np.arcsin(dbconf.Rm / dist) - np.arcsin(dabsH / dist))
+        dv = np.array([dv[0] / erratum, dv[1] / erratum, dv[2]])
+    return dv
+
+
+def ebyref(dbconf, pair):
+    """Eby for one conflict pair (original version)"""
+    traf = dbconf.traf
+    id1, id2 = pair['i'], pair['j']
+    dist = pair['dist']
+    qdr  = np.radians(pair['qdr'])
+    d  = np.array([np.sin(qdr) * dist, np.cos(qdr) * dist,
+                   traf.alt[id2] - traf.alt[id1]])
+    t1 = np.radians(traf.trk[id1])
+    t2 = np.radians(traf.trk[id2])
+    v1 = np.array([np.sin(t1) * traf.tas[id1], np.cos(t1) * traf.tas[id1], traf.vs[id1]])
+    v2 = np.array([np.sin(t2) * traf.tas[id2], np.cos(t2) * traf.tas[id2], traf.vs[id2]])
+    v  = v2 - v1
+
+    R2 = dbconf.Rm**2
+    d2 = np.dot(d, d)
+    v2 = np.dot(v, v)
+    dv = np.dot(d, v)
+    a = R2 * v2 - dv**2
+    b = 2 * dv * (R2 - d2)
+    c = R2 * d2 - d2**2
+    discrim = max(b**2 - 4 * a * c, 0.)
+    time1 = (-b + np.sqrt(discrim)) / (2 * a)
+    time2 = (-b - np.sqrt(discrim)) / (2 * a)
+    tstar = min(abs(time1), abs(time2))
+
+    drelstar = d + v * tstar
+    dstarabs = np.linalg.norm(drelstar)
+    dif = 10. - dstarabs
+    if dif > 0:
+        vperp = np.array([-v[1], v[0], 0])
+        drelstar += dif * vperp / np.linalg.norm(vperp)
+        dstarabs = np.linalg.norm(drelstar)
+    i = dbconf.Rm - dstarabs
+    return i * drelstar / (dstarabs * tstar)
+
+
+def asasref(dbconf, dv):
+    """ASAS track, speed and vertical speed from dv (original MVP.resolve)"""
+    traf = dbconf.traf
+    dv   = np.transpose(dv)
+    trkrad = np.radians(traf.trk)
+    v = np.array([np.sin(trkrad) * traf.tas, np.cos(trkrad) * traf.tas, traf.vs])
+    if dbconf.swresodir == "HORIZ":
+        dv[2, :] = 0.
+    newv = dv + v
+    if dbconf.swresodir == "VERT":
+        newtrack = (np.arctan2(v[0, :], v[1, :]) * 180 / np.pi) % 360
+    else:
+        newtrack = (np.arctan2(newv[0, :], newv[1, :]) * 180 / np.pi) % 360
+    newgs  = np.sqrt(newv[0, :]**2 + newv[1, :]**2)
+    neweas = vtas2eas(newgs, traf.alt)
+    neweascapped = np.maximum(dbconf.vmin, np.minimum(dbconf.vmax, neweas))
+    vscapped = np.maximum(dbconf.vsmin, np.minimum(dbconf.vsmax, newv[2, :]))
+    return newtrack, veas2tas(neweascapped, traf.alt), vscapped
+
+
+def resolveref(dbconf, kernel, swprio):
+    """Change in velocity per aircraft, pair by pair (original loop)"""
+    traf = dbconf.traf
+    dv   = np.zeros((traf.ntraf, 3))
+    if traf.ADSBtrunc or traf.ADSBtransnoise:
+        for pair in dbconf.confpairs:
+            dv[pair['i']] -= kernel(dbconf, pair)
+        return dv
+
+    for pair in dbconf.uniquepairs():
+        id1, id2 = pair['i'], pair['j']
+        dvpair = kernel(dbconf, pair)
+        vs1 = abs(traf.vs[id1])
+        vs2 = abs(traf.vs[id2])
+        if swprio and vs1 < 0.1 and vs2 > 0.1:
+            dv[id2] += dvpair
+        elif swprio and vs2 < 0.1 and vs1 > 0.1:
+            dv[id1] -= dvpair
+        else:
+            dv[id1] -= dvpair
+            dv[id2] += dvpair
+    return dv
+
+
+class TestResolvePairs(unittest.TestCase):
+    def setUp(self):
+        self.traf   = maketraffic(400, 50., True)
+        self.dbconf = self.traf.dbconf
+        self.dbconf.swcdetect = False
+
+    def check(self, kernel, ref, swprio):
+        self.dbconf.detectpairs()
+        self.assertTrue(len(self.dbconf.confpairs) > 0)
+        dv = self.dbconf.resolvepairs(kernel)
+        np.testing.assert_allclose(dv, resolveref(self.dbconf, ref, swprio),
+                                   rtol=1e-9, atol=1e-9)
+
+    def test_mvp(self):
+        for swresodir in ["COMB", "HORIZ", "VERT"]:
+            self.dbconf.swresodir = swresodir
+            self.check(MVP.MVP, mvpref, False)
+
+    def test_mvp_prio(self):
+        self.dbconf.swprio = True
+        self.check(MVP.MVP, mvpref, True)
+
+    def test_eby(self):
+        self.check(Eby.Eby_straight, ebyref, False)
+
+    def test_eby_prio(self):
+        # Eby does not use the priority rules
+        self.dbconf.swprio = True
+        self.dbconf.detectpairs()
+        Eby.resolve(self.dbconf)
+        self.dbconf.swprio = False
+        asashdg = self.traf.asashdg.copy()
+        Eby.resolve(self.dbconf)
+        np.testing.assert_array_equal(self.traf.asashdg, asashdg)
+
+    def test_mvp_switches(self):
+        # Without full intrusion and vertical speed cap, as used by MVP_LAY
+        self.check(lambda dbconf, pairs: MVP.MVP(dbconf, pairs, False, False),
+                   lambda dbconf, pair: mvpref(dbconf, pair, False, False), False)
+
+    def test_mvp_resolve(self):
+        # ASAS track, speed and vertical speed of MVP for all aircraft
+        for swresodir in ["COMB", "HORIZ", "VERT"]:
+            self.dbconf.swresodir = swresodir
+            self.dbconf.detectpairs()
+            MVP.resolve(self.dbconf)
+            ref = asasref(self.dbconf, resolveref(self.dbconf, mvpref, False))
+            for name, value in zip(['asashdg', 'asasspd', 'asasvsp'], ref):
+                np.testing.assert_allclose(getattr(self.traf, name), value,
+                                           rtol=1e-9, atol=1e-9, err_msg=name)
+            if swresodir == "COMB":
+                self.assertGreater(np.max(np.abs(self.traf.asashdg - self.traf.trk)), 1.)
+
+    def test_asymmetric(self):
+        # With ADS-B truncation each aircraft solves its own conflicts
+        self.traf.ADSBtrunc = True
+        self.traf.adsblat[:] += 0.01
+        self.check(MVP.MVP, mvpref, False)
+        self.check(Eby.Eby_straight, ebyref, False)
+
+
+class TestAsasAlt(unittest.TestCase):
+    def test_tinconf(self):
+        # asasalt is the altitude at the first conflict an aircraft enters as
+        # ownship, only detected conflicts within 1.2 x the lookahead count
+        traf   = maketraffic(5, 50., True)
+        dbconf = traf.dbconf
+        tlook  = dbconf.dtlookahead
+        traf.aalt[:]    = traf.alt
+        traf.vs[:]      = [2., -3., 1., 4., 5.]
+        traf.asasalt[:] = -1.
+        dbconf.confpairs = np.zeros(5, dtype=confdtype)
+        dbconf.confpairs['i']   = [0, 0, 1, 2, 4]
+        dbconf.confpairs['j']   = [1, 2, 0, 4, 2]
+        dbconf.confpairs['tin'] = [30., 10., 40., 1.25 * tlook, 1.25 * tlook]
+        np.testing.assert_array_equal(dbconf.tinconfmin(),
+                                      [10., 40., 1.25 * tlook, 1e8, 1.25 * tlook])
+
+        alt = traf.alt.copy()
+        traf.aalt[4] = alt[4] + 1000. * ft
+        dbconf.applyresolution(np.zeros((5, 3)))
+        np.testing.assert_array_equal(traf.asasalt, [alt[0] + 2. * 10.,
+                                                     alt[1] - 3. * 40.,
+                                                     -1., -1., traf.aalt[4]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Scheduler tests: update rates and aircraft subsets of traffic sub-models
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, 'bluesky', 'traf'))
+
+from scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    def run_until(self, sched, t0, t1, dt=0.5):
+        """Aircraft slices returned by due() per simulation time"""
+        result = []
+        t = t0
+        while t <= t1 + 1e-9:
+            result.append((t, sched.due('FMS', t)))
+            t += dt
+        return result
+
+    def test_rates(self):
+        sched = Scheduler()
+        sched.add('FMS', 1.0, 0., cansplit=True)
+        every = slice(0, None, 1)
+        self.assertEqual(self.run_until(sched, 0., 2.),
+                         [(0., every), (0.5, None), (1.0, every), (1.5, None),
+                          (2.0, every)])
+
+        # Two subsets: every 0.5 s the next half of the aircraft
+        self.assertEqual(sched.setrate('FMS', 1.0, None, 2)[0], True)
+        self.assertEqual(self.run_until(sched, 2.5, 3.5),
+                         [(2.5, slice(0, None, 2)), (3.0, slice(1, None, 2)),
+                          (3.5, slice(0, None, 2))])
+
+        # Slower rate, all aircraft: next call on the grid of the new rate
+        sched.setrate('FMS', 2.0, None, 1)
+        self.assertEqual(self.run_until(sched, 4.0, 6.0),
+                         [(4.0, every), (4.5, None), (5.0, None), (5.5, None),
+                          (6.0, every)])
+
+        # Phase offset
+        sched.setrate('FMS', 1.0, 0.5)
+        self.assertEqual(self.run_until(sched, 6.5, 7.5),
+                         [(6.5, every), (7.0, None), (7.5, every)])
+
+    def test_restart(self):
+        # Simulation time back to zero (reset): task is due again at once
+        sched = Scheduler()
+        sched.add('FMS', 1.0, 0.)
+        self.run_until(sched, 0., 10.)
+        self.assertEqual(sched.due('FMS', 0.), slice(0, None, 1))
+        self.assertEqual(sched.due('FMS', 0.5), None)
+
+    def test_errors(self):
+        sched = Scheduler()
+        sched.add('FMS', 1.0, 0., cansplit=True)
+        sched.add('ASAS', 1.0, 0.)
+        self.assertEqual(sched.setrate('PERF', 1.0)[0], False)
+        self.assertEqual(sched.setrate('ASAS', 0.)[0], False)
+        self.assertEqual(sched.setrate('ASAS', 1.0, 0., 2)[0], False)
+        self.assertEqual(sched.setrate('fms', 2.0)[0], True)
+
+
+if __name__ == '__main__':
+    unittest.main()
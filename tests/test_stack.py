@@ -0,0 +1,100 @@
+"""
+Command stack tests: batch creation of aircraft with CRE, commands referring
+to aircraft by call sign
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(root)
+sys.path.insert(0, root)
+sys.path.append('bluesky/tools/')
+
+from bluesky.traf import Traffic
+from bluesky.stack import Commandstack
+
+
+class Navdb:
+    fir = []
+
+    def getapidx(self, name):
+        return -1
+
+    def getwpidx(self, name, *args):
+        return -1
+
+
+class Screen:
+    """Screen that keeps the echoed text"""
+    def __init__(self):
+        self.text = []
+
+    def echo(self, text):
+        self.text.append(text)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class Sim:
+    """Simulation (and its parts) that does nothing"""
+    simt = 0.
+
+    def __getattr__(self, name):
+        return Sim()
+
+    def __call__(self, *args, **kwargs):
+        return None
+
+
+class TestCreate(unittest.TestCase):
+    def setUp(self):
+        self.traf = Traffic(Navdb())
+        self.scr  = Screen()
+        self.sim  = Sim()
+        self.stk  = Commandstack(self.sim, self.traf, self.scr)
+        self.stk.cmdstack = []
+        self.scr.text     = []
+
+    def process(self, cmds):
+        self.stk.stack(cmds)
+        self.stk.process(self.sim, self.traf, self.scr)
+
+    def test_batch(self):
+        self.process("CRE KL1,B744,52,4,90,FL100,250;CRE KL2,A320,52.1,4,90,FL100,250;"
+                     "KL1 HDG 180;CRE KL3,B744,52,4,90,FL100,0.8")
+        self.assertEqual(list(self.traf.id), ['KL1', 'KL2', 'KL3'])
+        self.assertEqual(self.traf.ahdg[0], 180.)
+        self.assertEqual(self.traf.id2idx('KL3'), 2)
+
+    def test_position(self):
+        # Position of an aircraft created earlier in the same batch
+        self.process("CRE KL1,B744,52,4,90,FL100,250;CRE KL2,A320,KL1,90,FL100,250")
+        self.assertEqual(list(self.traf.id), ['KL1', 'KL2'])
+        self.assertEqual(list(self.traf.lat), [52., 52.])
+        self.assertEqual(list(self.traf.lon), [4., 4.])
+
+    def test_duplicate(self):
+        # Aircraft given twice in a batch is skipped, error with the command
+        self.process("CRE KL1,B744,52,4,90,FL100,250;CRE KL1,A320,50,1,90,FL100,250;"
+                     "ECHO next")
+        self.assertEqual(list(self.traf.id), ['KL1'])
+        self.assertEqual(self.traf.type[0], 'B744')
+        self.assertEqual(self.scr.text, ['CRE:KL1 already exists.', 'next'])
+
+    def test_callsign(self):
+        # DEL and call sign before the command, looked up in the call sign index
+        self.process("CRE KL1,B744,52,4,90,FL100,250;CRE KL2,A320,52.1,4,90,FL100,250;"
+                     "CRE KL3,A320,52.2,4,90,FL100,250")
+        self.process("DEL KL1;KL3 HDG 180;DEL KL9;KL2")
+        self.assertEqual(list(self.traf.id), ['KL2', 'KL3'])
+        self.assertEqual(self.traf.idindex, {'KL2': 0, 'KL3': 1})
+        self.assertEqual(self.traf.ahdg[1], 180.)
+        self.assertEqual(self.scr.text, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Swarm tests: the resolution on the neighbour lists gives the same ASAS
+track, speed and vertical speed as the original version on the full
+matrices of all aircraft pairs (kept here as reference), and the neighbour
+query finds the same neighbours as these matrices.
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import unittest
+import numpy as np
+
+from test_asas import maketraffic, densepairs
+from bluesky.traf.CDRmethods import MVP, Swarm
+
+
+def swarmref(dbconf):
+    """ASAS track, speed and vertical speed of Swarm on the matrices of the
+       dense detection (original version)"""
+    tr = dbconf.traf
+    dx = dbconf.dx
+    dy = dbconf.dy - np.eye(tr.ntraf) * 1e9
+    close = np.logical_and(dx**2 + dy**2 < dbconf.Rswarm**2,
+                           np.abs(dbconf.dalt) < dbconf.dhswarm)
+    trkdif = tr.trk.reshape(1, tr.ntraf) - tr.trk.reshape(tr.ntraf, 1)
+    dtrk = (trkdif + 180) % 360 - 180
+    samedirection = np.abs(dtrk) < 90
+    Swarming = np.logical_or(np.logical_and(close, samedirection),
+                             np.eye(tr.ntraf, dtype='bool'))
+
+    MVP.resolve(dbconf)
+
+    ca_trk = tr.asasactive * tr.asashdg + (1 - tr.asasactive) * tr.ahdg
+    ca_cas = tr.asasactive * tr.asasspd + (1 - tr.asasactive) * tr.aspd
+    ca_vs  = tr.asasactive * tr.asasvsp + (1 - tr.asasactive) * tr.avs
+
+    hspeed = np.ones((tr.ntraf, tr.ntraf)) * tr.cas
+    va_cas = np.average(hspeed, axis=1, weights=Swarming)
+    vspeed = np.ones((tr.ntraf, tr.ntraf)) * tr.vs
+    va_vs  = np.average(vspeed, axis=1, weights=Swarming)
+    va_trk = tr.trk + np.average(dtrk, axis=1, weights=Swarming)
+
+    dxflock = dx + np.eye(tr.ntraf) * dbconf.u / 100.
+    dyflock = dy + np.eye(tr.ntraf) * dbconf.v / 100.
+    fc_dx = np.average(dxflock, axis=1, weights=Swarming)
+    fc_dy = np.average(dyflock, axis=1, weights=Swarming)
+    z = np.ones((tr.ntraf, tr.ntraf)) * tr.alt
+    fc_dz = np.average(z, axis=1, weights=Swarming) - tr.alt
+
+    fc_trk = np.degrees(np.arctan2(fc_dx, fc_dy))
+    fc_cas = tr.cas
+    ttoreach = np.sqrt(fc_dx**2 + fc_dy**2) / fc_cas
+    fc_vs = np.where(ttoreach == 0, 0, fc_dz / ttoreach)
+
+    trks = np.array([ca_trk, va_trk, fc_trk])
+    cass = np.array([ca_cas, va_cas, fc_cas])
+    vss  = np.array([ca_vs, va_vs, fc_vs])
+    trksrad = np.radians(trks)
+    Swarmvx = np.average(cass * np.sin(trksrad), axis=0, weights=dbconf.Swarmweights)
+    Swarmvy = np.average(cass * np.cos(trksrad), axis=0, weights=dbconf.Swarmweights)
+    Swarmhdg = np.degrees(np.arctan2(Swarmvx, Swarmvy))
+    Swarmcas = np.average(cass, axis=0, weights=dbconf.Swarmweights)
+    Swarmvs  = np.average(vss, axis=0, weights=dbconf.Swarmweights)
+    return (Swarmhdg, np.maximum(dbconf.vmin, np.minimum(dbconf.vmax, Swarmcas)),
+            Swarmvs, Swarming)
+
+
+class TestSwarm(unittest.TestCase):
+    def check(self, lat0):
+        traf   = maketraffic(500, lat0, False)
+        # Dense traffic, so that aircraft have several neighbours
+        traf.lat[:] = lat0 + 0.3 * (traf.lat - lat0)
+        traf.lon[:] = traf.lon[0] + 0.3 * (traf.lon - traf.lon[0])
+        traf.adsblat[:] = traf.lat
+        traf.adsblon[:] = traf.lon
+        dbconf = traf.dbconf
+        Swarm.start(dbconf)
+        dbconf.swcdetect = False
+        traf.asasactive[::2] = True
+
+        # Conflict pairs and matrices of the dense detection for both
+        densepairs(dbconf)
+        asasactive = traf.asasactive.copy()
+        hdg, spd, vs, swarming = swarmref(dbconf)
+        traf.asasactive[:] = asasactive
+        Swarm.resolve(dbconf)
+
+        np.testing.assert_allclose(traf.asashdg, hdg, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(traf.asasspd, spd, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(traf.asasvsp, vs, rtol=1e-9, atol=1e-9)
+        np.testing.assert_array_equal(traf.asasalt, np.sign(vs) * 1e5)
+        self.assertTrue(traf.asasactive.all())
+
+        # Aircraft with (same direction) neighbours
+        self.assertGreater(np.count_nonzero(swarming.sum(axis=1) > 2), 50)
+
+    def test_swarm(self):
+        self.check(50.)
+
+    def test_highlatitude(self):
+        self.check(75.)
+
+    def test_neighbours(self):
+        traf   = maketraffic(500, 50., False)
+        dbconf = traf.dbconf
+        Swarm.start(dbconf)
+        densepairs(dbconf)
+        i, j, qdr, dist = dbconf.neighbours(dbconf.Rswarm, dbconf.dhswarm)
+
+        close = (dbconf.dx**2 + (dbconf.dy - np.eye(traf.ntraf) * 1e9)**2 <
+                 dbconf.Rswarm**2) * (np.abs(dbconf.dalt) < dbconf.dhswarm)
+        np.fill_diagonal(close, False)
+        self.assertEqual(sorted(zip(i, j)), zip(*np.where(close)))
+        self.assertTrue(len(i) > 0)
+        self.assertTrue(np.all(dist < dbconf.Rswarm))
+
+
+if __name__ == '__main__':
+    unittest.main()
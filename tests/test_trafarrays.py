@@ -0,0 +1,73 @@
+"""
+TrafArrays tests: registry and storage of per-aircraft data
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+import numpy as np
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, 'bluesky', 'traf'))
+
+from trafarrays import TrafArrays
+
+
+class Owner:
+    pass
+
+
+class TestTrafArrays(unittest.TestCase):
+    def setUp(self):
+        self.owner  = Owner()
+        self.arrays = TrafArrays(self.owner)
+        self.arrays.add(self.owner, 'x')
+        self.arrays.add(self.owner, 'k', int, -1)
+        self.arrays.addlist(self.owner, 'id', '')
+        self.arrays.addlist(self.owner, 'route', list)
+
+    def fill(self, n):
+        start = self.arrays.grow(n)
+        self.owner.x[start:] = np.arange(start, start + n)
+        self.owner.id[start:] = ['AC%d' % i for i in range(start, start + n)]
+        return start
+
+    def test_grow(self):
+        self.assertEqual(self.fill(3), 0)
+        self.assertEqual(self.fill(100), 3)
+        self.assertEqual(len(self.owner.x), 103)
+        self.assertTrue(self.arrays.capacity >= 103)
+        self.assertEqual(list(self.owner.x), range(103))
+        self.assertEqual(list(self.owner.k), 103 * [-1])
+        self.assertEqual(len(self.owner.route), 103)
+        self.assertFalse(self.owner.route[0] is self.owner.route[1])
+
+    def test_delete(self):
+        self.fill(10)
+        self.arrays.delete(3)
+        self.assertEqual(list(self.owner.x), [0, 1, 2, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(self.owner.id[3], 'AC4')
+
+        self.arrays.delete(np.array([0, 8, 4]))
+        self.assertEqual(list(self.owner.x), [1, 2, 4, 6, 7, 8])
+        self.assertEqual(self.owner.id, ['AC1', 'AC2', 'AC4', 'AC6', 'AC7', 'AC8'])
+        self.assertEqual(len(self.owner.k), 6)
+        self.assertEqual(len(self.owner.route), 6)
+
+    def test_sync(self):
+        # Columns replaced by the owner are kept when aircraft are added
+        # or deleted
+        self.fill(5)
+        self.owner.x = self.owner.x + 10.
+        self.fill(1)
+        self.assertEqual(list(self.owner.x), [10, 11, 12, 13, 14, 5])
+
+        self.owner.x = self.owner.x * 2.
+        self.arrays.delete(0)
+        self.assertEqual(list(self.owner.x), [22, 24, 26, 28, 10])
+        self.assertTrue(self.owner.x.base is self.arrays.buffers[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
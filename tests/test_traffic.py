@@ -0,0 +1,252 @@
+"""
+Traffic tests: creating and deleting aircraft (also in the registered
+variables of the sub-models), ADS-B state, autopilot and kinematics in place
+and the accuracy of the mixed precision mode
+
+Run from the root of BlueSky with: python -m unittest discover -s tests
+"""
+import os
+import random
+import sys
+import unittest
+import numpy as np
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(root)
+sys.path.insert(0, root)
+sys.path.append('bluesky/tools/')
+
+from bluesky import settings
+from bluesky.traf import Traffic
+from bluesky.tools.aero import ft, kts, nm
+from bluesky.tools.misc import degto180
+
+
+class Navdb:
+    fir = []
+
+
+def maketraffic(n):
+    traf = Traffic(Navdb())
+    traf.create_batch(['AC%04d' % i for i in range(n)], n * ['B744'],
+                      50. + np.arange(n) * 0.1, 4. + np.arange(n) * 0.1,
+                      n * [90.], n * [30000. * ft], n * [250.])
+    return traf
+
+
+class TestCreateDelete(unittest.TestCase):
+    def assertIndex(self, traf, ids):
+        """Aircraft ids in this order, call sign dictionary consistent"""
+        self.assertEqual(list(traf.id), ids)
+        self.assertEqual(traf.ntraf, len(ids))
+        self.assertEqual(traf.idindex, dict(zip(ids, range(len(ids)))))
+        self.assertEqual(list(traf.ids2idx(ids)), range(len(ids)))
+
+    def test_create(self):
+        traf = maketraffic(3)
+        # Existing aircraft and aircraft given twice are skipped
+        result = traf.create_batch(['AC0001', 'KL1', 'kl1', 'KL2'], 4 * ['B744'],
+                                   [1., 2., 3., 4.], 4 * [0.], 4 * [0.],
+                                   4 * [1000.], 4 * [250.])
+        self.assertEqual(result[0], False)
+        self.assertIndex(traf, ['AC0000', 'AC0001', 'AC0002', 'KL1', 'KL2'])
+        self.assertEqual(list(traf.lat[3:]), [2., 4.])
+        self.assertEqual(list(traf.uid), range(5))
+
+    def test_lookup(self):
+        traf = maketraffic(3)
+        self.assertEqual(traf.id2idx('ac0001'), 1)
+        self.assertEqual(traf.id2idx('KL1'), -1)
+        self.assertEqual(list(traf.ids2idx(['AC0002', 'KL1', 'ac0000'])), [2, -1, 0])
+
+    def test_delete(self):
+        traf = maketraffic(8)
+        ids  = ['AC%04d' % i for i in range(8)]
+        lat  = list(traf.lat)
+        self.assertTrue(traf.delete('ac0002'))
+        self.assertFalse(traf.delete('AC0002'))
+        del ids[2], lat[2]
+        self.assertIndex(traf, ids)
+        self.assertEqual(list(traf.lat), lat)
+
+        traf.delete_batch(np.array([6, 0, 3]))
+        ids = [ids[i] for i in [1, 2, 4, 5]]
+        lat = [lat[i] for i in [1, 2, 4, 5]]
+        self.assertIndex(traf, ids)
+        self.assertEqual(list(traf.lat), lat)
+
+        # Unique numbers of deleted aircraft are not found
+        self.assertEqual(list(traf.uids2idx([0, 1, 3, 4, 5, 6, 7])),
+                         [-1, 0, 1, -1, 2, 3, -1])
+
+
+class TestRegistry(unittest.TestCase):
+    def test_submodels(self):
+        # Creating and deleting aircraft is done for the registered variables
+        # of traffic and of its sub-models (performance and ASAS) at once
+        types = ['B744', 'A320']
+        traf  = Traffic(Navdb())
+        traf.create_batch(['AC%d' % i for i in range(6)], 3 * types,
+                          range(6), 6 * [4.], 6 * [0.], 6 * [3000.], 6 * [250.])
+        traf.asasactive[2] = True
+        traf.perf.ESF[:]   = 0.5
+        traf.delete_batch([0, 3])
+        traf.create_batch(['KL1', 'KL2'], types, [7., 8.], 2 * [4.], 2 * [0.],
+                          2 * [3000.], 2 * [250.])
+        ids = ['AC1', 'AC2', 'AC4', 'AC5', 'KL1', 'KL2']
+        self.assertEqual(traf.id, ids)
+        self.assertEqual(traf.type, ['A320', 'B744', 'B744', 'A320', 'B744', 'A320'])
+
+        owners = set(owner.__class__.__name__ for owner, name, default
+                     in traf.arrays.columns)
+        self.assertEqual(owners, set(['Traffic', 'Perf']))
+        for owner, name, default in traf.arrays.columns + traf.arrays.lists:
+            self.assertEqual(len(getattr(owner, name)), 6, name)
+
+        # Data of the remaining aircraft is kept, new ones get the defaults
+        self.assertEqual(list(traf.asasactive), [False, True] + 4 * [False])
+        self.assertEqual(list(traf.perf.ESF), 4 * [0.5] + 2 * [1.])
+        self.assertEqual(traf.iconf, 6 * [-1])
+        self.assertFalse(traf.inconflict.any())
+
+        # Performance data per aircraft as when created in this order
+        ref = Traffic(Navdb())
+        ref.create_batch(ids, [traf.type[i] for i in range(6)], range(6), 6 * [4.], 6 * [0.],
+                         6 * [3000.], 6 * [250.])
+        for name in ['coeffidxlist', 'mass', 'Sref', 'vmo', 'mmo', 'etype', 'rThr']:
+            np.testing.assert_array_equal(getattr(traf.perf, name),
+                                          getattr(ref.perf, name), name)
+        self.assertEqual(traf.engines, ref.engines)
+
+
+class TestADSB(unittest.TestCase):
+    def test_noise(self):
+        # Without truncation the ADS-B state is the actual state. After NOISE
+        # ON it is only updated once per trunctime.
+        traf = maketraffic(5)
+        lon  = traf.lon.copy()
+        traf.update(0.5, 0.5)
+        self.assertTrue(np.all(traf.lon > lon))
+        np.testing.assert_array_equal(traf.adsblon, lon)
+        traf.setNoise(True)
+        self.assertFalse(traf.adsblon is traf.lon)
+        self.assertTrue(traf.adsblon is traf.arrays.views[
+            traf.arrays.find(traf.arrays.columns, traf, 'adsblon')])
+        # Broadcast when adsbtime passes trunctime, of the state before the step
+        traf.adsbtime[:] = 0.
+        adsblon = traf.adsblon.copy()
+        traf.update(1.0, 0.5)
+        traf.update(1.5, 0.5)
+        np.testing.assert_array_equal(traf.adsblon, adsblon)
+        lon = traf.lon.copy()
+        traf.update(2.0, 0.5)
+        self.assertTrue(np.all(traf.lon > lon))
+        np.testing.assert_array_equal(traf.adsblon, lon)
+
+
+class TestInplace(unittest.TestCase):
+    def simulate(self, inplace, noise, nsteps=400):
+        """Registered state after nsteps updates, with or without the update in
+           place, per owner class and variable name"""
+        default = settings.inplace_kinematics
+        settings.inplace_kinematics = inplace
+        try:
+            random.seed(1)
+            np.random.seed(1)
+            traf = Traffic(Navdb())
+        finally:
+            settings.inplace_kinematics = default
+        traf.mcreate(200, 'B744', None, None, None, (50., 52., 2., 6.))
+        traf.setNoise(noise)
+
+        # Climbs, descents, speed changes, above and below the crossover
+        n = traf.ntraf
+        traf.aalt[:] = traf.alt + np.random.uniform(-3000., 3000., n) * ft
+        traf.aspd[:] = np.random.uniform(200., 350., n) * kts
+        traf.ahdg[:] = np.random.uniform(0., 360., n)
+        traf.delete_batch(np.arange(0, n, 17))
+
+        simt = 0.
+        for k in range(nsteps):
+            simt += 0.05
+            traf.update(simt, 0.05)
+
+        state = {}
+        for owner, name, default in traf.arrays.columns:
+            if not name.startswith('tmp') and not name.startswith('swtmp'):
+                state[owner.__class__.__name__, name] = getattr(owner, name)
+        for owner, name, default in traf.arrays.lists:
+            if name != 'route':
+                state[owner.__class__.__name__, name] = getattr(owner, name)
+        return state
+
+    def test_state(self):
+        # The full state after the update in place must be the same as that
+        # of the update in new arrays
+        for noise in [False, True]:
+            ref   = self.simulate(False, noise)
+            state = self.simulate(True, noise)
+            self.assertEqual(set(state.keys()), set(ref.keys()))
+            for key in ref:
+                np.testing.assert_equal(state[key], ref[key], str(key))
+            self.assertTrue(np.any(ref['Traffic', 'vs'] != 0.))
+
+
+class TestPrecision(unittest.TestCase):
+    def simulate(self, precision, nsteps=400):
+        """Traffic and detected conflicts per step after nsteps updates with
+           the traffic arrays in the given precision"""
+        default = settings.traf_precision
+        settings.traf_precision = precision
+        try:
+            traf = Traffic(Navdb())
+        finally:
+            settings.traf_precision = default
+
+        rs = np.random.RandomState(42)
+        n  = 200
+        traf.create_batch(['AC%04d' % i for i in range(n)], n * ['B744'],
+                          51. + rs.rand(n), 3. + 2. * rs.rand(n),
+                          rs.uniform(0., 360., n), rs.randint(20, 30, n) * 1000. * ft,
+                          rs.uniform(250., 450., n))
+        traf.dbconf.SetCRmethod('DoNothing')
+
+        # Climbs, descents, speed changes and turns
+        traf.aalt[:] = traf.alt + rs.uniform(-4000., 4000., n) * ft
+        traf.aspd[:] = rs.uniform(220., 320., n) * kts
+        traf.ahdg[:] = rs.uniform(0., 360., n)
+
+        conflicts = []
+        simt = 0.
+        for k in range(nsteps):
+            simt += 0.5
+            traf.update(simt, 0.5)
+            conflicts.append(set(traf.dbconf.conflist_now))
+        return traf, conflicts
+
+    def test_mixed(self):
+        ref, confref = self.simulate('double')
+        mix, confmix = self.simulate('mixed')
+
+        # Positions, altitudes and times stay double, the rest is float32
+        self.assertEqual(mix.lat.dtype, np.float64)
+        self.assertEqual(mix.alt.dtype, np.float64)
+        self.assertEqual(mix.tas.dtype, np.float32)
+        self.assertEqual(ref.tas.dtype, np.float64)
+
+        # Same trajectories within a few metres after 200 s, and the same
+        # conflicts, apart from the odd pair at the edge of the protected zone
+        dlat = (mix.lat - ref.lat) * 60. * nm
+        dlon = (mix.lon - ref.lon) * 60. * nm * ref.coslat
+        self.assertLess(np.max(np.hypot(dlat, dlon)), 5.)
+        self.assertLess(np.max(np.abs(mix.alt - ref.alt)), 1.)
+        self.assertLess(np.max(np.abs(mix.tas - ref.tas)), 0.1)
+        self.assertLess(np.max(np.abs(degto180(mix.trk - ref.trk))), 0.01)
+        nconf = sum(len(c) for c in confref)
+        ndiff = sum(len(c1 ^ c2) for c1, c2 in zip(confref, confmix))
+        self.assertGreater(nconf, 0)
+        self.assertLess(ndiff, 0.001 * nconf)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Validation benchmark of the mixed precision mode of the traffic arrays
+
+Runs the same random traffic sample twice, once with all traffic arrays in
+double precision and once in mixed precision (settings.traf_precision), and
+reports the time per update step and the differences in the aircraft states
+and the detected conflicts. Conflicts are detected, but not resolved
+(DoNothing), so both runs fly the same trajectories.
+
+Usage (from the BlueSky root folder):
+    python utils/precisiontest.py [number of aircraft] [number of steps]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+# Run from the BlueSky root folder, like BlueSky itself
+os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.getcwd())
+sys.path.append('bluesky/tools/')
+
+from bluesky import settings
+from bluesky.traf import Traffic
+from bluesky.tools.aero import ft, nm
+
+
+def run(precision, ntraf, nsteps, dt=0.5):
+    """Fly the test traffic with the given precision, returns traffic object,
+       the update time per step and the conflicts per step"""
+    settings.traf_precision = precision
+    traf = Traffic(None)
+
+    # Same random traffic sample for both runs
+    rs    = np.random.RandomState(42)
+    lats  = 50. + 4. * rs.rand(ntraf)
+    lons  = 2. + 6. * rs.rand(ntraf)
+    hdgs  = rs.randint(1, 361, ntraf).astype(float)
+    alts  = rs.randint(20, 30, ntraf) * 1000. * ft
+    spds  = rs.randint(250, 450, ntraf).astype(float)
+    traf.create_batch(['AC%05d' % i for i in xrange(ntraf)], ntraf * ['B744'],
+                      lats, lons, hdgs, alts, spds)
+    traf.dbconf.SetCRmethod('DoNothing')
+
+    conflicts = []
+    simt  = 0.
+    t0    = time.time()
+    for k in xrange(nsteps):
+        simt = simt + dt
+        traf.update(simt, dt)
+        conflicts.append(set(traf.dbconf.conflist_now))
+    tstep = (time.time() - t0) / nsteps
+
+    return traf, tstep, conflicts
+
+
+def main():
+    ntraf  = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    nsteps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    ref, tref, confref = run('double', ntraf, nsteps)
+    mix, tmix, confmix = run('mixed', ntraf, nsteps)
+
+    # Differences in position [m], altitude [m], speed [m/s] and track [deg]
+    dlat = np.abs(mix.lat - ref.lat) * 60. * nm
+    dlon = np.abs(mix.lon - ref.lon) * 60. * nm * ref.coslat
+    dalt = np.abs(mix.alt - ref.alt)
+    dtas = np.abs(mix.tas - ref.tas)
+    dtrk = np.abs((mix.trk - ref.trk + 180.) % 360. - 180.)
+
+    # Conflicts that are found in one run, but not in the other
+    nconf = sum([len(c) for c in confref])
+    ndiff = sum([len(c1 ^ c2) for c1, c2 in zip(confref, confmix)])
+
+    print "%d aircraft, %d steps" % (ntraf, nsteps)
+    print "Time per step : double %.2f ms, mixed %.2f ms (speed-up %.2f)" % \
+          (1000. * tref, 1000. * tmix, tref / tmix)
+    print "Max. difference position : %.3f m" % np.max(np.hypot(dlat, dlon))
+    print "Max. difference altitude : %.3f m" % np.max(dalt)
+    print "Max. difference TAS      : %.5f m/s" % np.max(dtas)
+    print "Max. difference track    : %.5f deg" % np.max(dtrk)
+    print "Conflicts (double)       : %d, different in mixed: %d" % (nconf, ndiff)
+
+
+if __name__ == '__main__':
+    main()